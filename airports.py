@@ -0,0 +1,155 @@
+# airports.py — Bundled airport reference data with code and nearest-airport lookups
+
+import os
+import threading
+
+import numpy as np
+
+AIRPORTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "airports.npz")
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = np.pi * EARTH_RADIUS_KM / 180
+
+_TEXT_FIELDS = ("icao", "iata", "name", "city", "country", "tz")
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Great-circle distance in km (vectorized)."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype="float64")) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def build_airports_file(csv_path: str, out_path: str = AIRPORTS_PATH) -> int:
+    """
+    Convert an `airportsdata` airports.csv (MIT, github.com/mborsetti/airportsdata) into the bundled file.
+
+    Columns are stored as fixed-width UTF-8 byte arrays and float64 coordinates in a
+    compressed .npz, so loading is a few column reads with no text parsing.
+    """
+    import pandas as pd
+
+    df = pd.read_csv(csv_path, keep_default_na=False, na_values=[""], dtype={"iata": str})
+    df = df.dropna(subset=["icao", "lat", "lon"]).drop_duplicates("icao").sort_values("icao")
+    arrays = {f: df[f].fillna("").str.encode("utf-8").to_numpy(dtype="S") for f in _TEXT_FIELDS}
+    arrays["lat"] = df["lat"].to_numpy(dtype="float64")
+    arrays["lon"] = df["lon"].to_numpy(dtype="float64")
+    arrays["elevation_ft"] = df["elevation"].fillna(0).to_numpy(dtype="int32")
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    np.savez_compressed(out_path, **arrays)
+    return len(df)
+
+
+class AirportIndex:
+    """
+    In-memory airport table with ICAO/IATA hash lookups and nearest-airport search.
+
+    Code lookups go through a dict of row numbers. Nearest-airport queries use the
+    table sorted by latitude: candidates come from a latitude band found with
+    `searchsorted`, and the band is widened until the best great-circle distance is
+    guaranteed to be inside it.
+
+    Args:
+        arrays (dict): Column arrays as stored by `build_airports_file`.
+    """
+
+    def __init__(self, arrays: dict):
+        self._columns = arrays
+        self.lat = arrays["lat"]
+        self.lon = arrays["lon"]
+        self._by_icao = {code.decode(): i for i, code in enumerate(arrays["icao"])}
+        self._by_iata = {code.decode(): i for i, code in enumerate(arrays["iata"]) if code}
+        self._lat_order = np.argsort(self.lat, kind="stable")
+        self._sorted_lat = self.lat[self._lat_order]
+        self._has_iata = arrays["iata"] != b""
+
+    @classmethod
+    def load(cls, path: str = AIRPORTS_PATH) -> "AirportIndex":
+        try:
+            with np.load(path) as data:
+                return cls({name: data[name] for name in data.files})
+        except Exception as e:
+            raise RuntimeError(f"Failed to load airport reference data: {e}")
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    def _record(self, row: int) -> dict:
+        record = {f: self._columns[f][row].decode("utf-8") for f in _TEXT_FIELDS}
+        record["iata"] = record["iata"] or None
+        record["lat"] = float(self.lat[row])
+        record["lon"] = float(self.lon[row])
+        record["elevation_ft"] = int(self._columns["elevation_ft"][row])
+        return record
+
+    def lookup(self, code: str):
+        """Return the airport record for an ICAO or IATA code (case-insensitive), or None."""
+        code = code.strip().upper()
+        row = self._by_icao.get(code)
+        if row is None:
+            row = self._by_iata.get(code)
+        return None if row is None else self._record(row)
+
+    def _nearest_row(self, lat: float, lon: float, require_iata: bool):
+        band = 0.5
+        while True:
+            lo = np.searchsorted(self._sorted_lat, lat - band, side="left")
+            hi = np.searchsorted(self._sorted_lat, lat + band, side="right")
+            rows = self._lat_order[lo:hi]
+            if require_iata:
+                rows = rows[self._has_iata[rows]]
+            if len(rows):
+                distances = haversine_km(lat, lon, self.lat[rows], self.lon[rows])
+                best = int(np.argmin(distances))
+                # Anything outside the band is at least `band` degrees of latitude away.
+                if distances[best] <= band * KM_PER_DEGREE_LAT or band >= 180:
+                    return int(rows[best]), float(distances[best])
+            elif band >= 180:
+                return None, None
+            band *= 2
+
+    def nearest(self, lat: float, lon: float, require_iata: bool = True, max_km: float = None):
+        """
+        Return the airport record closest to a point, with its 'distance_km'.
+
+        Args:
+            require_iata (bool): Only consider airports with an IATA code (i.e. skip most
+                private strips and heliports).
+            max_km (float): Return None when the closest airport is further away.
+        """
+        row, distance = self._nearest_row(float(lat), float(lon), require_iata)
+        if row is None or (max_km is not None and distance > max_km):
+            return None
+        record = self._record(row)
+        record["distance_km"] = distance
+        return record
+
+    def nearest_icao(self, lats, lons, require_iata: bool = True, max_km: float = None) -> list:
+        """Return the nearest airport ICAO code (or None) for each point, e.g. noise stations."""
+        codes = []
+        for lat, lon in zip(np.asarray(lats, dtype="float64"), np.asarray(lons, dtype="float64")):
+            record = None if np.isnan(lat) or np.isnan(lon) else self.nearest(lat, lon, require_iata, max_km)
+            codes.append(record["icao"] if record else None)
+        return codes
+
+    def airports_info(self, codes: list) -> dict:
+        """Return {code: record} for the known codes, the shape `plot_map` expects."""
+        info = {}
+        for code in codes:
+            record = self.lookup(code)
+            if record is not None:
+                info[code] = record
+        return info
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def get_airport_index() -> AirportIndex:
+    """Return the process-wide airport index, loading the bundled file on first use."""
+    global _default_index
+    if _default_index is None:
+        with _default_index_lock:
+            if _default_index is None:
+                _default_index = AirportIndex.load()
+    return _default_index
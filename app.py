@@ -1,16 +1,20 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import pydeck as pdk
-from datetime import datetime, timedelta
-import requests
-
-# ================================
-# Load API keys from Streamlit Cloud secrets
-# ================================
-aero_key = st.secrets["AERODATABOX_API_KEY"]
-weather_key = st.secrets["OPENWEATHER_API_KEY"]
+from arrivals import get_arrivals
+from chart_cache import DEFAULT_DPI, get_chart_renderer
+from data_fetch import get_airport_coordinates
+from instrumentation import activate, span, traced
+from live_feed import DirectoryTailer, LiveSession
+from downsampling import downsample
+from noise_cache import load_noise_data_cached
+from settings import get_setting
+from visualizations import binned_layers, new_figure, show_debug_panel
+from weather_client import get_weather_client
+
+NOISE_MAP_ZOOM = 10
+# Live matching: arrivals over this window, refetched when the window end moves on
+LIVE_FLIGHT_WINDOW = pd.Timedelta(hours=6)
+LIVE_FLIGHT_REFRESH = "15min"
 
 # ================================
 # Function to fetch arrivals from AeroDataBox API
@@ -18,38 +22,41 @@ weather_key = st.secrets["OPENWEATHER_API_KEY"]
 def fetch_arrivals(airport_code, hours=24):
     """Fetch recent flight arrivals for the given airport."""
     try:
-        url = f"https://aerodatabox.p.rapidapi.com/flights/airports/icao/{airport_code}/{(datetime.utcnow()-timedelta(hours=hours)).isoformat()}Z/{datetime.utcnow().isoformat()}Z"
-        headers = {
-            "X-RapidAPI-Key": aero_key,
-            "X-RapidAPI-Host": "aerodatabox.p.rapidapi.com"
-        }
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        data = response.json()
-        flights = []
-        for flight in data.get("arrivals", []):
-            flights.append({
-                "icao24": flight.get("icao24"),
-                "callsign": flight.get("callsign"),
-                "arrivalTime": flight.get("arrival", {}).get("scheduledTimeLocal"),
-                "origin": flight.get("origin", {}).get("airport", {}).get("name"),
-                "aircraftModel": flight.get("aircraft", {}).get("model"),
-            })
-        return pd.DataFrame(flights)
+        # API keys come from Streamlit Cloud secrets (or the environment), read when first needed
+        return get_arrivals(airport_code, get_setting("AERODATABOX_API_KEY"), hours=hours)
     except Exception as e:
         st.error(f"Error fetching arrivals: {e}")
         return pd.DataFrame()
 
+# ================================
+# Function to keep live-mode arrivals current
+# ================================
+def refresh_live_flights(session, airports):
+    """Hand the live session arrivals for the feed's airports; refetched every LIVE_FLIGHT_REFRESH."""
+    window_end = pd.Timestamp.utcnow().tz_localize(None).ceil(LIVE_FLIGHT_REFRESH)
+    key = (tuple(sorted(airports)), window_end)
+    if not airports or st.session_state.get("live_flights_key") == key:
+        return
+    # Recorded before fetching so a failing API is retried next window, not on every refresh
+    st.session_state["live_flights_key"] = key
+    aero_key = get_setting("AERODATABOX_API_KEY")
+    if not aero_key:
+        st.caption("AeroDataBox API key not configured; live samples are not matched to arrivals.")
+        return
+    try:
+        flights = get_arrivals(list(key[0]), aero_key, start=window_end - LIVE_FLIGHT_WINDOW, end=window_end)
+        session.set_flights(flights)
+    except Exception as e:
+        st.warning(f"Live arrival matching paused: {e}")
+
 # ================================
 # Function to fetch weather from OpenWeatherMap API
 # ================================
 def fetch_weather(lat, lon):
     """Fetch current weather for a given location."""
     try:
-        url = f"https://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={weather_key}&units=metric"
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
+        with span("fetch_weather"):
+            return get_weather_client(get_setting("OPENWEATHER_API_KEY")).fetch(lat, lon)
     except Exception as e:
         st.error(f"Error fetching weather: {e}")
         return None
@@ -57,15 +64,25 @@ def fetch_weather(lat, lon):
 # ================================
 # Function to plot noise trends
 # ================================
-def plot_noise_trends(noise_df):
-    """Plot noise level trends over time."""
-    fig, ax = plt.subplots(figsize=(8, 4))
-    sns.lineplot(data=noise_df, x="timestamp", y="noise_level", ax=ax)
+def _draw_noise_trends(data, y_col):
+    import seaborn as sns
+
+    fig = new_figure((8, 4))
+    ax = fig.subplots()
+    sns.lineplot(data=data, x="timestamp", y=y_col, ax=ax, estimator=None, errorbar=None)
     ax.set_title("Noise Levels Over Time")
     ax.set_xlabel("Time")
     ax.set_ylabel("Noise Level (dB)")
-    plt.xticks(rotation=45)
-    st.pyplot(fig)
+    ax.tick_params(axis="x", labelrotation=45)
+    return fig
+
+@traced()
+def plot_noise_trends(noise_df):
+    """Plot noise level trends over time (min/max-downsampled, rendered through the chart cache)."""
+    y_col = "noise_level" if "noise_level" in noise_df.columns else "noise_db"
+    data = downsample(noise_df, "timestamp", y_col, n_out=2 * 8 * DEFAULT_DPI)
+    data = data[["timestamp", y_col]].reset_index(drop=True)
+    st.image(get_chart_renderer().render("noise_trends", _draw_noise_trends, data, y_col))
 
 # ================================
 # Main Streamlit app
@@ -73,6 +90,8 @@ def plot_noise_trends(noise_df):
 st.set_page_config(page_title="Silent Skies Dashboard", layout="wide")
 st.title("Silent Skies Dashboard")
 st.write("Integrating Aircraft Noise, Flight Arrivals, and Weather Data")
+show_debug = st.sidebar.checkbox("Show performance debug panel")
+tracer = activate()
 
 # File uploader
 noise_file = st.file_uploader("Upload Aircraft Noise Data CSV", type=["csv"])
@@ -88,10 +107,13 @@ if st.button("Fetch Data"):
         st.subheader("Flight Arrivals")
         st.dataframe(arrivals_df)
 
-        # Weather info (using airport's approximate lat/lon)
-        # You can replace this with actual geocoding
-        airport_lat, airport_lon = 51.4700, -0.4543  # Example: Heathrow
-        weather = fetch_weather(airport_lat, airport_lon)
+        # Weather info at the airport's reference coordinates
+        try:
+            coords = get_airport_coordinates(airport_code)
+            weather = fetch_weather(coords["lat"], coords["lon"])
+        except ValueError as e:
+            st.warning(f"{e} Skipping weather.")
+            weather = None
         if weather:
             st.subheader("Current Weather")
             st.write(f"Temperature: {weather['main']['temp']}°C")
@@ -99,7 +121,7 @@ if st.button("Fetch Data"):
 
     # Process noise file if uploaded
     if noise_file is not None:
-        noise_df = pd.read_csv(noise_file, parse_dates=["timestamp"])
+        noise_df = load_noise_data_cached(noise_file)
         st.subheader("Noise Data")
         st.dataframe(noise_df.head())
 
@@ -108,61 +130,58 @@ if st.button("Fetch Data"):
         # Example PyDeck map
         st.subheader("Noise Event Locations")
         if {"lat", "lon"}.issubset(noise_df.columns):
-            noise_layer = pdk.Layer(
-                "ScatterplotLayer",
-                data=noise_df,
-                get_position="[lon, lat]",
-                get_color="[200, 30, 0, 160]",
-                get_radius=100,
-            )
+            # Binned server-side: only grid cells and a capped point sample reach the browser
+            import pydeck as pdk
+            value_col = "noise_level" if "noise_level" in noise_df.columns else "noise_db"
+            layers = binned_layers(noise_df, NOISE_MAP_ZOOM, "lat", "lon",
+                                   value_col if value_col in noise_df.columns else None)
             view_state = pdk.ViewState(latitude=noise_df["lat"].mean(),
                                        longitude=noise_df["lon"].mean(),
-                                       zoom=10)
-            st.pydeck_chart(pdk.Deck(layers=[noise_layer], initial_view_state=view_state))
+                                       zoom=NOISE_MAP_ZOOM)
+            st.pydeck_chart(pdk.Deck(layers=layers, initial_view_state=view_state,
+                                     tooltip={"text": "{name}"}))
 else:
     st.info("Enter an airport code and click **Fetch Data** to begin.")
 
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+# ================================
+# Live mode: tail a directory of rolling sensor CSVs
+# ================================
+st.sidebar.subheader("Live mode")
+live_dir = st.sidebar.text_input("Sensor feed directory", "")
+live_interval = st.sidebar.slider("Refresh every (seconds)", 2, 60, 5)
+live_enabled = st.sidebar.checkbox("Enable live mode", disabled=not live_dir)
+
+if live_enabled and live_dir:
+    # One LiveSession per browser session; it survives reruns and only reads new rows.
+    if st.session_state.get("live_dir") != live_dir:
+        st.session_state["live_dir"] = live_dir
+        st.session_state["live_session"] = LiveSession([DirectoryTailer(live_dir)])
+        st.session_state.pop("live_flights_key", None)
+
+    @st.fragment(run_every=live_interval)
+    def live_panel():
+        session = st.session_state["live_session"]
+        added = session.poll()
+        st.subheader("Live Noise Feed")
+        st.caption(f"{added} new samples, {len(session.buffer):,} buffered "
+                   f"({session.buffer.nbytes / 1024 ** 2:.0f} MB ring buffer)")
+        recent = session.recent("1H")
+        if recent.empty:
+            st.info("Waiting for sensor data...")
+            return
+        refresh_live_flights(session, recent["icao"].dropna().astype(str).unique().tolist())
+        plot_noise_trends(recent)
+
+        # Matched incrementally on every poll; only the latest matches are kept
+        matches = session.matches()
+        if not matches.empty:
+            st.caption(f"{len(matches):,} recent samples matched to arrivals")
+            st.dataframe(matches.tail(50).iloc[::-1], hide_index=True)
+        hourly = session.hourly()
+        if not hourly.empty:
+            st.line_chart(hourly.pivot_table(index="hour", columns="icao", values="leq_db", observed=True))
+
+    live_panel()
+
+if show_debug:
+    show_debug_panel(tracer)
@@ -0,0 +1,232 @@
+# arrivals.py — Concurrent AeroDataBox arrivals fetcher
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from flight_store import get_flight_store
+from instrumentation import traced
+from weather_client import TokenBucket, request_with_retry
+
+AERODATABOX_BASE_URL = "https://aerodatabox.p.rapidapi.com"
+AERODATABOX_HOST = "aerodatabox.p.rapidapi.com"
+
+# AeroDataBox rejects airport schedule requests spanning more than 12 hours.
+MAX_WINDOW = pd.Timedelta(hours=12)
+
+ARRIVAL_COLUMNS = [
+    "icao",
+    "flight_number",
+    "callsign",
+    "origin",
+    "aircraft_model",
+    "arrival_scheduled_utc",
+    "arrival_scheduled_local",
+]
+_CATEGORICAL_COLUMNS = ["icao", "callsign", "origin", "aircraft_model"]
+
+
+def split_windows(start, end, max_window=MAX_WINDOW) -> list:
+    """
+    Split [start, end) into consecutive windows no longer than `max_window`.
+
+    Args:
+        start: Window start (anything `pd.Timestamp` accepts).
+        end: Window end.
+        max_window: Largest span allowed per request.
+    """
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    max_window = pd.Timedelta(max_window)
+    windows = []
+    while start < end:
+        stop = min(start + max_window, end)
+        windows.append((start, stop))
+        start = stop
+    return windows
+
+
+def _parse_flight(icao: str, flight: dict) -> dict:
+    """Flatten one AeroDataBox arrival, accepting both the current and legacy payload shapes."""
+    movement = flight.get("movement") or flight.get("arrival") or {}
+    scheduled = movement.get("scheduledTime") or {}
+    origin = (movement.get("airport") or (flight.get("origin") or {}).get("airport") or {})
+    return {
+        "icao": icao,
+        "flight_number": flight.get("number"),
+        "callsign": flight.get("callSign") or flight.get("callsign"),
+        "origin": origin.get("name"),
+        "aircraft_model": (flight.get("aircraft") or {}).get("model"),
+        "arrival_scheduled_utc": scheduled.get("utc") or movement.get("scheduledTimeUtc"),
+        "arrival_scheduled_local": scheduled.get("local") or movement.get("scheduledTimeLocal"),
+    }
+
+
+def normalize_arrivals(records: list) -> pd.DataFrame:
+    """
+    Build one typed arrivals frame from flattened records.
+
+    Timestamps become tz-aware UTC datetime64 (plus the naive airport-local wall-clock time),
+    repeated strings become categoricals, and flights returned by two overlapping windows
+    are kept once (unnumbered flights are told apart by callsign and origin).
+    """
+    df = pd.DataFrame.from_records(records, columns=ARRIVAL_COLUMNS)
+    df["arrival_scheduled_utc"] = pd.to_datetime(df["arrival_scheduled_utc"], utc=True, errors="coerce")
+    # Keep the airport's wall-clock time (offset dropped): AeroDataBox windows are expressed in it.
+    local = pd.to_datetime(
+        df["arrival_scheduled_local"].astype("string").str[:16], format="%Y-%m-%d %H:%M", errors="coerce"
+    )
+    df["arrival_scheduled_local"] = local.fillna(df["arrival_scheduled_utc"].dt.tz_localize(None))
+    df = df.drop_duplicates(subset=["icao", "flight_number", "callsign", "origin", "arrival_scheduled_utc"])
+    df = df.sort_values(["icao", "arrival_scheduled_utc"], ignore_index=True)
+    return df.astype({col: "category" for col in _CATEGORICAL_COLUMNS})
+
+
+class ArrivalsClient:
+    """
+    AeroDataBox client that fetches many airports × time windows on a bounded thread pool.
+
+    A single pooled `requests.Session` is shared by all workers, calls are paced by a token
+    bucket, and 429/5xx responses are retried with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = AERODATABOX_BASE_URL,
+        max_workers: int = 4,
+        rate: float = 1.0,
+        burst: int = 4,
+        max_retries: int = 3,
+        backoff: float = 1.0,
+        timeout: float = 15,
+        max_window=MAX_WINDOW,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.max_window = pd.Timedelta(max_window)
+        self.bucket = TokenBucket(rate, burst)
+
+        # Imported here so modules that never call the API do not pay for requests.
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"X-RapidAPI-Key": api_key, "X-RapidAPI-Host": AERODATABOX_HOST})
+
+        self._lock = threading.Lock()
+        self.requests_made = 0
+        self.retries = 0
+
+    def fetch_window(self, icao: str, start, end) -> list:
+        """Return flattened arrivals for one airport and one window of at most `max_window`."""
+        fmt = "%Y-%m-%dT%H:%M"
+        url = (
+            f"{self.base_url}/flights/airports/icao/{icao}/"
+            f"{pd.Timestamp(start).strftime(fmt)}/{pd.Timestamp(end).strftime(fmt)}"
+        )
+        params = {
+            "direction": "Arrival",
+            "withLeg": "false",
+            "withCancelled": "false",
+            "withCodeshared": "false",
+        }
+        data = self._request(url, params)
+        return [_parse_flight(icao, flight) for flight in data.get("arrivals", [])]
+
+    def _request(self, url: str, params: dict) -> dict:
+        return request_with_retry(
+            self.session,
+            self.bucket,
+            url,
+            params,
+            max_retries=self.max_retries,
+            backoff=self.backoff,
+            timeout=self.timeout,
+            on_request=self._count_request,
+            on_retry=self._count_retry,
+        )
+
+    def _count_request(self, waited: float, elapsed: float) -> None:
+        with self._lock:
+            self.requests_made += 1
+
+    def _count_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def fetch(self, icao_list, start, end) -> pd.DataFrame:
+        """
+        Fetch arrivals for every airport in `icao_list` between `start` and `end`.
+
+        Args:
+            icao_list: One ICAO code or a list of codes.
+            start: Range start, interpreted by AeroDataBox in each airport's local time.
+            end: Range end.
+        """
+        if isinstance(icao_list, str):
+            icao_list = [icao_list]
+        return self.fetch_ranges([(icao, start, end) for icao in icao_list])
+
+    def fetch_ranges(self, ranges: list) -> pd.DataFrame:
+        """Fetch a list of (icao, start, end) ranges, splitting each into API-sized windows."""
+        tasks = [
+            (icao, window_start, window_end)
+            for icao, start, end in ranges
+            for window_start, window_end in split_windows(start, end, self.max_window)
+        ]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            batches = list(pool.map(lambda task: self.fetch_window(*task), tasks))
+        return normalize_arrivals([record for batch in batches for record in batch])
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_arrivals_client(api_key: str) -> ArrivalsClient:
+    """Return the process-wide client for an API key, creating it on first use."""
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            client = _clients[api_key] = ArrivalsClient(api_key)
+        return client
+
+
+@traced()
+def get_arrivals(icao_codes, api_key, start=None, end=None, hours=24, store=None) -> pd.DataFrame:
+    """
+    Fetch arrivals for one or more airports; defaults to the `hours` leading up to now.
+
+    Flights already held in the local FlightStore are served from it and only the
+    uncovered parts of the range are requested from AeroDataBox. Pass `store=False`
+    to bypass the store.
+    """
+    try:
+        end = pd.Timestamp(end) if end is not None else pd.Timestamp.utcnow().tz_localize(None)
+        start = pd.Timestamp(start) if start is not None else end - pd.Timedelta(hours=hours)
+        icao_codes = [icao_codes] if isinstance(icao_codes, str) else list(icao_codes)
+        client = get_arrivals_client(api_key)
+        if store is False:
+            return client.fetch(icao_codes, start, end)
+
+        store = store or get_flight_store()
+        missing = [
+            (icao, gap_start, gap_end)
+            for icao in icao_codes
+            for gap_start, gap_end in store.missing_ranges(icao, start, end)
+        ]
+        if missing:
+            store.upsert(client.fetch_ranges(missing))
+            for icao, gap_start, gap_end in missing:
+                store.mark_covered(icao, gap_start, gap_end)
+        return store.query(icao_codes, start, end)
+    except Exception as e:
+        raise RuntimeError(f"Failed to fetch arrivals: {e}")
@@ -0,0 +1,297 @@
+# batch_report.py — Headless multi-airport noise report pipeline (CLI and library)
+
+import argparse
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from airports import get_airport_index
+from arrivals import get_arrivals, normalize_arrivals
+from bulk_ingest import load_noise_files
+from chart_cache import render_figure
+from data_fetch import enrich_with_weather
+from downsampling import downsample
+from level_sketch import EXCEEDANCE_COLUMNS
+from matching import FlightIndex, to_utc_ns
+from noise_events import attribute_events, detect_events
+from noise_levels import LevelAccumulator
+from pools import spawn_pool
+from rollups import NoiseRollup
+from settings import get_setting
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+REQUIRED_COLUMNS = ("timestamp", "noise_db", "icao")
+SERIES_POINTS = 2400
+# A fresh worker per airport (Python 3.11+), so a worker's peak RSS is that airport's own.
+_WORKER_PER_AIRPORT = {"max_tasks_per_child": 1} if sys.version_info >= (3, 11) else {}
+
+
+def peak_rss_mb(include_children: bool = False):
+    """
+    Return this process's peak resident set size in MB (None where unsupported).
+
+    Args:
+        include_children (bool): Also consider finished child processes (pool workers),
+            giving the peak of the whole run.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if include_children:
+        peak = max(peak, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # Linux reports kilobytes, macOS bytes.
+    return round(peak / (1024 ** 2 if sys.platform == "darwin" else 1024), 1)
+
+
+class StageTimer:
+    """Accumulate wall-clock seconds per named pipeline stage."""
+
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round(self.timings.get(name, 0.0) + time.perf_counter() - started, 4)
+
+
+def load_noise(noise_paths: list, start=None, end=None, max_workers: int = None) -> pd.DataFrame:
+    """Load noise files, directories or glob patterns, keeping samples in [start, end) (UTC)."""
+    noise, _ = load_noise_files(noise_paths, max_workers=max_workers)
+    missing = [c for c in REQUIRED_COLUMNS if c not in noise.columns]
+    if missing:
+        raise ValueError(f"Missing columns {missing} in noise data.")
+
+    times = to_utc_ns(noise["timestamp"])
+    keep = times != np.iinfo(np.int64).min
+    if start is not None:
+        keep &= times >= to_utc_ns([pd.Timestamp(start)])[0]
+    if end is not None:
+        keep &= times < to_utc_ns([pd.Timestamp(end)])[0]
+    return noise[keep]
+
+
+def process_airport(
+    icao: str,
+    noise: pd.DataFrame,
+    out_dir: str,
+    start=None,
+    end=None,
+    aero_key: str = None,
+    weather_key: str = None,
+) -> dict:
+    """
+    Run enrich → arrivals → merge → aggregate → render → write for one airport's samples.
+
+    Writes hourly.parquet (with L10/L50/L90), daily.parquet, events.parquet, noise_series.png and
+    combined_hourly.png under `out_dir/<icao>/`.
+
+    Returns:
+        dict: Row/event counts, output paths, per-stage timings (s) and the peak RSS (MB)
+        of the process it ran in.
+    """
+    # Imported here so the pool workers, not the CLI process, pay for Matplotlib/Streamlit.
+    from visualizations import draw_combined_hourly, draw_noise_series
+
+    timer = StageTimer()
+    airport_dir = os.path.join(out_dir, icao)
+    os.makedirs(airport_dir, exist_ok=True)
+    airport = get_airport_index().lookup(icao)
+
+    with timer.stage("enrich"):
+        if weather_key and airport is not None:
+            noise = enrich_with_weather(noise, airport["lat"], airport["lon"], weather_key)
+
+    with timer.stage("arrivals"):
+        if aero_key:
+            times = noise["timestamp"]
+            arrivals = get_arrivals(icao, aero_key, start=start or times.min(), end=end or times.max())
+        else:
+            arrivals = normalize_arrivals([])
+
+    with timer.stage("merge"):
+        # Only the count is reported, so match positions rather than building the merged frame.
+        matched_rows = 0
+        if not arrivals.empty:
+            index = FlightIndex(arrivals, by="icao")
+            positions = index.match_positions(noise["timestamp"], noise["icao"])
+            numbered = index.df_flights["flight_number"].notna().to_numpy()
+            matched_rows = int(numbered[positions[positions >= 0]].sum())
+
+    with timer.stage("aggregate"):
+        levels = LevelAccumulator(keys=["icao"]).update(noise)
+        hourly, daily = levels.hourly(), levels.daily()
+        events = detect_events(noise)
+        if not arrivals.empty:
+            events = attribute_events(events, arrivals)
+        combined = (
+            NoiseRollup.build(noise, arrivals, keys=("icao",), resolutions=("1H",))
+            .query([icao], resolution="1H")
+            .rename(columns={"bucket": "hour"})[["hour", "leq_db", "arrivals_count", *EXCEEDANCE_COLUMNS]]
+        )
+        # Statistical levels per hour, matched on UTC hour whatever the timestamps' zone
+        exceedance = combined.set_index(to_utc_ns(combined["hour"]))
+        for col in EXCEEDANCE_COLUMNS:
+            hourly[col] = exceedance[col].reindex(to_utc_ns(hourly["hour"])).to_numpy()
+
+    outputs = {}
+    with timer.stage("render"):
+        series = downsample(noise[["timestamp", "noise_db"]], n_out=SERIES_POINTS).reset_index(drop=True)
+        for name, fig in (
+            ("noise_series", draw_noise_series(series, icao)),
+            ("combined_hourly", draw_combined_hourly(combined, icao)),
+        ):
+            outputs[name] = os.path.join(airport_dir, f"{name}.png")
+            with open(outputs[name], "wb") as f:
+                f.write(render_figure(fig))
+
+    with timer.stage("write"):
+        for name, frame in (("hourly", hourly), ("daily", daily), ("events", events)):
+            outputs[name] = os.path.join(airport_dir, f"{name}.parquet")
+            frame.to_parquet(outputs[name], index=False)
+
+    return {
+        "icao": icao,
+        "rows": len(noise),
+        "arrivals": len(arrivals),
+        "matched_rows": matched_rows,
+        "events": len(events),
+        "outputs": outputs,
+        "timings": timer.timings,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_report(
+    noise_paths: list,
+    out_dir: str,
+    icao_list: list = None,
+    start=None,
+    end=None,
+    aero_key: str = None,
+    weather_key: str = None,
+    max_workers: int = None,
+) -> dict:
+    """
+    Build reports for several airports, one worker process per airport.
+
+    Each airport's 'peak_rss_scope' says what its 'peak_rss_mb' covers: "airport" when
+    it ran alone in a fresh worker, "process" when the figure also includes other work
+    in the same process (the load stage, or earlier airports in a reused worker on
+    Python < 3.11). The report's own 'peak_rss_mb' is the peak over the whole run.
+
+    Args:
+        noise_paths (list): Noise CSV/XLSX files, directories or glob patterns with
+            'timestamp', 'noise_db', 'icao'.
+        out_dir (str): Output directory; one sub-directory per airport plus report.json.
+        icao_list (list): Airports to report on; all airports in the data when None.
+        start, end: Optional UTC range applied to noise samples and arrivals.
+        aero_key (str), weather_key (str): API keys; the stage is skipped without one.
+        max_workers (int): Pool size; 1 runs everything in this process.
+
+    Returns:
+        dict: The report written to report.json.
+    """
+    timer = StageTimer()
+    os.makedirs(out_dir, exist_ok=True)
+    with timer.stage("load"):
+        noise = load_noise(noise_paths, start, end, max_workers)
+        by_airport = dict(tuple(noise.groupby(noise["icao"].astype(str), sort=False)))
+    icao_list = icao_list or sorted(by_airport)
+
+    airports, jobs = {}, {}
+    for icao in icao_list:
+        if icao not in by_airport:
+            airports[icao] = {"icao": icao, "error": "No noise samples in range."}
+        else:
+            jobs[icao] = (icao, by_airport[icao], out_dir, start, end, aero_key, weather_key)
+
+    with timer.stage("airports"):
+        if max_workers == 1 or len(jobs) <= 1:
+            for icao, args in jobs.items():
+                airports[icao] = _run_safely(*args)
+            scope = "process"
+        else:
+            with spawn_pool(max_workers, **_WORKER_PER_AIRPORT) as pool:
+                futures = {icao: pool.submit(_run_safely, *args) for icao, args in jobs.items()}
+                for icao, future in futures.items():
+                    airports[icao] = future.result()
+            scope = "airport" if _WORKER_PER_AIRPORT else "process"
+    for icao in jobs:
+        if "error" not in airports[icao]:
+            airports[icao]["peak_rss_scope"] = scope
+
+    report = {
+        "created": pd.Timestamp.utcnow().isoformat(),
+        "start": None if start is None else str(start),
+        "end": None if end is None else str(end),
+        "timings": timer.timings,
+        "peak_rss_mb": peak_rss_mb(include_children=True),
+        "airports": [airports[icao] for icao in icao_list],
+    }
+    with open(os.path.join(out_dir, "report.json"), "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    return report
+
+
+def _run_safely(*args) -> dict:
+    try:
+        return process_airport(*args)
+    except Exception as e:
+        return {"icao": args[0], "error": f"{type(e).__name__}: {e}"}
+
+
+def _print_report(report: dict) -> None:
+    stages = ["enrich", "arrivals", "merge", "aggregate", "render", "write"]
+    print(f"load {report['timings']['load']:.2f}s, airports {report['timings']['airports']:.2f}s, "
+          f"peak {report['peak_rss_mb']} MB")
+    print(f"{'icao':<6} {'rows':>10} {'events':>7} " + " ".join(f"{s:>9}" for s in stages) + f" {'peak MB':>8}")
+    for airport in report["airports"]:
+        if "error" in airport:
+            print(f"{airport['icao']:<6} error: {airport['error']}")
+            continue
+        timings = " ".join(f"{airport['timings'].get(s, 0):>8.2f}s" for s in stages)
+        # '*' marks a figure shared with other work in the same process.
+        peak = f"{airport['peak_rss_mb']}{'' if airport['peak_rss_scope'] == 'airport' else '*'}"
+        print(f"{airport['icao']:<6} {airport['rows']:>10} {airport['events']:>7} {timings} {peak:>8}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Build Silent Skies noise reports without the dashboard.")
+    parser.add_argument("noise_files", nargs="+", help="Noise CSV/XLSX files, directories or glob patterns")
+    parser.add_argument("--out", default="reports", help="Output directory (default: reports)")
+    parser.add_argument("--airports", help="Comma-separated ICAO codes (default: all in the data)")
+    parser.add_argument("--start", help="Range start, UTC (e.g. 2025-07-17)")
+    parser.add_argument("--end", help="Range end (exclusive), UTC")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    icao_list = [code.strip().upper() for code in args.airports.split(",")] if args.airports else None
+    report = run_report(
+        args.noise_files,
+        args.out,
+        icao_list=icao_list,
+        start=args.start,
+        end=args.end,
+        aero_key=get_setting("AERODATABOX_API_KEY"),
+        weather_key=get_setting("OPENWEATHER_API_KEY"),
+        max_workers=args.workers,
+    )
+    _print_report(report)
+    return 1 if any("error" in airport for airport in report["airports"]) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,453 @@
+# benchmarks.py — Synthetic data generators and benchmarks for the ingestion, merge and aggregation hot paths
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from batch_report import peak_rss_mb
+
+DEFAULT_SIZES = ("10k", "1m")
+TZ_MIXES = ("naive", "utc", "mixed")
+_SUFFIXES = {"k": 10 ** 3, "m": 10 ** 6, "b": 10 ** 9}
+
+
+def parse_size(size) -> int:
+    """Parse '10k', '1m', '50m' or a plain integer into a row count."""
+    size = str(size).strip().lower()
+    if size[-1] in _SUFFIXES:
+        return int(float(size[:-1]) * _SUFFIXES[size[-1]])
+    return int(size)
+
+
+def make_noise(
+    rows: int,
+    stations: int = 4,
+    airports: int = 2,
+    freq: str = "1s",
+    start: str = "2025-07-17",
+    seed: int = 0,
+) -> pd.DataFrame:
+    """
+    Generate 1 Hz-style noise samples with occasional flyover peaks.
+
+    Rows are split evenly over `airports` × `stations` series; each series is a
+    regular time grid with a ~50 dB background and 30 s peaks every ~3 minutes.
+    """
+    rng = np.random.default_rng(seed)
+    n_series = airports * stations
+    per_series = -(-rows // n_series)
+    offsets = np.arange(per_series) * pd.Timedelta(freq).value
+    base = pd.Timestamp(start).value
+
+    series = np.repeat(np.arange(n_series), per_series)[:rows]
+    timestamps = base + np.tile(offsets, n_series)[:rows]
+    levels = rng.normal(50, 3, rows)
+    peaks = (timestamps // pd.Timedelta(freq).value + series * 37) % 180 < 30
+    levels[peaks] += rng.uniform(15, 35)
+    return pd.DataFrame({
+        "timestamp": pd.to_datetime(timestamps),
+        "noise_db": levels.astype("float32"),
+        "icao": pd.Categorical.from_codes(series // stations, [f"A{i:03d}" for i in range(airports)]),
+        "station": pd.Categorical.from_codes(series, [f"S{i:03d}" for i in range(n_series)]),
+    })
+
+
+def make_flights(noise: pd.DataFrame, per_hour: int = 20, seed: int = 0) -> pd.DataFrame:
+    """Generate arrivals spread over the noise time span for each airport in `noise`."""
+    rng = np.random.default_rng(seed)
+    start, end = noise["timestamp"].min(), noise["timestamp"].max()
+    hours = max((end - start) / pd.Timedelta(hours=1), 1.0)
+    frames = []
+    for icao in noise["icao"].cat.categories:
+        n = max(int(hours * per_hour), 1)
+        times = start.value + np.sort(rng.integers(0, max(end.value - start.value, 1), n))
+        frames.append(pd.DataFrame({
+            "icao": icao,
+            "flight_number": [f"SS{i:04d}" for i in range(n)],
+            "arrival_scheduled_utc": pd.to_datetime(times).tz_localize("UTC"),
+        }))
+    flights = pd.concat(frames, ignore_index=True)
+    flights["icao"] = flights["icao"].astype("category")
+    return flights
+
+
+def format_timestamps(timestamps: pd.Series, tz_mix: str = "naive") -> pd.Series:
+    """Render timestamps as CSV text: 'naive', 'utc' (Z suffix) or 'mixed' (+02:00 and Z offsets)."""
+    if tz_mix not in TZ_MIXES:
+        raise ValueError(f"Unknown tz mix '{tz_mix}', expected one of {TZ_MIXES}.")
+    text = timestamps.dt.strftime("%Y-%m-%dT%H:%M:%S")
+    if tz_mix == "utc":
+        return text + "Z"
+    if tz_mix == "mixed":
+        shifted = (timestamps + pd.Timedelta(hours=2)).dt.strftime("%Y-%m-%dT%H:%M:%S") + "+02:00"
+        return (text + "Z").where(np.arange(len(text)) % 2 == 0, shifted)
+    return text
+
+
+def write_noise_csv(path: str, rows: int, tz_mix: str = "naive", **kwargs) -> str:
+    noise = make_noise(rows, **kwargs)
+    noise["timestamp"] = format_timestamps(noise["timestamp"], tz_mix)
+    noise.to_csv(path, index=False)
+    return path
+
+
+# Each case: setup(rows, workdir) -> state (untimed), run(state) (timed). Setups import the
+# modules a case uses so import time is not counted.
+def _setup_load(rows, workdir, tz_mix="naive"):
+    import data_fetch  # noqa: F401
+    return write_noise_csv(os.path.join(workdir, f"noise_{rows}_{tz_mix}.csv"), rows, tz_mix)
+
+
+def _run_load(path):
+    from data_fetch import load_noise_data
+    load_noise_data(path)
+
+
+def _setup_load_mixed(rows, workdir):
+    return _setup_load(rows, workdir, "mixed")
+
+
+def _setup_merge(rows, workdir):
+    import data_fetch, rollups  # noqa: F401
+    noise = make_noise(rows)
+    return noise, make_flights(noise)
+
+
+def _run_merge(state):
+    from data_fetch import merge_by_time
+    merge_by_time(*state, by="icao")
+
+
+def _setup_hourly(rows, workdir):
+    import noise_levels  # noqa: F401
+    return make_noise(rows)
+
+
+def _run_hourly_leq(noise):
+    from noise_levels import hourly_leq
+    hourly_leq(noise, keys=("icao",))
+
+
+def _run_rollup_hourly(state):
+    from rollups import NoiseRollup
+    noise, flights = state
+    NoiseRollup.build(noise, flights, keys=("icao",), resolutions=("1H",)).query(resolution="1H")
+
+
+def _setup_compact(rows, workdir):
+    import compact, data_fetch  # noqa: F401
+    from data_fetch import merge_by_time
+    noise = make_noise(rows)
+    # As loaded from CSV: float64 levels and object strings.
+    raw = noise.astype({"icao": object, "station": object, "noise_db": "float64"})
+    return merge_by_time(raw, make_flights(noise).astype({"icao": object}), by="icao")
+
+
+def _run_compact(merged):
+    from compact import compact_merged
+    compact_merged(merged)
+
+
+def _setup_scenarios(rows, workdir):
+    from scenarios import ScenarioEngine, ScenarioSet
+    # One attributed event per row: a year of arrivals is ~100k-300k rows.
+    rng = np.random.default_rng(0)
+    events = pd.DataFrame({
+        "lmax_time": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 365 * 86400, rows), unit="s"),
+        "lmax_db": rng.normal(72, 5, rows),
+        "sel_db": rng.normal(82, 4, rows),
+        "aircraft_model": rng.choice(["Airbus A320", "Boeing 737-800", "ATR 72", "Embraer 190"], rows),
+        "icao": "A000",
+    })
+    technologies = ScenarioEngine(events.head(1)).technologies
+    return events, technologies, ScenarioSet.sample(technologies, 1_000)
+
+
+def _run_scenarios(state):
+    from scenarios import ScenarioEngine
+    events, technologies, scenarios = state
+    ScenarioEngine(events, technologies).run(scenarios)
+
+
+def _setup_exposure(rows, workdir):
+    # One arrival per row over a year, landing on two parallel runways.
+    from exposure import ExposureCache, nominal_runway
+    rng = np.random.default_rng(0)
+    arrivals = pd.DataFrame({
+        "arrival_scheduled_local": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 365 * 86400, rows), unit="s"),
+        "aircraft_model": rng.choice(["Airbus A320", "Boeing 737-800", "ATR 72", "Embraer 190"], rows),
+    })
+    runways = [nominal_runway(52.36, 13.48, 250, 0.6), nominal_runway(52.38, 13.52, 250, 0.4)]
+    return arrivals, runways, ExposureCache(None, max_entries=0)
+
+
+def _run_exposure(state):
+    from exposure import compute_exposure
+    arrivals, runways, cache = state
+    compute_exposure(arrivals, 52.37, 13.5, runways=runways, cells=500, cache=cache)
+
+
+def _setup_bulk_files(rows, workdir):
+    # One export per station, as microphones deliver them.
+    noise = make_noise(rows, stations=20, airports=1)
+    for station, part in noise.groupby("station", observed=True):
+        part.drop(columns=["station"]).to_csv(os.path.join(workdir, f"{station}.csv"), index=False)
+    return workdir
+
+
+def _run_bulk_files(workdir):
+    from bulk_ingest import load_noise_files
+    load_noise_files(workdir)
+
+
+def _setup_series(rows, workdir):
+    import chart_cache, downsampling, visualizations  # noqa: F401
+    noise = make_noise(rows, airports=1, stations=1)
+    return noise[["timestamp", "noise_db"]]
+
+
+def _run_render(series):
+    from chart_cache import render_figure
+    from downsampling import downsample
+    from visualizations import draw_noise_series
+    render_figure(draw_noise_series(downsample(series, n_out=2400).reset_index(drop=True), "A000"))
+
+
+CASES = {
+    "load_noise_data": (_setup_load, _run_load),
+    "load_noise_data_mixed_tz": (_setup_load_mixed, _run_load),
+    "merge_by_time": (_setup_merge, _run_merge),
+    "hourly_leq": (_setup_hourly, _run_hourly_leq),
+    "hourly_rollup": (_setup_merge, _run_rollup_hourly),
+    "compact_merged": (_setup_compact, _run_compact),
+    "retrofit_scenarios_x1000": (_setup_scenarios, _run_scenarios),
+    "exposure_grid_500": (_setup_exposure, _run_exposure),
+    "bulk_ingest_files": (_setup_bulk_files, _run_bulk_files),
+    "render_noise_series": (_setup_series, _run_render),
+}
+
+
+def run_case(name: str, rows: int, repeat: int = 3, workdir: str = None) -> dict:
+    """Run one benchmark case in this process and return its timings and memory."""
+    setup, run = CASES[name]
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        state = setup(rows, tmp)
+        setup_rss = peak_rss_mb()
+        seconds = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run(state)
+            seconds.append(time.perf_counter() - started)
+    return {
+        "case": name,
+        "rows": rows,
+        "repeat": repeat,
+        "min_s": round(min(seconds), 5),
+        "median_s": round(statistics.median(seconds), 5),
+        "rows_per_s": round(rows / min(seconds)) if min(seconds) > 0 else None,
+        "setup_peak_rss_mb": setup_rss,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def run_benchmarks(cases=None, sizes=DEFAULT_SIZES, repeat: int = 3, isolate: bool = True, workdir: str = None) -> dict:
+    """
+    Run benchmark cases at several sizes.
+
+    Args:
+        cases (list): Case names from CASES; all when None.
+        sizes: Row counts or strings like '10k', '1m', '50m'.
+        isolate (bool): Run every (case, size) in a fresh process so peak RSS is per case.
+    """
+    cases = list(cases or CASES)
+    unknown = [c for c in cases if c not in CASES]
+    if unknown:
+        raise ValueError(f"Unknown benchmark cases {unknown}, expected some of {list(CASES)}.")
+
+    results = []
+    for rows in (parse_size(s) for s in sizes):
+        for name in cases:
+            if isolate:
+                with multiprocessing.get_context("spawn").Pool(1, maxtasksperchild=1) as pool:
+                    result = pool.apply(run_case, (name, rows, repeat, workdir))
+            else:
+                result = run_case(name, rows, repeat, workdir)
+            results.append(result)
+            print(f"{name:<26} {rows:>11,} rows  min {result['min_s']:>9.4f}s  "
+                  f"peak {result['peak_rss_mb']!s:>7} MB", file=sys.stderr)
+
+    return {
+        "revision": _git_revision(),
+        "created": pd.Timestamp.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict) -> list:
+    """Return (case, rows, baseline_s, current_s, ratio) for cases present in both runs."""
+    before = {(r["case"], r["rows"]): r for r in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        old = before.get((result["case"], result["rows"]))
+        if old is not None:
+            rows.append((result["case"], result["rows"], old["min_s"], result["min_s"], result["min_s"] / old["min_s"]))
+    return rows
+
+
+# Cold start per entry point: modules it imports, heavy packages allowed to load at import
+# time, and a budget in seconds on top of the numpy/pandas import every module pays.
+IMPORT_PROFILES = {
+    "worker": (("batch_report", "bulk_ingest", "exposure", "live_feed", "scenarios"), (), 0.3),
+    "dashboard": (
+        ("streamlit", "visualizations", "memo", "noise_cache", "arrivals", "compact", "data_fetch", "settings"),
+        ("streamlit",),
+        0.5,
+    ),
+}
+# pyarrow itself counts only when pandas did not already load it (pandas 2.0 does).
+HEAVY_MODULES = ("streamlit", "matplotlib", "seaborn", "pydeck", "requests", "dotenv", "pyarrow", "pyarrow.parquet")
+
+_IMPORT_PROBE = """
+import sys, time
+started = time.perf_counter()
+import numpy, pandas
+floor = time.perf_counter() - started
+preloaded = set(sys.modules)
+started = time.perf_counter()
+{imports}
+seconds = time.perf_counter() - started
+print(floor, seconds, ",".join(m for m in {heavy!r} if m in sys.modules and m not in preloaded))
+"""
+
+
+def _slowest_imports(importtime: str, n: int = 5) -> list:
+    """Return the `n` slowest top-level imports after numpy/pandas from `-X importtime` output."""
+    entries, after_floor = [], False
+    for line in importtime.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit() or name.startswith("  "):
+            continue  # header, or an import nested in another one
+        if after_floor:
+            entries.append((name.strip(), round(int(cumulative) / 1e6, 3)))
+        after_floor = after_floor or name.strip() == "pandas"
+    return sorted(entries, key=lambda e: -e[1])[:n]
+
+
+def measure_imports(modules, repeat: int = 3) -> dict:
+    """
+    Import `modules` in fresh interpreters (`python -X importtime`) and time it.
+
+    Returns:
+        dict: Best-of-`repeat` seconds beyond the numpy/pandas import ('seconds'),
+        that floor ('floor_s'), heavy packages loaded ('heavy') and the slowest
+        top-level imports ('slowest').
+    """
+    code = _IMPORT_PROBE.format(imports="\n".join(f"import {m}" for m in modules), heavy=HEAVY_MODULES)
+    best = None
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"Failed to import {', '.join(modules)}: {result.stderr.strip().splitlines()[-1]}")
+        floor, seconds, heavy = result.stdout.splitlines()[-1].split(" ")
+        if best is None or float(seconds) < best["seconds"]:
+            best = {
+                "seconds": round(float(seconds), 3),
+                "floor_s": round(float(floor), 3),
+                "heavy": [m for m in heavy.split(",") if m],
+                "importtime": result.stderr,
+            }
+    best["slowest"] = _slowest_imports(best.pop("importtime"))
+    return best
+
+
+def check_imports(profiles: dict = None, repeat: int = 3) -> list:
+    """Measure each import profile against its budget and allowed heavy packages."""
+    results = []
+    for name, (modules, allowed, budget) in (profiles or IMPORT_PROFILES).items():
+        result = measure_imports(modules, repeat)
+        unexpected = [m for m in result["heavy"] if m not in allowed]
+        results.append({
+            "profile": name,
+            "budget_s": budget,
+            **result,
+            "unexpected": unexpected,
+            "ok": result["seconds"] <= budget and not unexpected,
+        })
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark Silent Skies hot paths on synthetic data.")
+    parser.add_argument("--cases", help=f"Comma-separated cases (default: all of {', '.join(CASES)})")
+    parser.add_argument("--sizes", default=",".join(DEFAULT_SIZES), help="Comma-separated row counts, e.g. 10k,1m,50m")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", default="benchmark_results.json", help="JSON results file")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Slowdown ratio reported as a regression")
+    parser.add_argument("--no-isolate", action="store_true", help="Run all cases in this process")
+    parser.add_argument("--imports", action="store_true", help="Only check cold-start import times against budgets")
+    args = parser.parse_args(argv)
+
+    if args.imports:
+        results = check_imports(repeat=args.repeat)
+        for result in results:
+            flag = "" if result["ok"] else "  OVER BUDGET" if not result["unexpected"] else f"  LOADS {result['unexpected']}"
+            slowest = ", ".join(f"{name} {seconds:.3f}s" for name, seconds in result["slowest"])
+            print(f"{result['profile']:<10} {result['seconds']:.3f}s (budget {result['budget_s']:.2f}s, "
+                  f"+ numpy/pandas {result['floor_s']:.3f}s){flag}  slowest: {slowest}")
+        return 0 if all(r["ok"] for r in results) else 1
+
+    report = run_benchmarks(
+        cases=args.cases.split(",") if args.cases else None,
+        sizes=args.sizes.split(","),
+        repeat=args.repeat,
+        isolate=not args.no_isolate,
+    )
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = 0
+        for case, rows, old, new, ratio in compare(baseline, report):
+            flag = "  REGRESSION" if ratio > args.threshold else ""
+            regressions += bool(flag)
+            print(f"{case:<26} {rows:>11,}  {old:>9.4f}s → {new:>9.4f}s  x{ratio:.2f}{flag}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
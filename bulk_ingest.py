@@ -0,0 +1,184 @@
+# bulk_ingest.py — Parallel ingestion of many noise exports (directories, globs, uploads, XLSX sheets)
+#
+# pyarrow is imported inside the functions that build tables, so importing this module
+# (e.g. in the batch CLI before any file is read) stays as cheap as pandas.
+
+from __future__ import annotations
+
+import glob
+import io
+import os
+import time
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from data_fetch import NOISE_DTYPES, detect_timestamp_format, parse_timestamps, stringify_mixed_columns
+from instrumentation import traced
+from matching import to_utc_naive
+from pools import spawn_pool
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+SUPPORTED_SUFFIXES = (".csv", ".xlsx")
+PROVENANCE_COLUMNS = ["source_file", "sheet"]
+# Total input size needed before files are parsed in a process pool (see spawn_pool).
+PARALLEL_MIN_BYTES = 8 * 1024 ** 2
+
+
+def expand_sources(sources) -> list:
+    """
+    Resolve noise sources into a flat, ordered list of files.
+
+    Args:
+        sources: A path, directory, glob pattern or uploaded file, or a list of them.
+            Directories contribute every CSV/XLSX below them, sorted by path.
+    """
+    if isinstance(sources, (str, os.PathLike)) or hasattr(sources, "read"):
+        sources = [sources]
+    files = []
+    for source in sources:
+        if hasattr(source, "read"):  # Streamlit uploaded file or other file-like object
+            files.append(source)
+            continue
+        source = os.fspath(source)
+        if os.path.isdir(source):
+            matches = glob.glob(os.path.join(source, "**", "*"), recursive=True)
+            files.extend(sorted(p for p in matches if p.lower().endswith(SUPPORTED_SUFFIXES)))
+        elif glob.has_magic(source):
+            files.extend(sorted(glob.glob(source, recursive=True)))
+        else:
+            files.append(source)
+    return files
+
+
+def _payload(source) -> tuple:
+    """Return (name, path or bytes, size) for a source; uploads are sent to workers as bytes."""
+    if isinstance(source, str):
+        return source, source, os.path.getsize(source)
+    if hasattr(source, "getvalue"):
+        data = source.getvalue()
+    else:
+        source.seek(0)
+        data = source.read()
+    return os.path.basename(source.name), data, len(data)
+
+
+def _provenance(value: str, rows: int) -> pa.DictionaryArray:
+    import pyarrow as pa
+
+    # One dictionary entry per file instead of one string per row.
+    return pa.DictionaryArray.from_arrays(pa.array(np.zeros(rows, dtype="int32")), pa.array([value]))
+
+
+def _to_table(df: pd.DataFrame, name: str, sheet: str) -> pa.Table:
+    """Type one sheet, tag it with its file, sheet and (when missing) station, and convert to Arrow."""
+    import pyarrow as pa
+
+    if "timestamp" in df.columns:
+        df["timestamp"] = to_utc_naive(parse_timestamps(df["timestamp"], detect_timestamp_format(df["timestamp"])))
+    dtypes = {col: dtype for col, dtype in NOISE_DTYPES.items() if col in df.columns}
+    table = pa.Table.from_pandas(stringify_mixed_columns(df).astype(dtypes), preserve_index=False)
+    # int32 dictionary indices everywhere, so files with few or many categories concatenate.
+    for i, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type) and field.type.index_type != pa.int32():
+            table = table.set_column(i, field.name, table.column(i).cast(pa.dictionary(pa.int32(), field.type.value_type)))
+    if "station" not in table.column_names:
+        # One export per microphone: the file name identifies the station.
+        station = os.path.splitext(os.path.basename(name))[0]
+        table = table.append_column("station", _provenance(station, len(table)))
+    table = table.append_column("source_file", _provenance(name, len(table)))
+    return table.append_column("sheet", _provenance(sheet, len(table)))
+
+
+def _parse_source(name: str, data) -> tuple:
+    """
+    Parse one CSV or every sheet of one XLSX into Arrow tables; runs in worker processes.
+
+    Returns:
+        tuple: (name, tables, error); `error` is None on success.
+    """
+    try:
+        source = data if isinstance(data, str) else io.BytesIO(data)
+        if name.lower().endswith(".csv"):
+            frames = {"": pd.read_csv(source, dtype=NOISE_DTYPES)}
+        elif name.lower().endswith(".xlsx"):
+            frames = pd.read_excel(source, sheet_name=None, dtype=NOISE_DTYPES)
+        else:
+            raise ValueError("Unsupported file type")
+        tables = [_to_table(df, name, str(sheet)) for sheet, df in frames.items() if not df.empty]
+        return name, tables, None
+    except Exception as e:
+        return name, [], f"{type(e).__name__}: {e}"
+
+
+def _concat(tables: list) -> pa.Table:
+    """Concatenate without copying column buffers; columns missing from a file become nulls."""
+    import pyarrow as pa
+
+    return pa.concat_tables(tables, promote_options="permissive")
+
+
+@traced()
+def load_noise_files(sources, max_workers: int = None, skip_errors: bool = False) -> tuple:
+    """
+    Load many noise exports (one per microphone and month, say) into a single frame.
+
+    Files, and every sheet of XLSX workbooks, are parsed in a spawn process pool once
+    the input is large enough. Each worker returns Arrow tables; they are concatenated
+    without copying and converted to pandas once, so no intermediate concatenated
+    frames are built. Rows get categorical 'source_file' and 'sheet' columns, and
+    'station' from the file name where a file has none. Timestamps become naive UTC
+    so files with and without offsets line up.
+
+    Args:
+        sources: Paths, directories, glob patterns or uploaded files (see `expand_sources`).
+        max_workers (int): Pool size; 1 parses everything in this process.
+        skip_errors (bool): Leave out unreadable files (listed in the report) instead of raising.
+
+    Returns:
+        tuple: (noise DataFrame, report dict with files, sheets, rows, mb, seconds,
+        rows_per_s and errors).
+    """
+    try:
+        started = time.perf_counter()
+        files = expand_sources(sources)
+        if not files:
+            raise ValueError("No CSV or XLSX files found.")
+        names, payloads, sizes = zip(*(_payload(f) for f in files))
+
+        if max_workers != 1 and len(files) > 1 and sum(sizes) >= PARALLEL_MIN_BYTES:
+            with spawn_pool(max_workers) as pool:
+                results = list(pool.map(_parse_source, names, payloads))
+        else:
+            results = [_parse_source(name, data) for name, data in zip(names, payloads)]
+
+        errors = {name: error for name, _, error in results if error is not None}
+        if errors and not skip_errors:
+            name, error = next(iter(errors.items()))
+            raise ValueError(f"{name}: {error}")
+        tables = [table for _, parsed, _ in results for table in parsed]
+        if not tables:
+            raise ValueError("No rows in the given files.")
+
+        n_sheets = len(tables)
+        table = _concat(tables)
+        del tables, results
+        df = table.to_pandas(split_blocks=True, self_destruct=True)
+        del table
+
+        seconds = time.perf_counter() - started
+        report = {
+            "files": len(files) - len(errors),
+            "sheets": n_sheets,
+            "rows": len(df),
+            "mb": round(sum(sizes) / 1024 ** 2, 2),
+            "seconds": round(seconds, 3),
+            "rows_per_s": int(len(df) / seconds) if seconds else None,
+            "errors": errors,
+        }
+        return df, report
+    except Exception as e:
+        raise RuntimeError(f"Failed to load files: {e}")
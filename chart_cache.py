@@ -0,0 +1,204 @@
+# chart_cache.py — Rendered chart cache and parallel Matplotlib rendering
+
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+from pools import spawn_pool
+
+DEFAULT_MAX_ENTRIES = 128
+DEFAULT_MAX_BYTES = 256 * 1024 ** 2
+DEFAULT_DPI = 100
+
+# Uncached charts needed before rendering goes to the pool (see spawn_pool).
+PARALLEL_MIN_CHARTS = 4
+
+
+def _update(digest, obj) -> None:
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        columns = list(obj.columns) if isinstance(obj, pd.DataFrame) else [obj.name]
+        dtypes = obj.dtypes.astype(str).tolist() if isinstance(obj, pd.DataFrame) else [str(obj.dtype)]
+        digest.update(repr((type(obj).__name__, obj.shape, columns, dtypes)).encode())
+        digest.update(pd.util.hash_pandas_object(obj, index=False).to_numpy().tobytes())
+    elif isinstance(obj, np.ndarray):
+        digest.update(repr((obj.shape, str(obj.dtype))).encode())
+        digest.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, dict):
+        digest.update(b"{")
+        for key in sorted(obj, key=repr):
+            _update(digest, key)
+            _update(digest, obj[key])
+        digest.update(b"}")
+    elif isinstance(obj, (list, tuple)):
+        digest.update(b"(")
+        for item in obj:
+            _update(digest, item)
+        digest.update(b")")
+    else:
+        digest.update(repr(obj).encode())
+
+
+def fingerprint(*objects) -> str:
+    """Return a content hash of frames, arrays and plain parameters (index labels ignored)."""
+    digest = hashlib.blake2b(digest_size=16)
+    for obj in objects:
+        _update(digest, obj)
+    return digest.hexdigest()
+
+
+def render_figure(fig, fmt: str = "png", dpi: int = DEFAULT_DPI) -> bytes:
+    """Serialize a figure to image bytes and always release it."""
+    try:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=fmt, dpi=dpi, bbox_inches="tight")
+        return buffer.getvalue()
+    finally:
+        # Figures built with pyplot stay registered until closed; plain Figures are a no-op.
+        import matplotlib.pyplot as plt
+        plt.close(fig)
+
+
+def _render_job(draw, args: tuple, fmt: str, dpi: int) -> bytes:
+    return render_figure(draw(*args), fmt, dpi)
+
+
+def _init_worker() -> None:
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+class ChartCache:
+    """
+    Thread-safe LRU of rendered chart bytes, bounded by entry count and total size.
+
+    Args:
+        max_entries (int): Maximum number of cached images.
+        max_bytes (int): Maximum total size of cached images.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            image = self._entries.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return image
+
+    def put(self, key, image: bytes) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._size -= len(self._entries.pop(key))
+            self._entries[key] = image
+            self._size += len(image)
+            while self._entries and (len(self._entries) > self.max_entries or self._size > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._size, "hits": self.hits, "misses": self.misses}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+class ChartRenderer:
+    """
+    Render charts through a `ChartCache`, optionally fanning independent charts out to processes.
+
+    A chart is a `draw(*args)` callable returning a Matplotlib Figure. Charts are keyed by
+    (kind, format, dpi, fingerprint of args), so a rerun with the same data and parameters
+    returns the cached bytes without touching Matplotlib. `render_many` sends cache misses
+    to a process pool when there are enough of them; `draw` must then be a module-level
+    function and its arguments picklable.
+
+    Args:
+        cache (ChartCache): Cache to use; a new one by default.
+        max_workers (int): Pool size; 1 disables the pool.
+    """
+
+    def __init__(self, cache: ChartCache = None, max_workers: int = None):
+        self.cache = cache or ChartCache()
+        self.max_workers = max_workers or min(os.cpu_count() or 1, 4)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def _key(self, kind: str, args: tuple, fmt: str, dpi: int) -> tuple:
+        return (kind, fmt, dpi, fingerprint(args))
+
+    def render(self, kind: str, draw, *args, fmt: str = "png", dpi: int = DEFAULT_DPI) -> bytes:
+        """Return the image for `draw(*args)`, rendering in this process on a cache miss."""
+        key = self._key(kind, args, fmt, dpi)
+        image = self.cache.get(key)
+        if image is None:
+            image = _render_job(draw, args, fmt, dpi)
+            self.cache.put(key, image)
+        return image
+
+    def render_many(self, kind: str, draw, jobs: list, fmt: str = "png", dpi: int = DEFAULT_DPI) -> list:
+        """Return one image per argument tuple in `jobs`, in order."""
+        keys = [self._key(kind, args, fmt, dpi) for args in jobs]
+        images = [self.cache.get(key) for key in keys]
+        missing = [i for i, image in enumerate(images) if image is None]
+
+        rendered = None
+        if len(missing) >= PARALLEL_MIN_CHARTS and self.max_workers > 1:
+            try:
+                pool = self._get_pool()
+                futures = [pool.submit(_render_job, draw, jobs[i], fmt, dpi) for i in missing]
+                rendered = [future.result() for future in futures]
+            except BrokenProcessPool:
+                self.shutdown()
+        if rendered is None:
+            rendered = [_render_job(draw, jobs[i], fmt, dpi) for i in missing]
+
+        for i, image in zip(missing, rendered):
+            self.cache.put(keys[i], image)
+            images[i] = image
+        return images
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = spawn_pool(self.max_workers, initializer=_init_worker)
+            return self._pool
+
+    def shutdown(self) -> None:
+        """Stop the worker pool (it is recreated on demand)."""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+_default_renderer = None
+_default_renderer_lock = threading.Lock()
+
+
+def get_chart_renderer() -> ChartRenderer:
+    """Return the process-wide renderer shared by all dashboard sessions."""
+    global _default_renderer
+    with _default_renderer_lock:
+        if _default_renderer is None:
+            _default_renderer = ChartRenderer()
+        return _default_renderer
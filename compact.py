@@ -0,0 +1,142 @@
+# compact.py — Compact in-memory layout for merged noise/flight frames
+
+import numpy as np
+import pandas as pd
+
+from arrivals import ARRIVAL_COLUMNS
+from matching import to_utc_naive
+
+WEATHER_COLUMNS = ["Temperature (°C)", "Wind Speed (m/s)", "Conditions"]
+TIME_COLUMNS = ["timestamp"]
+
+# Object columns with at most this share of distinct values become categoricals.
+CATEGORY_MAX_RATIO = 0.5
+
+
+def memory_mb(df: pd.DataFrame) -> float:
+    """Return a frame's deep memory usage (strings included) in MB."""
+    return float(df.memory_usage(index=True, deep=True).sum()) / 1024 ** 2
+
+
+def optimize_dtypes(df: pd.DataFrame, time_columns=TIME_COLUMNS, category_max_ratio: float = CATEGORY_MAX_RATIO) -> pd.DataFrame:
+    """
+    Return a copy of `df` with compact column types.
+
+    Floats become float32, integers the smallest type holding their range, repeated
+    strings categoricals (unused categories dropped), and datetimes, plus any
+    `time_columns` still held as text, naive UTC datetime64[ns].
+
+    Args:
+        df (pd.DataFrame): Frame to shrink; not modified.
+        time_columns (list): Columns parsed as timestamps when they are not datetimes yet.
+        category_max_ratio (float): Largest distinct/total ratio converted to a categorical.
+    """
+    columns = {}
+    for col in df.columns:
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.cat.remove_unused_categories()
+        elif pd.api.types.is_datetime64_any_dtype(values) or col in time_columns:
+            values = to_utc_naive(values)
+        elif pd.api.types.is_bool_dtype(values):
+            pass
+        elif pd.api.types.is_float_dtype(values):
+            values = values.astype("float32")
+        elif pd.api.types.is_integer_dtype(values):
+            values = pd.to_numeric(values, downcast="integer")
+        elif pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values):
+            codes, uniques = pd.factorize(values, use_na_sentinel=True)
+            if len(uniques) <= category_max_ratio * len(values):
+                values = pd.Series(pd.Categorical.from_codes(codes, uniques), index=values.index, name=col)
+        columns[col] = values
+    return pd.DataFrame(columns, index=df.index)
+
+
+def normalize_columns(df: pd.DataFrame, columns: list, id_col: str):
+    """
+    Move the distinct value combinations of `columns` into a side table.
+
+    Returns:
+        tuple: (`df` without `columns` plus an int32 `id_col`, side table indexed by id).
+        Rows where every one of `columns` is missing get id -1.
+    """
+    present = [c for c in columns if c in df.columns]
+    ids = np.full(len(df), -1, dtype=np.int32)
+    if not present:
+        return df.assign(**{id_col: ids}), pd.DataFrame(index=pd.RangeIndex(0, name=id_col))
+
+    values = df[present]
+    has_values = values.notna().any(axis=1).to_numpy()
+    ids[has_values] = values[has_values].groupby(present, sort=False, dropna=False, observed=True).ngroup().to_numpy()
+    _, first = np.unique(ids[has_values], return_index=True)
+    table = values[has_values].iloc[first].reset_index(drop=True)
+    table.index.name = id_col
+    return df.drop(columns=present).assign(**{id_col: ids}), table
+
+
+class CompactFrame:
+    """
+    Merged noise/flight rows with per-flight and per-observation attributes stored once.
+
+    `rows` keeps one compact row per noise sample and refers to `flights` and
+    `weather` through int32 `flight_id` / `weather_id` columns (-1 where unmatched).
+    `columns` is the wide column order restored by `expand`.
+    """
+
+    def __init__(self, rows: pd.DataFrame, flights: pd.DataFrame, weather: pd.DataFrame, columns: list = None):
+        self.rows = rows
+        self.flights = flights
+        self.weather = weather
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(t.memory_usage(index=True).sum() for t in (self.rows, self.flights, self.weather)))
+
+    def memory_mb(self) -> float:
+        return memory_mb(self.rows) + memory_mb(self.flights) + memory_mb(self.weather)
+
+    def expand(self) -> pd.DataFrame:
+        """Rejoin the side tables onto the rows (the wide layout `merge_by_time` returns)."""
+        frames = [self.rows.drop(columns=["flight_id", "weather_id"])]
+        for id_col, table in (("flight_id", self.flights), ("weather_id", self.weather)):
+            if len(table.columns):
+                frames.append(table.reindex(self.rows[id_col].to_numpy()).set_axis(self.rows.index))
+        wide = pd.concat(frames, axis=1)
+        return wide[self.columns] if self.columns is not None else wide
+
+
+def compact_merged(df: pd.DataFrame, flight_columns: list = None, weather_columns: list = WEATHER_COLUMNS) -> CompactFrame:
+    """
+    Shrink a `merge_by_time` result: compact dtypes, flight and weather side tables.
+
+    Args:
+        df (pd.DataFrame): Merged noise/flight rows; not modified.
+        flight_columns (list): Flight attribute columns; defaults to the arrival columns
+            (other than the airport key) present, including '_flight'-suffixed ones.
+        weather_columns (list): Weather columns broadcast by `enrich_with_weather`.
+    """
+    try:
+        if flight_columns is None:
+            names = [c for c in ARRIVAL_COLUMNS if c != "icao"]
+            flight_columns = [c for c in df.columns if c in names or c.removesuffix("_flight") in names]
+        compact = optimize_dtypes(df).reset_index(drop=True)
+        rows, flights = normalize_columns(compact, flight_columns, "flight_id")
+        rows, weather = normalize_columns(rows, weather_columns, "weather_id")
+        return CompactFrame(rows, flights, weather, columns=list(df.columns))
+    except Exception as e:
+        raise RuntimeError(f"Failed to compact merged data: {e}")
+
+
+def memory_report(before: pd.DataFrame, after: CompactFrame) -> dict:
+    """Return memory before/after compaction (MB) and the reduction factor."""
+    before_mb, after_mb = memory_mb(before), after.memory_mb()
+    return {
+        "rows": len(before),
+        "before_mb": round(before_mb, 2),
+        "after_mb": round(after_mb, 2),
+        "ratio": round(before_mb / after_mb, 1) if after_mb else None,
+    }
@@ -1,6 +1,92 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import pandas as pd
-import requests
 
+from airports import get_airport_index
+from instrumentation import traced
+from matching import FlightIndex, match_flights, to_utc_naive
+from weather_client import get_weather_client
+
+# Explicit dtypes for streamed noise exports; columns missing from a file are ignored.
+NOISE_DTYPES = {
+    "noise_db": "float32",
+    "icao": "category",
+    "station": "category",
+}
+
+# Fixed timestamp layouts tried, in order, before falling back to pandas inference.
+TIMESTAMP_FORMATS = (
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S%z",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%d %H:%M:%S%z",
+    "%Y-%m-%d %H:%M",
+)
+
+DEFAULT_MEMORY_BUDGET_MB = 256
+_PROBE_ROWS = 1_000
+
+def detect_timestamp_format(values, sample_size=100):
+    """Return the first entry of TIMESTAMP_FORMATS that parses a sample of values, or None."""
+    sample = pd.Series(values).dropna().astype(str).head(sample_size)
+    if sample.empty:
+        return None
+    for fmt in TIMESTAMP_FORMATS:
+        try:
+            pd.to_datetime(sample, format=fmt, errors="raise")
+        except (ValueError, TypeError):
+            continue
+        return fmt
+    return None
+
+def parse_timestamps(values, fmt=None):
+    """
+    Parse timestamps with a fixed format when one fits, otherwise fall back to inference.
+
+    Values with UTC offsets (even mixed ones, e.g. 'Z' and '+02:00' in one export) are
+    returned as naive UTC, the convention the rest of the pipeline uses. Values that do
+    not fit `fmt` (a layout change later in the file) are parsed with inference rather
+    than dropped; only values that are not dates at all become NaT.
+    """
+    values = values if isinstance(values, pd.Series) else pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return to_utc_naive(values)
+    fmt = fmt or detect_timestamp_format(values)
+    if fmt is None:
+        return to_utc_naive(values)
+    if "%z" in fmt:
+        parsed = pd.to_datetime(values, format=fmt, errors="coerce", utc=True, cache=True).dt.tz_localize(None)
+    else:
+        parsed = pd.to_datetime(values, format=fmt, errors="coerce", cache=True)
+    retry = parsed.isna() & values.notna()
+    if retry.any():
+        parsed[retry] = to_utc_naive(values[retry])
+    return parsed
+
+def stringify_mixed_columns(df):
+    """
+    Return `df` with columns that mix value types cast to str (missing values kept).
+
+    Spreadsheet cells and chunked CSV type inference can leave e.g. an 'icao' column
+    (plain or categorical) holding both strings and numbers, which Arrow and Parquet
+    cannot store.
+    """
+    mixed = {}
+    for col in df.columns:
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            kinds = values.cat.categories
+        elif values.dtype == object:
+            kinds = values
+        else:
+            continue
+        if pd.api.types.infer_dtype(kinds, skipna=True) in ("mixed", "mixed-integer"):
+            values = values.astype(object)
+            mixed[col] = values.where(values.isna(), values.astype(str))
+    return df.assign(**mixed) if mixed else df
+
+@traced()
 def load_noise_data(uploaded_file):
     """Load noise data from CSV or XLSX and parse 'timestamp' column if present."""
     try:
@@ -20,86 +106,225 @@ def load_noise_data(uploaded_file):
                 raise ValueError("Unsupported file type")
 
         if "timestamp" in df.columns:
-            df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+            df["timestamp"] = parse_timestamps(df["timestamp"])
         return df
 
     except Exception as e:
         raise RuntimeError(f"Failed to load file: {e}")
 
+def _rows_for_budget(chunk, budget_bytes):
+    """Return how many rows shaped like `chunk` fit in the memory budget."""
+    if chunk.empty:
+        return _PROBE_ROWS
+    row_bytes = chunk.memory_usage(deep=True).sum() / len(chunk)
+    # Halve the budget to leave room for parser buffers and the parsed timestamp column.
+    return max(1, int(budget_bytes / (2 * row_bytes)))
+
+def _read_chunks(uploaded_file, dtypes, budget_bytes):
+    """Yield raw DataFrame chunks from a CSV or XLSX source."""
+    name = uploaded_file if isinstance(uploaded_file, str) else uploaded_file.name
+    if name.endswith(".csv"):
+        with pd.read_csv(uploaded_file, dtype=dtypes, chunksize=_PROBE_ROWS) as reader:
+            rows = _PROBE_ROWS
+            while True:
+                try:
+                    chunk = reader.get_chunk(rows)
+                except StopIteration:
+                    return
+                yield chunk
+                rows = _rows_for_budget(chunk, budget_bytes)
+    elif name.endswith(".xlsx"):
+        # pandas cannot stream XLSX, so the sheet is parsed once and handed out in slices.
+        df = pd.read_excel(uploaded_file, dtype=dtypes)
+        rows = _rows_for_budget(df.head(_PROBE_ROWS), budget_bytes)
+        for start in range(0, len(df), rows):
+            yield df.iloc[start:start + rows].copy()
+    else:
+        raise ValueError("Unsupported file type")
+
+def iter_noise_chunks(
+    uploaded_file,
+    memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB,
+    dtype=None,
+    timestamp_format=None,
+):
+    """Yield noise data from CSV or XLSX as typed chunks sized to fit a memory budget.
+
+    Columns use NOISE_DTYPES (overridable via `dtype`). The timestamp format is
+    detected once on the first chunk and reused for the rest of the file.
+    """
+    dtypes = {**NOISE_DTYPES, **(dtype or {})}
+    budget_bytes = memory_budget_mb * 1024 * 1024
+    fmt = timestamp_format
+    try:
+        for chunk in _read_chunks(uploaded_file, dtypes, budget_bytes):
+            if "timestamp" in chunk.columns:
+                if fmt is None:
+                    fmt = detect_timestamp_format(chunk["timestamp"])
+                chunk["timestamp"] = parse_timestamps(chunk["timestamp"], fmt)
+            yield chunk
+    except Exception as e:
+        raise RuntimeError(f"Failed to load file: {e}")
+
+def get_airport_coordinates(code):
+    """Look up an airport by ICAO or IATA code in the bundled reference data."""
+    airport = get_airport_index().lookup(code)
+    if airport is None:
+        raise ValueError(f"Unknown airport code '{code}'.")
+    return {"lat": airport["lat"], "lon": airport["lon"], "name": airport["name"], "city": airport["city"]}
+
+@traced()
 def get_weather(lat, lon, api_key):
-    """Fetch current weather from OpenWeatherMap API."""
+    """Fetch current weather from OpenWeatherMap API via the shared cached client."""
     try:
-        url = (
-            f"https://api.openweathermap.org/data/2.5/weather?"
-            f"lat={lat}&lon={lon}&appid={api_key}&units=metric"
-        )
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        return {
-            "Temperature (°C)": data["main"]["temp"],
-            "Wind Speed (m/s)": data["wind"]["speed"],
-            "Conditions": data["weather"][0]["description"].capitalize(),
-        }
+        return get_weather_client(api_key).current(lat, lon)
     except Exception as e:
         raise RuntimeError(f"Failed to fetch weather: {e}")
 
-def enrich_with_weather(df, lat, lon, api_key):
-    """Add weather details as columns to the DataFrame."""
+def _weather_columns(records, positions):
+    """Build typed weather columns for rows that point into `records` (-1 marks no match)."""
+    valid = positions >= 0
+    safe = np.where(valid, positions, 0)
+    columns = {}
+    for key in ("Temperature (°C)", "Wind Speed (m/s)"):
+        values = np.array([r[key] for r in records] or [np.nan], dtype="float32")
+        columns[key] = np.where(valid, values[safe], np.float32(np.nan)).astype("float32")
+
+    # Records without conditions (empty observations) get code -1, i.e. missing.
+    conditions = pd.Categorical([r["Conditions"] for r in records])
+    record_codes = conditions.codes if records else np.array([-1])
+    codes = np.where(valid, record_codes[safe], -1)
+    columns["Conditions"] = pd.Categorical.from_codes(codes, categories=conditions.categories)
+    return columns
+
+@traced()
+def enrich_with_weather(
+    df,
+    lat,
+    lon,
+    api_key,
+    time_col="timestamp",
+    airport_coords=None,
+    airport_col="icao",
+    max_workers=8,
+):
+    """Return a copy of the DataFrame with hour-resolved weather columns (float32 / categorical).
+
+    One observation is fetched per distinct (location, UTC hour) present in the data,
+    concurrently on a bounded thread pool, and joined back to rows by hour bucket.
+    `airport_coords` maps airport codes in `airport_col` to (lat, lon) for multi-airport
+    frames; other rows use `lat`/`lon`. Without a time column, current weather is used.
+    """
     try:
-        weather = get_weather(lat, lon, api_key)
-        for key, value in weather.items():
-            df[key] = value
-        return df
+        client = get_weather_client(api_key)
+        if time_col not in df.columns:
+            current = client.current(lat, lon)
+            return df.assign(**_weather_columns([current], np.zeros(len(df), dtype=np.int64)))
+
+        times = df[time_col]
+        if pd.api.types.is_datetime64tz_dtype(times):
+            times = times.dt.tz_convert("UTC").dt.tz_localize(None)
+        hour_ns = times.dt.floor("H").to_numpy(dtype="datetime64[ns]").view("int64")
+
+        # Resolve each row to a grid cell so airports sharing a cell share lookups.
+        default_cell = client.grid_cell(lat, lon)
+        if airport_coords and airport_col in df.columns:
+            cells = {code: client.grid_cell(*coords) for code, coords in airport_coords.items()}
+            # One coordinate pair per distinct airport; code -1 (missing) picks the trailing default.
+            codes, airports = pd.factorize(df[airport_col])
+            cell_coords = np.array([cells.get(a, default_cell) for a in airports] + [default_cell], dtype="float64")
+            cell_lat, cell_lon = cell_coords[codes, 0], cell_coords[codes, 1]
+        else:
+            cell_lat = np.full(len(df), default_cell[0])
+            cell_lon = np.full(len(df), default_cell[1])
+
+        row_keys = pd.MultiIndex.from_arrays([cell_lat, cell_lon, hour_ns])
+        has_time = ~times.isna().to_numpy()
+        lookup_keys = row_keys[has_time].unique()
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            records = list(pool.map(
+                lambda key: client.historical(key[0], key[1], key[2] // 10**9),
+                lookup_keys,
+            ))
+
+        positions = lookup_keys.get_indexer(row_keys)
+        positions[~has_time] = -1
+        return df.assign(**_weather_columns(records, positions))
     except Exception as e:
         raise RuntimeError(f"Failed to enrich with weather: {e}")
 
+@traced()
 def merge_by_time(
     df_noise,
     df_flights,
     time_col_noise="timestamp",
     time_col_flight="arrival_scheduled_utc",
     tolerance="5min",
+    by=None,
+    direction="nearest",
 ):
-    """Merge noise and flight data on nearest timestamps within a time tolerance."""
+    """Match noise rows to flights on nearest timestamps within a time tolerance.
+
+    Neither input is sorted, copied or modified; rows keep the noise frame's order.
+    Pass `by="icao"` to keep matches within the same airport. See `matching.match_flights`.
+    """
     try:
-        if time_col_noise not in df_noise.columns:
-            raise ValueError(f"Missing column '{time_col_noise}' in noise data.")
         if time_col_flight not in df_flights.columns:
             raise ValueError(f"Missing column '{time_col_flight}' in flight data.")
-
-        # Ensure consistent timezone awareness for merging
-        if pd.api.types.is_datetime64tz_dtype(df_noise[time_col_noise]):
-            # noise is timezone-aware
-            if not pd.api.types.is_datetime64tz_dtype(df_flights[time_col_flight]):
-                # flights is naive — convert flights to UTC aware
-                df_flights[time_col_flight] = df_flights[time_col_flight].dt.tz_localize("UTC")
-        else:
-            # noise is naive
-            if pd.api.types.is_datetime64tz_dtype(df_flights[time_col_flight]):
-                # flights is aware — convert flights to naive (UTC)
-                df_flights[time_col_flight] = df_flights[time_col_flight].dt.tz_convert(None)
-
-        df_noise_sorted = df_noise.sort_values(by=time_col_noise).copy()
-        df_flights_sorted = df_flights.sort_values(by=time_col_flight).copy()
-
-        df_merged = pd.merge_asof(
-            df_noise_sorted,
-            df_flights_sorted,
-            left_on=time_col_noise,
-            right_on=time_col_flight,
-            direction="nearest",
-            tolerance=pd.Timedelta(tolerance),
+        return match_flights(
+            df_noise,
+            df_flights,
+            time_col_noise=time_col_noise,
+            time_col_flight=time_col_flight,
+            by=by,
+            direction=direction,
+            tolerance=tolerance,
         )
-        return df_merged
     except Exception as e:
         raise RuntimeError(f"Failed to merge data: {e}")
 
+def iter_merge_by_time(
+    noise_chunks,
+    df_flights,
+    time_col_noise="timestamp",
+    time_col_flight="arrival_scheduled_utc",
+    tolerance="5min",
+    by=None,
+    direction="nearest",
+):
+    """Match noise chunks with flight data one chunk at a time, indexing the flights only once."""
+    try:
+        index = FlightIndex(df_flights, time_col_flight, by)
+        for chunk in noise_chunks:
+            yield match_flights(
+                chunk,
+                index,
+                time_col_noise=time_col_noise,
+                direction=direction,
+                tolerance=tolerance,
+            )
+    except Exception as e:
+        raise RuntimeError(f"Failed to merge data: {e}")
 
+def hourly_noise_means(noise_chunks, value_col="noise_db", by=("icao",), time_col="timestamp"):
+    """Average `value_col` per hour and group keys, accumulating sums and counts chunk by chunk.
 
+    Returns the same layout as the hourly frame in `visualizations.plot_combined_hourly`:
+    one row per (keys..., 'hour') with the mean in `value_col`.
+    """
+    partials = []
+    keys = list(by)
+    for chunk in noise_chunks:
+        missing = [k for k in [time_col, value_col, *keys] if k not in chunk.columns]
+        if missing:
+            raise ValueError(f"Missing columns {missing} in noise data.")
+        hour = chunk[time_col].dt.floor("H").rename("hour")
+        groups = [chunk[k].astype(object) for k in keys] + [hour]
+        partials.append(chunk[value_col].astype("float64").groupby(groups).agg(["sum", "count"]))
 
-
-
-
-
+    if not partials:
+        return pd.DataFrame(columns=keys + ["hour", value_col])
+    totals = pd.concat(partials).groupby(level=list(range(len(keys) + 1))).sum()
+    result = (totals["sum"] / totals["count"]).rename(value_col).reset_index()
+    return result
@@ -0,0 +1,118 @@
+# downsampling.py — Peak-preserving time-series reduction for plotting
+
+import numpy as np
+import pandas as pd
+
+from matching import to_utc_ns
+
+METHODS = ("minmax", "lttb")
+DEFAULT_POINTS = 2000
+
+
+def target_points(ax, per_pixel: int = 2) -> int:
+    """Return a point budget for an Axes: `per_pixel` points per horizontal pixel."""
+    return max(int(ax.bbox.width) * per_pixel, 2)
+
+
+def _bins(x: np.ndarray, n_bins: int) -> np.ndarray:
+    """Return start positions of the non-empty equal-width x bins of sorted `x`."""
+    edges = np.linspace(x[0], x[-1], n_bins + 1)
+    starts = np.searchsorted(x, edges[:-1], side="left")
+    return np.unique(starts[starts < len(x)])
+
+
+def _first_match(mask: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Return the first position where `mask` is set inside each [starts[i], starts[i+1]) run."""
+    n = len(mask)
+    return np.minimum.reduceat(np.where(mask, np.arange(n), n), starts)
+
+
+def minmax_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Return positions of the minimum and maximum of `y` in each of n_out/2 equal-width x bins.
+
+    `x` must be sorted and `y` free of NaN. Every local extreme wider than a bin survives,
+    so short noise peaks stay visible at any zoom level.
+    """
+    n = len(x)
+    if n <= n_out:
+        return np.arange(n)
+    starts = _bins(x, max(n_out // 2, 1))
+    bin_id = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, n)))
+    lows = np.minimum.reduceat(y, starts)
+    highs = np.maximum.reduceat(y, starts)
+    low_pos = _first_match(y == lows[bin_id], starts)
+    high_pos = _first_match(y == highs[bin_id], starts)
+    return np.unique(np.concatenate((low_pos, high_pos)))
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Return positions chosen by Largest-Triangle-Three-Buckets.
+
+    The series is first reduced to a min/max envelope of 4 * n_out points (vectorized),
+    then LTTB picks one point per bucket from that envelope, so the per-bucket loop only
+    ever touches a handful of candidates.
+    """
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return np.arange(n) if n <= n_out else np.array([0, n - 1])
+    candidates = np.union1d(minmax_indices(x, y, 4 * n_out), [0, n - 1])
+    cx, cy = x[candidates].astype("float64"), y[candidates].astype("float64")
+    m = len(candidates)
+    if m <= n_out:
+        return candidates
+
+    # Interior points split into n_out - 2 buckets; the first and last points are always kept.
+    bounds = np.linspace(1, m - 1, n_out - 1).astype(np.int64)
+    next_mean_x = np.append(np.add.reduceat(cx[1:-1], bounds[:-1] - 1) / np.diff(bounds), cx[-1])
+    next_mean_y = np.append(np.add.reduceat(cy[1:-1], bounds[:-1] - 1) / np.diff(bounds), cy[-1])
+
+    chosen = np.empty(n_out, dtype=np.int64)
+    chosen[0], chosen[-1] = 0, m - 1
+    previous = 0
+    for i in range(n_out - 2):
+        lo, hi = bounds[i], bounds[i + 1]
+        ax_, ay_ = cx[previous], cy[previous]
+        bx, by = next_mean_x[i + 1], next_mean_y[i + 1]
+        area = np.abs((ax_ - bx) * (cy[lo:hi] - ay_) - (ax_ - cx[lo:hi]) * (by - ay_))
+        previous = lo + int(np.argmax(area))
+        chosen[i + 1] = previous
+    return candidates[chosen]
+
+
+def downsample(
+    df: pd.DataFrame,
+    x_col: str = "timestamp",
+    y_col: str = "noise_db",
+    n_out: int = DEFAULT_POINTS,
+    method: str = "minmax",
+) -> pd.DataFrame:
+    """
+    Reduce a time series to about `n_out` rows for plotting, keeping peaks.
+
+    Args:
+        df (pd.DataFrame): Rows of one series (filter per airport/station first).
+        x_col (str): Datetime or numeric x column.
+        y_col (str): Value column; rows with NaN values are dropped.
+        n_out (int): Point budget, typically `target_points(ax)`.
+        method (str): 'minmax' (envelope, 2 points per bin) or 'lttb' (visual shape).
+
+    Returns:
+        pd.DataFrame: The selected rows in x order.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method '{method}', expected one of {METHODS}.")
+    if pd.api.types.is_datetime64_any_dtype(df[x_col]):
+        x = to_utc_ns(df[x_col])
+        valid = x != np.iinfo(np.int64).min
+    else:
+        x = df[x_col].to_numpy(dtype="float64")
+        valid = ~np.isnan(x)
+    y = df[y_col].to_numpy(dtype="float64")
+    valid &= ~np.isnan(y)
+
+    rows = np.flatnonzero(valid)
+    order = rows[np.argsort(x[rows], kind="stable")]
+    pick = minmax_indices if method == "minmax" else lttb_indices
+    return df.iloc[order[pick(x[order], y[order], n_out)]]
@@ -0,0 +1,310 @@
+# exposure.py — Simplified receiver-grid Lden exposure model for arrival traffic
+
+import io
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from chart_cache import fingerprint
+from map_bins import from_mercator, to_mercator
+from noise_levels import DAY_HOURS, EVENING_HOURS, EVENING_PENALTY_DB, NIGHT_PENALTY_DB, energy_to_db
+from pools import spawn_pool
+from scenarios import AIRCRAFT_CLASSES, class_codes
+
+DEFAULT_CELLS = 500
+DEFAULT_RADIUS_KM = 15.0
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "silent_skies", "exposure")
+
+# Nominal approach: straight in along the extended centreline on a 3° glide slope.
+GLIDE_SLOPE_DEG = 3.0
+THRESHOLD_CROSSING_M = 15.0
+APPROACH_LENGTH_KM = 20.0
+
+# Approach SEL per aircraft class at REFERENCE_DISTANCE_M slant distance, and the
+# attenuation beyond it: line-source spreading (10 dB/decade) plus air absorption.
+APPROACH_SEL_DB = {"jet": 90.0, "turboprop": 82.0, "other": 80.0}
+REFERENCE_DISTANCE_M = 305.0
+ABSORPTION_DB_PER_KM = 2.0
+MIN_DISTANCE_M = 30.0
+
+LDEN_BANDS = (45, 50, 55, 60, 65, 70, 75)
+TILE_ROWS = 50
+# Receiver × path evaluations needed before tiles go to a process pool (see spawn_pool).
+PARALLEL_MIN_EVALUATIONS = 8_000_000
+
+
+def nominal_runway(lat: float, lon: float, heading_deg: float, share: float = 1.0) -> dict:
+    """Describe a runway threshold and landing heading; `share` is its fraction of arrivals."""
+    return {"lat": float(lat), "lon": float(lon), "heading_deg": float(heading_deg) % 360, "share": float(share)}
+
+
+def daily_arrivals(df_arrivals: pd.DataFrame, days: float = None, model_col: str = "aircraft_model") -> pd.DataFrame:
+    """
+    Return average daily arrivals per aircraft class and Lden period.
+
+    Periods use the airport's local clock ('arrival_scheduled_local'). `days` defaults
+    to the calendar span of the arrivals.
+
+    Returns:
+        pd.DataFrame: Index AIRCRAFT_CLASSES, columns 'day', 'evening', 'night'.
+    """
+    local = pd.to_datetime(df_arrivals["arrival_scheduled_local"])
+    has_time = local.notna().to_numpy()
+    local = local[has_time]
+    if days is None:
+        days = max((local.max().normalize() - local.min().normalize()).days + 1, 1) if len(local) else 1
+    models = df_arrivals[model_col] if model_col in df_arrivals.columns else pd.Series([None] * len(df_arrivals))
+    classes = class_codes(models)[has_time]
+    hour = local.dt.hour.to_numpy()
+    period = np.where(np.isin(hour, DAY_HOURS), 0, np.where(np.isin(hour, EVENING_HOURS), 1, 2))
+    counts = np.bincount(classes * 3 + period, minlength=len(AIRCRAFT_CLASSES) * 3).reshape(-1, 3)
+    return pd.DataFrame(counts / days, index=list(AIRCRAFT_CLASSES), columns=["day", "evening", "night"])
+
+
+def path_weight(daily: pd.DataFrame) -> float:
+    """Return Σ N·period weight·10^(SEL_ref/10) over classes: the daily reference energy of one path."""
+    weights = np.array([1.0, 10 ** (EVENING_PENALTY_DB / 10), 10 ** (NIGHT_PENALTY_DB / 10)])
+    reference = np.power(10.0, np.array([APPROACH_SEL_DB[c] for c in daily.index]) / 10)
+    return float((daily.to_numpy() @ weights) @ reference)
+
+
+def _approach_segment(runway: dict, origin_lat: float, origin_lon: float) -> np.ndarray:
+    """Return the approach path's (threshold, far end) points in local ground metres (x east, y north, z up)."""
+    x0, y0 = to_mercator(origin_lat, origin_lon)
+    x, y = to_mercator(runway["lat"], runway["lon"])
+    scale = np.cos(np.radians(origin_lat))  # Mercator metres → ground metres
+    threshold = np.array([(x - x0) * scale, (y - y0) * scale, THRESHOLD_CROSSING_M])
+    # Arrivals come from the opposite of the landing heading.
+    inbound = np.radians((runway["heading_deg"] + 180) % 360)
+    length = APPROACH_LENGTH_KM * 1000
+    far = threshold + np.array([
+        np.sin(inbound) * length,
+        np.cos(inbound) * length,
+        length * np.tan(np.radians(GLIDE_SLOPE_DEG)),
+    ])
+    return np.vstack([threshold, far])
+
+
+def _tile_energy(xs: np.ndarray, ys: np.ndarray, segments: list, weights: list) -> np.ndarray:
+    """Daily weighted sound energy at receivers (ys × xs, ground level) from every approach path."""
+    px, py = np.meshgrid(xs, ys)
+    energy = np.zeros(px.shape, dtype="float64")
+    for (a, b), weight in zip(segments, weights):
+        ab = b - a
+        # Closest point on the segment to each receiver, then the 3-D slant distance to it.
+        t = np.clip(((px - a[0]) * ab[0] + (py - a[1]) * ab[1] - a[2] * ab[2]) / ab.dot(ab), 0.0, 1.0)
+        distance = np.sqrt((px - a[0] - t * ab[0]) ** 2 + (py - a[1] - t * ab[1]) ** 2 + (a[2] + t * ab[2]) ** 2)
+        distance = np.maximum(distance, MIN_DISTANCE_M)
+        attenuation = 10 * np.log10(distance / REFERENCE_DISTANCE_M) + ABSORPTION_DB_PER_KM * (distance - REFERENCE_DISTANCE_M) / 1000
+        energy += weight * np.power(10.0, -attenuation / 10)
+    return energy
+
+
+class ExposureGrid:
+    """
+    Lden over a square receiver grid, regular in Web Mercator so it overlays map tiles.
+
+    Args:
+        lden_db (np.ndarray): (rows × cols) levels, row 0 to the south; NaN means no exposure.
+        bounds (tuple): (west, south, east, north) in degrees.
+        cell_size_m (float): Ground size of a cell at the grid centre.
+    """
+
+    def __init__(self, lden_db: np.ndarray, bounds: tuple, cell_size_m: float):
+        self.lden_db = lden_db
+        self.bounds = tuple(float(b) for b in bounds)
+        self.cell_size_m = float(cell_size_m)
+
+    @property
+    def nbytes(self) -> int:
+        return self.lden_db.nbytes
+
+    def area_km2(self, threshold_db: float) -> float:
+        """Return the area at or above `threshold_db` Lden."""
+        return float(np.count_nonzero(self.lden_db >= threshold_db)) * self.cell_size_m ** 2 / 1e6
+
+    def summary(self, bands=LDEN_BANDS, population_density: float = None) -> pd.DataFrame:
+        """
+        Return the area exposed at or above each Lden band.
+
+        Args:
+            bands (tuple): Lden thresholds in dB.
+            population_density (float): Residents per km²; adds an estimated
+                'population' column (uniform density, so only an order of magnitude).
+        """
+        summary = pd.DataFrame({"lden_db": list(bands), "area_km2": [self.area_km2(b) for b in bands]})
+        if population_density is not None:
+            summary["population"] = (summary["area_km2"] * population_density).round().astype("int64")
+        return summary
+
+    def to_rgba(self, bands=LDEN_BANDS, alpha: int = 160) -> np.ndarray:
+        """Return a (rows × cols × 4) uint8 image, north up, with one colour per Lden band."""
+        from matplotlib import colormaps
+
+        band = np.digitize(np.nan_to_num(self.lden_db, nan=-np.inf), bands)  # 0 = below the first band
+        palette = (colormaps["YlOrRd"](np.linspace(0.15, 1.0, len(bands))) * 255).astype(np.uint8)
+        palette[:, 3] = alpha
+        palette = np.vstack([np.zeros((1, 4), dtype=np.uint8), palette])
+        return palette[band][::-1]
+
+    def to_png(self, bands=LDEN_BANDS, alpha: int = 160) -> bytes:
+        from matplotlib import image
+
+        buffer = io.BytesIO()
+        image.imsave(buffer, np.ascontiguousarray(self.to_rgba(bands, alpha)), format="png")
+        return buffer.getvalue()
+
+    def save(self, path: str) -> None:
+        np.savez_compressed(path, lden_db=self.lden_db, bounds=np.array(self.bounds), cell_size_m=self.cell_size_m)
+
+    @classmethod
+    def load(cls, path: str) -> "ExposureGrid":
+        with np.load(path) as data:
+            return cls(data["lden_db"], tuple(data["bounds"]), float(data["cell_size_m"]))
+
+
+class ExposureCache:
+    """
+    Computed exposure grids kept in memory (LRU) and as compressed .npz arrays on disk.
+
+    Args:
+        cache_dir (str): Directory for .npz files; None keeps grids in memory only.
+        max_entries (int): Grids kept in memory.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_entries: int = 8):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def get(self, key: str):
+        with self._lock:
+            grid = self._entries.get(key)
+            if grid is not None:
+                self._entries.move_to_end(key)
+                return grid
+        if self.cache_dir and os.path.exists(self._path(key)):
+            try:
+                grid = ExposureGrid.load(self._path(key))
+            except (OSError, ValueError, KeyError):
+                return None
+            self._remember(key, grid)
+            return grid
+        return None
+
+    def put(self, key: str, grid: ExposureGrid) -> None:
+        self._remember(key, grid)
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write-then-rename so a concurrent reader never sees a partial file.
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".npz")
+            os.close(fd)
+            grid.save(tmp)
+            os.replace(tmp, self._path(key))
+
+    def _remember(self, key: str, grid: ExposureGrid) -> None:
+        with self._lock:
+            self._entries[key] = grid
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_exposure_cache() -> ExposureCache:
+    """Return the process-wide exposure cache (see `SILENT_SKIES_EXPOSURE_CACHE_DIR`)."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ExposureCache(os.environ.get("SILENT_SKIES_EXPOSURE_CACHE_DIR", DEFAULT_CACHE_DIR))
+        return _default_cache
+
+
+def compute_exposure(
+    df_arrivals: pd.DataFrame,
+    lat: float,
+    lon: float,
+    runways: list = None,
+    heading_deg: float = 270.0,
+    cells: int = DEFAULT_CELLS,
+    radius_km: float = DEFAULT_RADIUS_KM,
+    days: float = None,
+    max_workers: int = None,
+    cache: ExposureCache = None,
+) -> ExposureGrid:
+    """
+    Estimate arrival Lden over a `cells` × `cells` grid centred on an airport.
+
+    Every arrival flies a nominal straight-in 3° approach to one runway (split by the
+    runways' shares). Each receiver takes the slant distance to each approach path and
+    a class reference SEL attenuated by line-source spreading and air absorption, so
+    the model is a screening estimate, not a certified noise contour (ECAC Doc 29).
+    The grid is computed in row tiles, across a spawn process pool when large enough,
+    and cached by inputs.
+
+    Args:
+        df_arrivals (pd.DataFrame): Arrivals with 'arrival_scheduled_local' and optional
+            'aircraft_model'.
+        lat, lon (float): Airport reference point (grid centre).
+        runways (list): `nominal_runway` dicts; one runway at the reference point with
+            `heading_deg` when None.
+        cells (int): Receivers per side.
+        radius_km (float): Half the grid's side.
+        days (float): Days the arrivals cover (their calendar span when None).
+        max_workers (int): Pool size; 1 computes in this process.
+        cache (ExposureCache): Grid cache; the process-wide one when None.
+    """
+    try:
+        runways = runways or [nominal_runway(lat, lon, heading_deg)]
+        daily = daily_arrivals(df_arrivals, days)
+        total_weight = path_weight(daily)
+        shares = np.array([r["share"] for r in runways], dtype="float64")
+        weights = list(total_weight * shares / shares.sum())
+
+        cache = cache or get_exposure_cache()
+        key = fingerprint(
+            "exposure-v1", lat, lon, runways, weights, cells, radius_km,
+            APPROACH_SEL_DB, REFERENCE_DISTANCE_M, ABSORPTION_DB_PER_KM, GLIDE_SLOPE_DEG,
+        )
+        grid = cache.get(key)
+        if grid is not None:
+            return grid
+
+        # Cell centres: a regular Mercator grid, converted to local ground metres.
+        scale = np.cos(np.radians(lat))
+        half = radius_km * 1000 / scale  # Mercator metres
+        edges = np.linspace(-half, half, cells + 1)
+        centres = (edges[:-1] + edges[1:]) / 2 * scale
+        segments = [_approach_segment(r, lat, lon) for r in runways]
+
+        tiles = [(centres, centres[i:i + TILE_ROWS]) for i in range(0, cells, TILE_ROWS)]
+        if max_workers != 1 and cells * cells * len(segments) >= PARALLEL_MIN_EVALUATIONS:
+            with spawn_pool(max_workers) as pool:
+                parts = list(pool.map(_tile_energy, *zip(*tiles), [segments] * len(tiles), [weights] * len(tiles)))
+        else:
+            parts = [_tile_energy(xs, ys, segments, weights) for xs, ys in tiles]
+        energy = np.vstack(parts)
+
+        x0, y0 = to_mercator(lat, lon)
+        south, west = from_mercator(x0 - half, y0 - half)
+        north, east = from_mercator(x0 + half, y0 + half)
+        grid = ExposureGrid(
+            energy_to_db(energy / 86400).astype("float32"),
+            (west, south, east, north),
+            2 * radius_km * 1000 / cells,
+        )
+        cache.put(key, grid)
+        return grid
+    except Exception as e:
+        raise RuntimeError(f"Failed to compute noise exposure: {e}")
@@ -1,34 +1,69 @@
 import streamlit as st
-from data_fetch import load_noise_data, enrich_with_weather, merge_by_time
-from flight_data import get_arrivals
-import os
-from dotenv import load_dotenv
-import matplotlib.pyplot as plt
-import seaborn as sns
+from data_fetch import enrich_with_weather, get_airport_coordinates, merge_by_time
+from noise_cache import load_noise_data_cached
+from bulk_ingest import load_noise_files
+from noise_events import detect_events, attribute_events
+from noise_levels import db_to_energy, energy_to_db
+from arrivals import get_arrivals
+from visualizations import plot_hourly_leq_bars, plot_map, show_debug_panel
+from instrumentation import activate, span
+from memo import get_session_memo
+from compact import compact_merged, memory_report
+from scenarios import ScenarioEngine, ScenarioSet
+from exposure import compute_exposure
+from settings import get_setting
+import numpy as np
 import pandas as pd
 
-# Load API keys
-load_dotenv()
-OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY")
-AERODATABOX_API_KEY = os.getenv("AERODATABOX_API_KEY")
+
+def merge_compact(noise_df, arrivals_df):
+    # Only the compact layout is kept in the session, not the wide merged frame
+    merged_df = merge_by_time(noise_df, arrivals_df, by="icao")
+    compact = compact_merged(merged_df)
+    return compact, memory_report(merged_df, compact)
+
 
 # Streamlit UI
 st.title("Silent Skies: Aircraft Noise and Flight Arrivals Dashboard")
+show_debug = st.sidebar.checkbox("Show performance debug panel")
+tracer = activate()
+# Stage results survive reruns; only stages whose inputs changed execute again
+memo = get_session_memo()
+if st.sidebar.button("Refresh flight data"):
+    memo.invalidate("arrivals")
 
-uploaded_file = st.file_uploader("Upload Noise Data CSV or XLSX", type=["csv", "xlsx"])
+uploaded_files = st.file_uploader("Upload Noise Data CSV or XLSX", type=["csv", "xlsx"], accept_multiple_files=True)
 
-if uploaded_file is not None:
+if uploaded_files:
     noise_df = None
     try:
-        noise_df = load_noise_data(uploaded_file)
-        st.success(f"Loaded noise data with {len(noise_df)} records.")
+        if len(uploaded_files) == 1:
+            noise_df = memo.run("load", load_noise_data_cached, uploaded_files[0])
+            st.success(f"Loaded noise data with {len(noise_df)} records.")
+        else:
+            # One export per microphone: parsed in parallel, rows tagged with their file and sheet
+            noise_df, ingest = memo.run("load", load_noise_files, uploaded_files, skip_errors=True)
+            st.success(
+                f"Loaded {ingest['rows']} records from {ingest['files']} files ({ingest['sheets']} sheets) "
+                f"at {ingest['rows_per_s']:,} rows/s."
+            )
+            for name, error in ingest["errors"].items():
+                st.warning(f"Skipped {name}: {error}")
     except Exception as e:
         st.error(f"Error loading noise data: {e}")
 
     if noise_df is not None:
         icao_code = st.text_input("Enter ICAO Airport Code (e.g., EDDB, EGLL, LFPG):").upper().strip()
-        lat = st.text_input("Airport Latitude (decimal degrees):")
-        lon = st.text_input("Airport Longitude (decimal degrees):")
+        # Prefill coordinates from the bundled airport index; users can still override them
+        default_lat = default_lon = ""
+        if icao_code:
+            try:
+                coords = get_airport_coordinates(icao_code)
+                default_lat, default_lon = f"{coords['lat']:.6f}", f"{coords['lon']:.6f}"
+            except ValueError:
+                st.warning(f"Airport {icao_code} not found in the reference data; enter coordinates manually.")
+        lat = st.text_input("Airport Latitude (decimal degrees):", value=default_lat)
+        lon = st.text_input("Airport Longitude (decimal degrees):", value=default_lon)
 
         if icao_code and lat and lon:
             try:
@@ -39,16 +74,21 @@ if uploaded_file is not None:
                 st.stop()
 
             try:
-                arrivals_df = get_arrivals(icao_code, AERODATABOX_API_KEY)
+                # A fixed window end keeps the call pure, so reruns within 15 minutes reuse it
+                window_end = pd.Timestamp.utcnow().floor("15min").tz_localize(None)
+                aero_key = get_setting("AERODATABOX_API_KEY")
+                arrivals_df = memo.run("arrivals", get_arrivals, icao_code, aero_key, end=window_end)
                 st.success(f"Fetched {len(arrivals_df)} upcoming arrival flights for {icao_code}.")
             except Exception as e:
                 st.error(f"Error fetching arrivals: {e}")
                 arrivals_df = None
 
-            if OPENWEATHER_API_KEY:
+            # API keys are read from the environment, a .env file or Streamlit secrets when needed
+            weather_key = get_setting("OPENWEATHER_API_KEY")
+            if weather_key:
                 try:
-                    noise_df = enrich_with_weather(noise_df, lat, lon, OPENWEATHER_API_KEY)
-                    st.success("Enriched noise data with current weather conditions.")
+                    noise_df = memo.run("enrich", enrich_with_weather, noise_df, lat, lon, weather_key)
+                    st.success("Enriched noise data with hourly weather conditions.")
                 except Exception as e:
                     st.error(f"Error fetching weather: {e}")
             else:
@@ -56,9 +96,64 @@ if uploaded_file is not None:
 
             if arrivals_df is not None:
                 try:
-                    merged_df = merge_by_time(noise_df, arrivals_df)
-                    st.success(f"Merged datasets with {len(merged_df.dropna())} matching records.")
+                    with span("detect_events", rows_in=len(noise_df)) as record:
+                        events_df = memo.run(
+                            "events", attribute_events, memo.run("detect", detect_events, noise_df), arrivals_df
+                        )
+                        record["rows_out"] = len(events_df)
+                    attributed = events_df['flight_number'].notna().sum()
+                    st.success(f"Detected {len(events_df)} noise events, {attributed} attributed to arrivals.")
+                    st.dataframe(events_df)
+                except Exception as e:
+                    st.error(f"Failed to detect noise events: {e}")
+                    events_df = None
+
+                if events_df is not None and not events_df.empty:
+                    with st.expander("What-if: Clean Sky 2 technology retrofits"):
+                        try:
+                            engine = memo.run("scenarios", ScenarioEngine, events_df)
+                            st.dataframe(engine.technologies, hide_index=True)
+                            st.dataframe(engine.run(ScenarioSet.named(engine.technologies)), hide_index=True)
+
+                            n_scenarios = st.slider("Random adoption scenarios", 0, 5000, 1000, step=100)
+                            if n_scenarios:
+                                sampled = engine.run(ScenarioSet.sample(engine.technologies, n_scenarios))
+                                change = sampled["lden_change_db"]
+                                st.write(
+                                    f"Lden change over {n_scenarios} scenarios: median {change.median():.1f} dB, "
+                                    f"5–95% range {change.quantile(0.05):.1f} to {change.quantile(0.95):.1f} dB."
+                                )
+                                counts, edges = np.histogram(change, bins=30)
+                                st.bar_chart(pd.DataFrame({"scenarios": counts}, index=np.round(edges[:-1], 2)))
+                        except Exception as e:
+                            st.error(f"Failed to run retrofit scenarios: {e}")
+
+                with st.expander("Noise exposure (modelled)"):
+                    heading = st.number_input("Landing runway heading (°)", 0, 359, 270, step=10)
+                    density = st.number_input("Population density (residents/km², 0 to skip)", 0, 50000, 0, step=100)
+                    try:
+                        grid = memo.run("exposure", compute_exposure, arrivals_df, lat, lon, heading_deg=heading)
+                        airport = {icao_code: {"lat": lat, "lon": lon, "city": icao_code}}
+                        plot_map(arrivals_df, [icao_code], airports_info=airport, zoom=9, exposure=[grid])
+                        st.dataframe(grid.summary(population_density=density or None), hide_index=True)
+                        st.caption(
+                            "Screening estimate from nominal straight-in approaches, not a certified noise contour."
+                        )
+                    except Exception as e:
+                        st.error(f"Failed to model noise exposure: {e}")
+
+                try:
+                    compact, report = memo.run("merge", merge_compact, noise_df, arrivals_df)
+                    merged_df = compact.rows
+                    matched = int((merged_df["flight_id"] >= 0).sum())
+                    st.success(f"Merged datasets with {matched} matching records.")
+                    st.caption(
+                        f"In memory: {report['after_mb']:.1f} MB (was {report['before_mb']:.1f} MB, "
+                        f"{report['ratio']}x smaller); flight details are stored once per flight."
+                    )
                     st.dataframe(merged_df)
+                    with st.expander(f"Matched flights ({len(compact.flights)})"):
+                        st.dataframe(compact.flights)
 
                     # Rename and clean columns
                     merged_df = merged_df.rename(columns={
@@ -75,57 +170,16 @@ if uploaded_file is not None:
                     merged_df.dropna(subset=['timestamp', 'dB', 'airport'], inplace=True)
 
                     merged_df['hour'] = merged_df['timestamp'].dt.hour
-                    avg_db_hourly = merged_df.groupby(['airport', 'hour'])['dB'].mean().reset_index()
-
-                    # Plotting
-                    fig, ax = plt.subplots(figsize=(14, 7))
-                    sns.set_style("whitegrid")
-
-                    # Histogram bars
-                    sns.barplot(
-                        data=avg_db_hourly,
-                        x='hour',
-                        y='dB',
-                        hue='airport',
-                        palette='Set2',
-                        ci=None,
-                        dodge=True,
-                        ax=ax
-                    )
-
-                    # Overlay trend lines
-                    for airport in avg_db_hourly['airport'].unique():
-                        airport_data = avg_db_hourly[avg_db_hourly['airport'] == airport]
-                        ax.plot(
-                            airport_data['hour'],
-                            airport_data['dB'],
-                            marker='o',
-                            linewidth=2,
-                            label=f"{airport} Trend"
-                        )
-
-                    ax.set_title("Average Noise Level (dB) per Hour with Overlaid Trends")
-                    ax.set_xlabel("Hour of Day")
-                    ax.set_ylabel("Average Noise Level (dB)")
-                    ax.set_xticks(range(0, 24))
-                    ax.legend(title="Airport", loc='upper right')
-                    fig.tight_layout()
+                    # Average in the energy domain; an arithmetic mean of dB understates loud hours
+                    merged_df['energy'] = db_to_energy(merged_df['dB'])
+                    avg_db_hourly = merged_df.groupby(['airport', 'hour'], observed=True)['energy'].mean().reset_index()
+                    avg_db_hourly['dB'] = energy_to_db(avg_db_hourly.pop('energy'))
 
-                    st.pyplot(fig)
+                    plot_hourly_leq_bars(avg_db_hourly)
 
                 except Exception as e:
                     st.error(f"Failed to merge or visualize datasets: {e}")
 
-
-
-
-
-
-
-
-
-
-
-
-
-
+if show_debug:
+    show_debug_panel(tracer)
+    st.sidebar.dataframe(memo.stats(), hide_index=True)
@@ -0,0 +1,185 @@
+# flight_store.py — Persistent local arrivals history with incremental sync
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+
+DEFAULT_STORE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "silent_skies", "flights.sqlite")
+
+# Ranges closer to "now" than this are never marked as covered, so late schedule
+# additions are picked up on the next sync. 12 h also absorbs the UTC offset of
+# airport-local wall-clock times.
+SETTLE_PERIOD = pd.Timedelta(hours=12)
+
+# Bumped whenever the layout changes; the store is a cache, so older files are rebuilt.
+_SCHEMA_VERSION = 2
+
+# Missing flight numbers, callsigns and origins are stored as '' (key columns cannot be
+# NULL), and the callsign and origin are part of the key so unnumbered arrivals at the
+# same minute (general aviation, positioning flights) do not overwrite each other.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS arrivals (
+    icao TEXT NOT NULL,
+    arrival_local_s INTEGER NOT NULL,
+    flight_number TEXT NOT NULL,
+    callsign TEXT NOT NULL,
+    origin TEXT NOT NULL,
+    aircraft_model TEXT,
+    arrival_utc_s INTEGER,
+    PRIMARY KEY (icao, arrival_local_s, flight_number, callsign, origin)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS coverage (
+    icao TEXT NOT NULL,
+    start_ns INTEGER NOT NULL,
+    end_ns INTEGER NOT NULL,
+    PRIMARY KEY (icao, start_ns)
+) WITHOUT ROWID;
+"""
+
+_CATEGORICAL_COLUMNS = ["icao", "callsign", "origin", "aircraft_model"]
+_KEY_TEXT_COLUMNS = ["flight_number", "callsign", "origin"]
+
+
+def _ns(ts) -> int:
+    """Return naive nanoseconds for a timestamp; tz-aware values are converted to UTC first."""
+    ts = pd.Timestamp(ts)
+    return (ts.tz_convert(None) if ts.tzinfo else ts).value
+
+
+class FlightStore:
+    """
+    SQLite store of fetched arrivals plus the time ranges already fetched per airport.
+
+    Arrivals are keyed and indexed by (icao, airport-local scheduled time in whole seconds),
+    the same clock AeroDataBox request windows use, so coverage and queries line up. Coverage is kept as
+    merged, non-overlapping intervals per ICAO; `missing_ranges` returns the gaps.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH, settle_period=SETTLE_PERIOD):
+        self.path = path
+        self.settle_period = pd.Timedelta(settle_period)
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            if conn.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+                # Dropping coverage too makes the next sync re-fetch what the old layout held.
+                conn.executescript("DROP TABLE IF EXISTS arrivals; DROP TABLE IF EXISTS coverage;")
+                conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call keeps the store safe across Streamlit threads.
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _coverage(self, conn, icao: str) -> list:
+        rows = conn.execute(
+            "SELECT start_ns, end_ns FROM coverage WHERE icao = ? ORDER BY start_ns", (icao,)
+        )
+        return list(rows)
+
+    def missing_ranges(self, icao: str, start, end) -> list:
+        """Return the sub-ranges of [start, end) not yet fetched for `icao`."""
+        start_ns, end_ns = _ns(start), _ns(end)
+        gaps = []
+        cursor = start_ns
+        with self._connect() as conn:
+            for covered_start, covered_end in self._coverage(conn, icao):
+                if covered_end <= cursor:
+                    continue
+                if covered_start >= end_ns:
+                    break
+                if covered_start > cursor:
+                    gaps.append((cursor, covered_start))
+                cursor = max(cursor, covered_end)
+        if cursor < end_ns:
+            gaps.append((cursor, end_ns))
+        return [(pd.Timestamp(s), pd.Timestamp(e)) for s, e in gaps]
+
+    def high_water_mark(self, icao: str):
+        """Return the end of the latest covered range for `icao`, or None."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT MAX(end_ns) FROM coverage WHERE icao = ?", (icao,)).fetchone()
+        return pd.Timestamp(row[0]) if row[0] is not None else None
+
+    def mark_covered(self, icao: str, start, end) -> None:
+        """Record [start, end) as fetched, clipped to the settle period and merged with neighbours."""
+        settled = _ns(pd.Timestamp.utcnow().tz_localize(None) - self.settle_period)
+        start_ns, end_ns = _ns(start), min(_ns(end), settled)
+        if end_ns <= start_ns:
+            return
+        with self._lock, self._connect() as conn:
+            merged = []
+            for covered in sorted(self._coverage(conn, icao) + [(start_ns, end_ns)]):
+                if merged and covered[0] <= merged[-1][1]:
+                    merged[-1] = (merged[-1][0], max(merged[-1][1], covered[1]))
+                else:
+                    merged.append(covered)
+            conn.execute("DELETE FROM coverage WHERE icao = ?", (icao,))
+            conn.executemany(
+                "INSERT INTO coverage (icao, start_ns, end_ns) VALUES (?, ?, ?)",
+                [(icao, s, e) for s, e in merged],
+            )
+
+    def upsert(self, df_arrivals: pd.DataFrame) -> int:
+        """Insert or replace arrivals from a normalized arrivals frame; returns rows written."""
+        df = df_arrivals.dropna(subset=["arrival_scheduled_local"])
+        if df.empty:
+            return 0
+        utc = df["arrival_scheduled_utc"].dt.tz_convert(None)
+        utc_s = (utc.to_numpy().view("int64") // 10**9).tolist()
+        utc_s = [None if missing else seconds for seconds, missing in zip(utc_s, utc.isna())]
+        rows = zip(
+            df["icao"].astype(str),
+            (df["arrival_scheduled_local"].to_numpy(dtype="datetime64[ns]").view("int64") // 10**9).tolist(),
+            *(df[col].astype(object).fillna("").astype(str) for col in _KEY_TEXT_COLUMNS),
+            df["aircraft_model"].astype(object).where(df["aircraft_model"].notna(), None),
+            utc_s,
+        )
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO arrivals VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+        return len(df)
+
+    def query(self, icao_list, start, end) -> pd.DataFrame:
+        """Return stored arrivals for the airports with local scheduled time in [start, end)."""
+        if isinstance(icao_list, str):
+            icao_list = [icao_list]
+        placeholders = ", ".join("?" for _ in icao_list)
+        sql = (
+            "SELECT icao, flight_number, callsign, origin, aircraft_model, arrival_utc_s, arrival_local_s "
+            f"FROM arrivals WHERE icao IN ({placeholders}) "
+            "AND arrival_local_s >= ? AND arrival_local_s < ? ORDER BY icao, arrival_local_s"
+        )
+        with self._connect() as conn:
+            df = pd.read_sql_query(sql, conn, params=[*icao_list, _ns(start) // 10**9, _ns(end) // 10**9])
+
+        for col in _KEY_TEXT_COLUMNS:
+            df[col] = df[col].mask(df[col] == "")
+        df["arrival_scheduled_utc"] = pd.to_datetime(df.pop("arrival_utc_s"), unit="s", utc=True)
+        df["arrival_scheduled_local"] = pd.to_datetime(df.pop("arrival_local_s"), unit="s")
+        return df.astype({col: "category" for col in _CATEGORICAL_COLUMNS})
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_flight_store() -> FlightStore:
+    """Return the process-wide store (path overridable via `SILENT_SKIES_FLIGHT_STORE`)."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = FlightStore(os.environ.get("SILENT_SKIES_FLIGHT_STORE", DEFAULT_STORE_PATH))
+        return _default_store
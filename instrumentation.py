@@ -0,0 +1,170 @@
+# instrumentation.py — Lightweight timing spans with Chrome-trace export
+
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+_active_tracer = contextvars.ContextVar("silent_skies_tracer", default=None)
+_parent_span = contextvars.ContextVar("silent_skies_span", default=None)
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = None
+
+
+def current_rss_mb():
+    """Return the current resident set size in MB (Linux /proc), or None where unavailable."""
+    if _PAGE_SIZE is None:
+        return None
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / 1024 ** 2
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _rows(value):
+    return len(value) if isinstance(value, (pd.DataFrame, pd.Series)) else None
+
+
+class Tracer:
+    """
+    Collects spans (name, start, duration, rows in/out, RSS delta) for one dashboard run.
+
+    Spans are only recorded while the tracer is active in the current context (see
+    `activate`); with no active tracer, `span` and `traced` cost one context-variable
+    lookup.
+    """
+
+    def __init__(self):
+        self.spans = []
+        self._origin_ns = time.perf_counter_ns()
+        self._lock = threading.Lock()
+
+    def _record(self, span: dict) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Return spans in start order: name, depth, start_ms, duration_ms, rows_in, rows_out, rss_delta_mb."""
+        columns = ["name", "depth", "start_ms", "duration_ms", "rows_in", "rows_out", "rss_delta_mb", "error"]
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s["start_ns"])
+        return pd.DataFrame([
+            {
+                "name": s["name"],
+                "depth": s["depth"],
+                "start_ms": s["start_ns"] / 1e6,
+                "duration_ms": s["duration_ns"] / 1e6,
+                "rows_in": s["rows_in"],
+                "rows_out": s["rows_out"],
+                "rss_delta_mb": s["rss_delta_mb"],
+                "error": s["error"],
+            }
+            for s in spans
+        ], columns=columns)
+
+    def to_chrome_trace(self) -> dict:
+        """Return spans in Chrome trace-event format (load in chrome://tracing or Perfetto)."""
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self.spans)
+        events = []
+        for s in spans:
+            args = {k: s[k] for k in ("rows_in", "rows_out", "rss_delta_mb", "error") if s[k] is not None}
+            events.append({
+                "name": s["name"],
+                "ph": "X",
+                "ts": s["start_ns"] / 1e3,
+                "dur": s["duration_ns"] / 1e3,
+                "pid": pid,
+                "tid": s["thread"],
+                "args": args,
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export(self, path: str) -> str:
+        """Write the Chrome trace JSON to `path`."""
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f)
+        return path
+
+
+def activate(tracer: Tracer = None) -> Tracer:
+    """Make `tracer` (a new one by default) record spans in the current context; returns it."""
+    tracer = tracer or Tracer()
+    _active_tracer.set(tracer)
+    return tracer
+
+
+def get_tracer():
+    """Return the tracer active in the current context, or None."""
+    return _active_tracer.get()
+
+
+@contextmanager
+def span(name: str, rows_in=None):
+    """
+    Time a block as a span of the active tracer.
+
+    Yields a dict whose 'rows_out' (and 'rows_in') the block may set; yields a
+    throwaway dict when no tracer is active.
+    """
+    tracer = _active_tracer.get()
+    if tracer is None:
+        yield {}
+        return
+
+    parent = _parent_span.get()
+    record = {
+        "name": name,
+        "depth": 0 if parent is None else parent["depth"] + 1,
+        "thread": threading.get_ident(),
+        "rows_in": rows_in,
+        "rows_out": None,
+        "rss_delta_mb": None,
+        "error": None,
+    }
+    token = _parent_span.set(record)
+    rss_before = current_rss_mb()
+    started = time.perf_counter_ns()
+    try:
+        yield record
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        record["start_ns"] = started - tracer._origin_ns
+        record["duration_ns"] = time.perf_counter_ns() - started
+        rss_after = current_rss_mb()
+        if rss_before is not None and rss_after is not None:
+            record["rss_delta_mb"] = round(rss_after - rss_before, 2)
+        _parent_span.reset(token)
+        tracer._record(record)
+
+
+def traced(name: str = None):
+    """Decorator recording each call as a span; rows in/out come from DataFrame/Series arguments and results."""
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active_tracer.get() is None:
+                return func(*args, **kwargs)
+            rows_in = next((n for n in map(_rows, args) if n is not None), None)
+            with span(span_name, rows_in=rows_in) as record:
+                result = func(*args, **kwargs)
+                record["rows_out"] = _rows(result)
+                return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,188 @@
+# level_sketch.py — Mergeable histogram sketches for statistical noise levels (L10 / L50 / L90)
+
+import numpy as np
+import pandas as pd
+
+from matching import to_utc_ns
+
+EXCEEDANCE_LEVELS = (10, 50, 90)
+EXCEEDANCE_COLUMNS = [f"l{x}_db" for x in EXCEEDANCE_LEVELS]
+DEFAULT_BIN_DB = 0.1
+MIN_DB, MAX_DB = 0.0, 150.0
+_NAT = np.iinfo(np.int64).min
+
+
+class LevelSketch:
+    """
+    Per-(keys, time bucket) level distributions for exceedance levels such as L10/L50/L90.
+
+    Each group's samples are counted in fixed-width dB bins and only occupied bins are
+    stored, so a group never takes more than (max_db - min_db) / bin_db rows however
+    many samples it holds. `update` bins a chunk in one grouped pass; sketches from
+    chunks, days or worker processes merge exactly by adding counts, and coarser
+    groupings (all stations of an airport, whole days) are derived the same way.
+    Binned chunks are held back and added in only once they outgrow the stored bins
+    (or on read), so many small updates do not re-aggregate the whole sketch.
+
+    Error bound: for samples within [min_db, max_db], every returned level is within
+    bin_db / 2 of the exact nearest-rank quantile of the same samples (levels outside
+    the range are clamped to its edges).
+
+    Args:
+        keys (list): Grouping columns, e.g. ['icao', 'station'].
+        resolution (str): Time bucket (UTC; naive timestamps are taken as UTC).
+        bin_db (float): Bin width in dB; the error bound is half of it.
+        min_db, max_db (float): Level range covered by the bins.
+    """
+
+    def __init__(
+        self,
+        keys=("icao", "station"),
+        resolution: str = "1H",
+        time_col: str = "timestamp",
+        value_col: str = "noise_db",
+        bin_db: float = DEFAULT_BIN_DB,
+        min_db: float = MIN_DB,
+        max_db: float = MAX_DB,
+    ):
+        self.keys = list(keys)
+        self.resolution = resolution
+        self.time_col = time_col
+        self.value_col = value_col
+        self.bin_db = bin_db
+        self.min_db = min_db
+        self.n_bins = int(np.ceil((max_db - min_db) / bin_db)) + 1
+        self._state = None
+        self._pending = []
+        self._pending_rows = 0
+
+    def update(self, df_noise: pd.DataFrame) -> "LevelSketch":
+        """Fold a chunk of noise samples into the sketch and return self."""
+        missing = [c for c in [self.time_col, self.value_col, *self.keys] if c not in df_noise.columns]
+        if missing:
+            raise ValueError(f"Missing columns {missing} in noise data.")
+        times = to_utc_ns(df_noise[self.time_col])
+        levels = df_noise[self.value_col].to_numpy(dtype="float64")
+        valid = (times != _NAT) & ~np.isnan(levels)
+        if not valid.any():
+            return self
+
+        step = pd.Timedelta(self.resolution).value
+        bins = np.clip(np.rint((levels[valid] - self.min_db) / self.bin_db), 0, self.n_bins - 1)
+        frame = pd.DataFrame({
+            "bucket": times[valid] - times[valid] % step,
+            **{k: df_noise[k].to_numpy()[valid] for k in self.keys},
+            "bin": bins.astype("int16"),
+        })
+        partial = frame.groupby(["bucket", *self.keys, "bin"], observed=True, sort=False).size()
+        return self._merge_state(partial.rename("count").reset_index())
+
+    def merge(self, other: "LevelSketch") -> "LevelSketch":
+        """Fold another sketch with the same keys and bins (another chunk, day or worker) into this one."""
+        if (other.keys, other.bin_db, other.min_db, other.n_bins) != (self.keys, self.bin_db, self.min_db, self.n_bins):
+            raise ValueError("Sketches with different keys or bins cannot be merged.")
+        other._compact()
+        if other._state is not None:
+            self._merge_state(other._state)
+        return self
+
+    def _merge_state(self, partial: pd.DataFrame) -> "LevelSketch":
+        self._pending.append(partial)
+        self._pending_rows += len(partial)
+        # Combining costs O(state + pending); waiting until pending is as large keeps it O(pending).
+        if self._state is None or self._pending_rows >= len(self._state):
+            self._compact()
+        return self
+
+    def _compact(self) -> None:
+        """Add pending binned chunks into the stored bins."""
+        if not self._pending:
+            return
+        parts = self._pending if self._state is None else [self._state, *self._pending]
+        self._pending, self._pending_rows = [], 0
+        state = parts[0]
+        if len(parts) > 1:
+            state = pd.concat(parts, ignore_index=True)
+            state = state.groupby(["bucket", *self.keys, "bin"], observed=True, sort=False)["count"].sum().reset_index()
+        # Bucket-sorted so time ranges are sliced with searchsorted.
+        self._state = state.sort_values("bucket", kind="stable", ignore_index=True).astype(
+            {k: "category" for k in self.keys}
+        )
+
+    @property
+    def nbytes(self) -> int:
+        self._compact()
+        return 0 if self._state is None else int(self._state.memory_usage(index=True).sum())
+
+    def state(self) -> pd.DataFrame:
+        """Return the occupied bins (bucket, keys, bin, count) for persistence."""
+        self._compact()
+        if self._state is None:
+            return pd.DataFrame(columns=["bucket", *self.keys, "bin", "count"])
+        return self._state.copy()
+
+    @classmethod
+    def from_state(cls, state: pd.DataFrame, keys=("icao", "station"), **kwargs) -> "LevelSketch":
+        """Rebuild a sketch from a frame previously returned by `state()`."""
+        sketch = cls(keys=keys, **kwargs)
+        if not state.empty:
+            sketch._merge_state(state[["bucket", *sketch.keys, "bin", "count"]])
+        return sketch
+
+    def quantiles(
+        self,
+        levels=EXCEEDANCE_LEVELS,
+        by=None,
+        start=None,
+        end=None,
+        icao_list: list = None,
+        resolution: str = None,
+    ) -> pd.DataFrame:
+        """
+        Return exceedance levels (L10 is the level exceeded 10% of the time) per bucket.
+
+        Args:
+            levels (tuple): Exceedance percentages, giving columns 'l<x>_db'.
+            by (list): Key columns to keep; others (e.g. 'station') are merged. All keys when None.
+            start, end: Bucket range [start, end) in UTC; everything when None.
+            icao_list (list): Airports to keep; all when None.
+            resolution (str): Coarser bucket than the sketch's own, e.g. '1D'.
+        """
+        by = self.keys if by is None else [k for k in by if k in self.keys]
+        columns = ["bucket", *by, "n_samples", *[f"l{x}_db" for x in levels]]
+        self._compact()
+        if self._state is None:
+            return pd.DataFrame(columns=columns)
+
+        state = self._state
+        buckets = state["bucket"].to_numpy()
+        lo = 0 if start is None else np.searchsorted(buckets, to_utc_ns([pd.Timestamp(start)])[0], side="left")
+        hi = len(buckets) if end is None else np.searchsorted(buckets, to_utc_ns([pd.Timestamp(end)])[0], side="left")
+        state = state.iloc[lo:hi]
+        if icao_list is not None and "icao" in state.columns:
+            state = state[state["icao"].isin(icao_list)]
+        if resolution is not None:
+            step = pd.Timedelta(resolution).value
+            state = state.assign(bucket=state["bucket"].to_numpy() - state["bucket"].to_numpy() % step)
+
+        hist = state.groupby(["bucket", *by, "bin"], observed=True)["count"].sum().reset_index()
+        hist = hist[hist["count"] > 0]
+        if hist.empty:
+            return pd.DataFrame(columns=columns)
+
+        # hist is sorted by group then bin: each group is a contiguous run of the running total.
+        starts = np.flatnonzero(~hist.duplicated(["bucket", *by]).to_numpy())
+        counts = hist["count"].to_numpy(dtype="int64")
+        cumulative = np.cumsum(counts)
+        totals = np.add.reduceat(counts, starts)
+        before = cumulative[starts] - counts[starts]
+        bins = hist["bin"].to_numpy()
+
+        result = hist.iloc[starts][["bucket", *by]].reset_index(drop=True).assign(n_samples=totals)
+        for x in levels:
+            # Level exceeded x% of the time = nearest-rank (100 - x)th percentile.
+            rank = np.maximum(-(-(100 - x) * totals // 100), 1).astype("int64")
+            position = np.searchsorted(cumulative, before + rank, side="left")
+            result[f"l{x}_db"] = (self.min_db + bins[position] * self.bin_db).astype("float32")
+        result["bucket"] = pd.to_datetime(result["bucket"])
+        return result[columns]
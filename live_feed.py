@@ -0,0 +1,307 @@
+# live_feed.py — Live sensor feeds: file/queue/socket sources, ring buffer and incremental aggregates
+
+import glob
+import io
+import os
+import queue
+import socket
+import threading
+
+import numpy as np
+import pandas as pd
+
+from data_fetch import parse_timestamps
+from matching import FlightIndex, match_flights, to_utc_ns
+from noise_levels import LevelAccumulator
+
+FEED_COLUMNS = ["timestamp", "noise_db", "icao", "station"]
+DEFAULT_CAPACITY = 1_000_000
+DEFAULT_MATCH_CAPACITY = 10_000
+_NAT = np.iinfo(np.int64).min
+
+
+def normalize_feed(df: pd.DataFrame) -> pd.DataFrame:
+    """Parse timestamps, coerce levels to float and drop unusable rows of a feed batch."""
+    if "timestamp" not in df.columns or "noise_db" not in df.columns:
+        raise ValueError("Feed rows need 'timestamp' and 'noise_db' columns.")
+    df = df.copy()
+    df["timestamp"] = parse_timestamps(df["timestamp"])
+    df["noise_db"] = pd.to_numeric(df["noise_db"], errors="coerce").astype("float32")
+    return df.dropna(subset=["timestamp", "noise_db"])
+
+
+class _Codes:
+    """Append-only string ↔ int code table shared by every row of a ring buffer column."""
+
+    def __init__(self):
+        self.names = []
+        self._codes = {}
+
+    def encode(self, values) -> np.ndarray:
+        local_codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=True)
+        mapping = np.empty(len(uniques), dtype=np.int32)
+        for i, name in enumerate(uniques):
+            code = self._codes.get(name)
+            if code is None:
+                code = self._codes[name] = len(self.names)
+                self.names.append(name)
+            mapping[i] = code
+        return np.where(local_codes >= 0, mapping[np.maximum(local_codes, 0)] if len(mapping) else -1, -1)
+
+    def decode(self, codes: np.ndarray) -> pd.Categorical:
+        return pd.Categorical.from_codes(codes, categories=pd.Index(self.names, dtype=object))
+
+
+class RingBuffer:
+    """
+    Fixed-capacity, array-backed buffer of the most recent noise samples.
+
+    Memory is allocated once (int64 times, float32 levels, int32 airport/station
+    codes); appends overwrite the oldest rows in place. Every row gets a sequence
+    number, so consumers can ask for just the rows appended since they last looked.
+
+    Args:
+        capacity (int): Number of samples kept.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = int(capacity)
+        self._times = np.full(self.capacity, _NAT, dtype=np.int64)
+        self._levels = np.full(self.capacity, np.nan, dtype=np.float32)
+        self._icao = np.full(self.capacity, -1, dtype=np.int32)
+        self._station = np.full(self.capacity, -1, dtype=np.int32)
+        self._icao_codes = _Codes()
+        self._station_codes = _Codes()
+        self.appended = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return min(self.appended, self.capacity)
+
+    @property
+    def nbytes(self) -> int:
+        return self._times.nbytes + self._levels.nbytes + self._icao.nbytes + self._station.nbytes
+
+    def append(self, df: pd.DataFrame) -> int:
+        """Append normalized feed rows; returns the sequence number of the first new row."""
+        with self._lock:
+            first = self.appended
+            n = len(df)
+            if n == 0:
+                return first
+            keep = slice(max(n - self.capacity, 0), n)
+            missing = np.full(n, None, dtype=object)
+            times = to_utc_ns(df["timestamp"])[keep]
+            levels = df["noise_db"].to_numpy(dtype=np.float32)[keep]
+            icao = self._icao_codes.encode(df["icao"] if "icao" in df.columns else missing)[keep]
+            station = self._station_codes.encode(df["station"] if "station" in df.columns else missing)[keep]
+
+            positions = (first + keep.start + np.arange(len(times))) % self.capacity
+            self._times[positions] = times
+            self._levels[positions] = levels
+            self._icao[positions] = icao
+            self._station[positions] = station
+            self.appended += n
+            return first
+
+    def to_frame(self, since: int = 0, window=None) -> pd.DataFrame:
+        """
+        Return buffered rows with sequence number >= `since`, oldest first (naive UTC timestamps).
+
+        With `window` (e.g. '1H'), only rows within that span of the newest timestamp are
+        returned; they are selected on the raw time array before any column is built.
+        """
+        with self._lock:
+            start = max(since, self.appended - self.capacity, 0)
+            positions = np.arange(start, self.appended) % self.capacity
+            if window is not None and len(positions):
+                times = self._times[positions]
+                positions = positions[times >= times.max() - pd.Timedelta(window).value]
+            return pd.DataFrame({
+                "timestamp": pd.to_datetime(self._times[positions]),
+                "noise_db": self._levels[positions],
+                "icao": self._icao_codes.decode(self._icao[positions]),
+                "station": self._station_codes.decode(self._station[positions]),
+            })
+
+
+class DirectoryTailer:
+    """
+    Read rows appended to rolling CSV files in a directory since the last poll.
+
+    Each file's byte offset and header are remembered; only complete lines are
+    consumed, new files are picked up as they appear, and a file that shrinks or is
+    replaced (new inode) is read again from the start.
+
+    Args:
+        directory (str): Directory to watch.
+        pattern (str): Glob for feed files inside it.
+    """
+
+    def __init__(self, directory: str, pattern: str = "*.csv"):
+        self.directory = directory
+        self.pattern = pattern
+        self._files = {}
+
+    def poll(self) -> pd.DataFrame:
+        frames = []
+        for path in sorted(glob.glob(os.path.join(self.directory, self.pattern))):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            state = self._files.get(path)
+            if state is None or stat.st_size < state["offset"] or stat.st_ino != state["inode"]:
+                state = self._files[path] = {"offset": 0, "header": None, "inode": stat.st_ino}
+            if stat.st_size == state["offset"]:
+                continue
+
+            with open(path, "rb") as f:
+                f.seek(state["offset"])
+                data = f.read(stat.st_size - state["offset"])
+            complete = data.rfind(b"\n") + 1
+            if complete == 0:
+                continue  # partial line still being written
+            data = data[:complete]
+            state["offset"] += complete
+            if state["header"] is None:
+                header_end = data.index(b"\n") + 1
+                state["header"], data = data[:header_end], data[header_end:]
+            if data.strip():
+                frames.append(pd.read_csv(io.BytesIO(state["header"] + data)))
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=FEED_COLUMNS)
+
+
+class QueueSource:
+    """Drain feed records (dicts, lists of dicts or DataFrames) pushed onto a `queue.Queue`."""
+
+    def __init__(self, feed_queue: queue.Queue = None):
+        self.queue = feed_queue or queue.Queue()
+
+    def poll(self) -> pd.DataFrame:
+        frames, records = [], []
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, pd.DataFrame):
+                frames.append(item)
+            elif isinstance(item, dict):
+                records.append(item)
+            else:
+                records.extend(item)
+        if records:
+            frames.append(pd.DataFrame.from_records(records))
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=FEED_COLUMNS)
+
+
+class UdpSource:
+    """
+    Receive CSV lines ('timestamp,noise_db,icao,station') sent as UDP datagrams to a local port.
+
+    Args:
+        host (str), port (int): Address to bind; port 0 picks a free port (see `address`).
+        columns (list): Column names of the CSV fields.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, columns: list = None):
+        self.columns = columns or FEED_COLUMNS
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.bind((host, port))
+        self._socket.setblocking(False)
+        self.address = self._socket.getsockname()
+
+    def poll(self) -> pd.DataFrame:
+        chunks = []
+        while True:
+            try:
+                chunks.append(self._socket.recv(65536))
+            except BlockingIOError:
+                break
+        data = b"\n".join(chunk.strip() for chunk in chunks if chunk.strip())
+        if not data:
+            return pd.DataFrame(columns=self.columns)
+        return pd.read_csv(io.BytesIO(data), names=self.columns, header=None)
+
+    def close(self) -> None:
+        self._socket.close()
+
+
+class LiveSession:
+    """
+    Poll feed sources and keep the live view up to date incrementally.
+
+    Each `poll` touches only the rows that arrived since the previous one: they are
+    appended to the ring buffer, folded into the hourly level accumulators and
+    matched against the current flight index. History is never reprocessed; hourly
+    aggregates keep covering samples that have already left the buffer.
+
+    Args:
+        sources (list): Objects with a `poll() -> DataFrame` method.
+        capacity (int): Ring buffer size in samples.
+        tolerance: Noise↔arrival match tolerance.
+        match_capacity (int): Number of most recent matched samples kept.
+    """
+
+    def __init__(
+        self,
+        sources: list,
+        capacity: int = DEFAULT_CAPACITY,
+        tolerance="5min",
+        match_capacity: int = DEFAULT_MATCH_CAPACITY,
+    ):
+        self.sources = list(sources)
+        self.buffer = RingBuffer(capacity)
+        self.levels = LevelAccumulator(keys=["icao"])
+        self.tolerance = tolerance
+        self.match_capacity = match_capacity
+        self._flights = None
+        self._matches = []
+        self._matched_rows = 0
+
+    def set_flights(self, df_flights: pd.DataFrame) -> None:
+        """Use these arrivals for matching samples received from now on."""
+        if df_flights is None or df_flights.empty:
+            self._flights = None
+        else:
+            by = "icao" if "icao" in df_flights.columns else None
+            self._flights = FlightIndex(df_flights, by=by)
+
+    def poll(self) -> int:
+        """Pull new rows from every source and update the live state; returns rows added."""
+        batches = [source.poll() for source in self.sources]
+        batches = [b for b in batches if not b.empty]
+        if not batches:
+            return 0
+        new = normalize_feed(pd.concat(batches, ignore_index=True))
+        if new.empty:
+            return 0
+        if "icao" not in new.columns:
+            new["icao"] = None
+
+        self.buffer.append(new)
+        self.levels.update(new.dropna(subset=["icao"]))
+        if self._flights is not None:
+            matched = match_flights(new, self._flights, direction="nearest", tolerance=self.tolerance)
+            matched = matched[matched["flight_number"].notna()] if "flight_number" in matched.columns else matched
+            if not matched.empty:
+                self._matches.append(matched)
+                self._matched_rows += len(matched)
+                while self._matched_rows - len(self._matches[0]) >= self.match_capacity:
+                    self._matched_rows -= len(self._matches.pop(0))
+        return len(new)
+
+    def recent(self, window=None) -> pd.DataFrame:
+        """Return buffered samples, optionally only the last `window` (e.g. '1H') of them."""
+        return self.buffer.to_frame(window=window)
+
+    def hourly(self) -> pd.DataFrame:
+        """Return hourly Leq/Lmax per airport for everything received so far."""
+        return self.levels.hourly()
+
+    def matches(self) -> pd.DataFrame:
+        """Return the most recent samples matched to an arrival (at most `match_capacity`)."""
+        if not self._matches:
+            return pd.DataFrame()
+        return pd.concat(self._matches, ignore_index=True).tail(self.match_capacity)
@@ -0,0 +1,112 @@
+# map_bins.py — Server-side spatial binning of map points (Web Mercator square grid)
+
+import numpy as np
+import pandas as pd
+
+from noise_levels import db_to_energy, energy_to_db
+
+EARTH_RADIUS_M = 6378137.0
+WORLD_WIDTH_M = 2 * np.pi * EARTH_RADIUS_M
+MAX_LATITUDE = 85.05112878
+
+# Cells across one 256 px map tile: ~32 px cells on screen at the zoom they were built for.
+CELLS_PER_TILE = 8
+DEFAULT_MAX_POINTS = 5000
+
+
+def cell_size_for_zoom(zoom: float, cells_per_tile: int = CELLS_PER_TILE) -> float:
+    """Return the grid cell edge in Web Mercator metres for a map zoom level."""
+    return WORLD_WIDTH_M / (2 ** zoom) / cells_per_tile
+
+
+def to_mercator(lat, lon) -> tuple:
+    """Project degrees to Web Mercator metres (latitudes clipped to the Mercator limit)."""
+    lat = np.radians(np.clip(np.asarray(lat, dtype="float64"), -MAX_LATITUDE, MAX_LATITUDE))
+    lon = np.radians(np.asarray(lon, dtype="float64"))
+    return EARTH_RADIUS_M * lon, EARTH_RADIUS_M * np.log(np.tan(np.pi / 4 + lat / 2))
+
+
+def from_mercator(x, y) -> tuple:
+    """Inverse of `to_mercator`, returning (lat, lon) in degrees."""
+    lon = np.degrees(np.asarray(x, dtype="float64") / EARTH_RADIUS_M)
+    lat = np.degrees(2 * np.arctan(np.exp(np.asarray(y, dtype="float64") / EARTH_RADIUS_M)) - np.pi / 2)
+    return lat, lon
+
+
+def bin_points(
+    df: pd.DataFrame,
+    zoom: float,
+    lat_col: str = "lat",
+    lon_col: str = "lon",
+    value_col: str = None,
+    cells_per_tile: int = CELLS_PER_TILE,
+) -> pd.DataFrame:
+    """
+    Aggregate points into square Web Mercator cells sized for `zoom`.
+
+    Args:
+        df (pd.DataFrame): Points; rows with missing coordinates are ignored.
+        zoom (float): Map zoom the cells are drawn at; each step halves the cell size.
+        value_col (str): Optional dB column, energy-averaged per cell into 'leq_db'
+            (with 'lmax_db').
+
+    Returns:
+        pd.DataFrame: One row per non-empty cell with 'lat'/'lon' (cell centre),
+        'corner_lat'/'corner_lon' (south-west corner), 'count', 'cell_size_m' (ground
+        metres at the cell centre) and, with `value_col`, 'leq_db' and 'lmax_db'.
+    """
+    lat = df[lat_col].to_numpy(dtype="float64")
+    lon = df[lon_col].to_numpy(dtype="float64")
+    valid = ~(np.isnan(lat) | np.isnan(lon))
+    values = None
+    if value_col is not None:
+        values = df[value_col].to_numpy(dtype="float64")
+        valid &= ~np.isnan(values)
+        values = values[valid]
+
+    size = cell_size_for_zoom(zoom, cells_per_tile)
+    x, y = to_mercator(lat[valid], lon[valid])
+    cells = pd.DataFrame({
+        "cx": np.floor(x / size).astype("int64"),
+        "cy": np.floor(y / size).astype("int64"),
+        "count": np.ones(len(x), dtype="int64"),
+    })
+    aggregations = {"count": "sum"}
+    if values is not None:
+        cells["energy"] = db_to_energy(values)
+        cells["lmax_db"] = values
+        aggregations.update({"energy": "sum", "lmax_db": "max"})
+    cells = cells.groupby(["cx", "cy"], sort=False).agg(aggregations).reset_index()
+
+    corner_lat, corner_lon = from_mercator(cells["cx"] * size, cells["cy"] * size)
+    centre_lat, centre_lon = from_mercator((cells["cx"] + 0.5) * size, (cells["cy"] + 0.5) * size)
+    result = pd.DataFrame({
+        "lat": centre_lat,
+        "lon": centre_lon,
+        "corner_lat": corner_lat,
+        "corner_lon": corner_lon,
+        "count": cells["count"],
+        # Mercator stretches by 1/cos(lat); deck.gl cell sizes are ground metres.
+        "cell_size_m": size * np.cos(np.radians(centre_lat)),
+    })
+    if values is not None:
+        result["leq_db"] = energy_to_db(cells["energy"] / cells["count"]).astype("float32")
+        result["lmax_db"] = cells["lmax_db"].astype("float32")
+    return result
+
+
+def sample_points(df: pd.DataFrame, columns: list, max_points: int = DEFAULT_MAX_POINTS, seed: int = 0) -> pd.DataFrame:
+    """Return at most `max_points` rows of `columns`, a deterministic random sample when larger."""
+    df = df[columns].dropna()
+    if len(df) > max_points:
+        df = df.sample(n=max_points, random_state=seed)
+    return df.reset_index(drop=True)
+
+
+def level_colors(levels_db, low: float = 45.0, high: float = 85.0, alpha: int = 180) -> list:
+    """Map dB levels to RGBA lists on a green→red ramp (missing levels are grey)."""
+    levels = np.asarray(levels_db, dtype="float64")
+    t = np.clip((levels - low) / (high - low), 0.0, 1.0)
+    rgba = np.stack([255 * t, 200 * (1 - t), np.full_like(t, 40), np.full_like(t, alpha)], axis=1)
+    rgba[np.isnan(levels)] = [150, 150, 150, alpha]
+    return rgba.round().astype(int).tolist()
@@ -0,0 +1,221 @@
+# matching.py — Vectorized noise↔flight matching engine
+
+import numpy as np
+import pandas as pd
+
+DIRECTIONS = ("nearest", "backward", "forward", "window")
+_NAT = np.iinfo(np.int64).min
+
+
+def to_utc_naive(values) -> pd.Series:
+    """
+    Return datetimes as naive UTC datetime64[ns] (naive values are taken as UTC).
+
+    Text or objects mixing offsets, 'Z' and naive values are converted per value; only
+    values that are not dates at all become NaT.
+    """
+    values = values if isinstance(values, pd.Series) else pd.Series(values)
+    if isinstance(values.dtype, pd.DatetimeTZDtype):
+        return values.dt.tz_convert("UTC").dt.tz_localize(None)
+    if pd.api.types.is_datetime64_dtype(values):
+        return values
+    parsed = pd.to_datetime(values, utc=True, errors="coerce")
+    # The format is inferred from the first value; values in another layout are re-parsed one by one.
+    retry = parsed.isna() & values.notna()
+    if retry.any():
+        parsed[retry] = pd.to_datetime(values[retry], utc=True, errors="coerce", format="mixed")
+    return parsed.dt.tz_localize(None)
+
+
+def to_utc_ns(values) -> np.ndarray:
+    """Return datetimes as int64 UTC nanoseconds (naive values are taken as UTC; NaT → int64 min)."""
+    return np.asarray(to_utc_naive(values), dtype="datetime64[ns]").view("int64")
+
+
+def _key_codes(values, keys: pd.Index) -> np.ndarray:
+    """Map key values onto positions in `keys` (-1 when absent) without materialising strings."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        category_codes = keys.get_indexer(values.cat.categories)
+        codes = values.cat.codes.to_numpy()
+        return np.where(codes >= 0, category_codes[codes], -1)
+    return keys.get_indexer(values)
+
+
+class FlightIndex:
+    """
+    Flight times sorted once per airport key, ready to be matched against many noise frames.
+
+    Args:
+        df_flights (pd.DataFrame): Flights with a datetime column and optional key column.
+        time_col (str): Flight time column.
+        by (str): Optional key column (e.g. 'icao') that noise rows must share with their flight.
+    """
+
+    def __init__(self, df_flights: pd.DataFrame, time_col: str = "arrival_scheduled_utc", by: str = None):
+        if time_col not in df_flights.columns:
+            raise ValueError(f"Missing column '{time_col}' in flight data.")
+        if by is not None and by not in df_flights.columns:
+            raise ValueError(f"Missing column '{by}' in flight data.")
+
+        self.df_flights = df_flights
+        self.time_col = time_col
+        self.by = by
+        times = to_utc_ns(df_flights[time_col])
+
+        if by is None:
+            self.keys = pd.Index([None])
+            codes = np.zeros(len(df_flights), dtype=np.int64)
+        else:
+            self.keys = pd.Index(pd.unique(df_flights[by].dropna().astype(object)))
+            codes = _key_codes(df_flights[by], self.keys)
+
+        valid = (times != _NAT) & (codes >= 0)
+        order = np.lexsort((times, codes))
+        order = order[valid[order]]
+        # Per key: positions into df_flights and their sorted times.
+        bounds = np.searchsorted(codes[order], np.arange(len(self.keys) + 1))
+        self._groups = [
+            (order[bounds[i]:bounds[i + 1]], times[order[bounds[i]:bounds[i + 1]]])
+            for i in range(len(self.keys))
+        ]
+
+    def match_positions(self, noise_times, noise_keys=None, direction="nearest", tolerance="5min"):
+        """
+        Match noise times to flights and return positional indices.
+
+        For 'nearest', 'backward' and 'forward' returns one flight position per noise row
+        (-1 when nothing lies within `tolerance`). For 'window' returns a pair of arrays
+        (noise_positions, flight_positions) with one entry per flight within ±`tolerance`.
+        """
+        if direction not in DIRECTIONS:
+            raise ValueError(f"Unknown direction '{direction}', expected one of {DIRECTIONS}.")
+        tol = pd.Timedelta(tolerance).value
+        times = to_utc_ns(noise_times)
+        if self.by is None:
+            codes = np.zeros(len(times), dtype=np.int64)
+        else:
+            if noise_keys is None:
+                raise ValueError(f"Noise keys are required to match by '{self.by}'.")
+            noise_keys = noise_keys if isinstance(noise_keys, pd.Series) else pd.Series(noise_keys)
+            codes = _key_codes(noise_keys, self.keys)
+        codes = np.where(times == _NAT, -1, codes)
+
+        # Group noise rows by key once; each group is then matched with one searchsorted call.
+        noise_order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[noise_order], np.arange(-1, len(self.keys) + 1))
+
+        if direction == "window":
+            pairs_noise, pairs_flight = [], []
+            for i, (flight_pos, flight_times) in enumerate(self._groups):
+                rows = noise_order[bounds[i + 1]:bounds[i + 2]]
+                n_pos, f_pos = _window(times[rows], flight_times, tol)
+                pairs_noise.append(rows[n_pos])
+                pairs_flight.append(flight_pos[f_pos])
+            if not pairs_noise:
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+            noise_pos = np.concatenate(pairs_noise)
+            flight_pos = np.concatenate(pairs_flight)
+            order = np.lexsort((flight_pos, noise_pos))
+            return noise_pos[order], flight_pos[order]
+
+        result = np.full(len(times), -1, dtype=np.int64)
+        for i, (flight_pos, flight_times) in enumerate(self._groups):
+            rows = noise_order[bounds[i + 1]:bounds[i + 2]]
+            if len(rows) and len(flight_times):
+                local = _one_to_one(times[rows], flight_times, direction, tol)
+                result[rows] = np.where(local >= 0, flight_pos[np.maximum(local, 0)], -1)
+        return result
+
+
+def _one_to_one(times, flight_times, direction, tol):
+    """Return the position in sorted `flight_times` matched to each time, or -1."""
+    n = len(flight_times)
+    if direction == "backward":
+        candidate = np.searchsorted(flight_times, times, side="right") - 1
+    elif direction == "forward":
+        candidate = np.searchsorted(flight_times, times, side="left")
+    else:
+        right = np.searchsorted(flight_times, times, side="left")
+        left = right - 1
+        left_dist = np.where(left >= 0, times - flight_times[np.clip(left, 0, n - 1)], np.iinfo(np.int64).max)
+        right_dist = np.where(right < n, flight_times[np.clip(right, 0, n - 1)] - times, np.iinfo(np.int64).max)
+        candidate = np.where(left_dist <= right_dist, left, right)
+
+    in_range = (candidate >= 0) & (candidate < n)
+    safe = np.clip(candidate, 0, n - 1)
+    close = np.abs(flight_times[safe] - times) <= tol
+    return np.where(in_range & close, candidate, -1)
+
+
+def _window(times, flight_times, tol):
+    """Return (row, flight) position pairs for every flight within ±tol of each time."""
+    lo = np.searchsorted(flight_times, times - tol, side="left")
+    hi = np.searchsorted(flight_times, times + tol, side="right")
+    counts = hi - lo
+    rows = np.repeat(np.arange(len(times)), counts)
+    # Expand each [lo, hi) run without a Python loop.
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return rows, np.repeat(lo, counts) + offsets
+
+
+def match_flights(
+    df_noise: pd.DataFrame,
+    df_flights,
+    time_col_noise: str = "timestamp",
+    time_col_flight: str = "arrival_scheduled_utc",
+    by: str = None,
+    direction: str = "nearest",
+    tolerance="5min",
+    flight_columns: list = None,
+    suffix: str = "_flight",
+) -> pd.DataFrame:
+    """
+    Attach flight columns to noise rows matched in time (and optionally by airport key).
+
+    Args:
+        df_noise (pd.DataFrame): Noise rows; never sorted or modified.
+        df_flights: Flights DataFrame, or a prebuilt FlightIndex to reuse across chunks.
+        by (str): Key column present in both frames (e.g. 'icao'); matches never cross keys.
+        direction (str): 'nearest', 'backward', 'forward' or 'window' (all flights within
+            ±tolerance, one output row per pair).
+        flight_columns (list): Flight columns to attach; defaults to all but the key.
+        suffix (str): Appended to flight columns whose names clash with noise columns.
+
+    Returns:
+        pd.DataFrame: Noise rows in their original order with matched flight columns
+        (NaN/NaT where unmatched). In 'window' mode unmatched noise rows are dropped.
+    """
+    if time_col_noise not in df_noise.columns:
+        raise ValueError(f"Missing column '{time_col_noise}' in noise data.")
+    index = df_flights if isinstance(df_flights, FlightIndex) else FlightIndex(df_flights, time_col_flight, by)
+    if index.by is not None and index.by not in df_noise.columns:
+        raise ValueError(f"Missing column '{index.by}' in noise data.")
+
+    flights = index.df_flights
+    if flight_columns is None:
+        flight_columns = [c for c in flights.columns if c != index.by]
+    noise_keys = df_noise[index.by] if index.by is not None else None
+
+    if direction == "window":
+        noise_pos, flight_pos = index.match_positions(df_noise[time_col_noise], noise_keys, direction, tolerance)
+        left = df_noise.take(noise_pos)
+    else:
+        flight_pos = index.match_positions(df_noise[time_col_noise], noise_keys, direction, tolerance)
+        left = df_noise
+
+    attached = {}
+    for col in flight_columns:
+        name = f"{col}{suffix}" if col in df_noise.columns else col
+        attached[name] = _take_with_missing(flights[col], flight_pos, left.index)
+    return pd.concat([left, pd.DataFrame(attached, index=left.index)], axis=1, copy=False)
+
+
+def _take_with_missing(column: pd.Series, positions: np.ndarray, index) -> pd.Series:
+    """Gather values by position, leaving missing values where the position is -1."""
+    missing = positions < 0
+    values = column.iloc[np.where(missing, 0, positions)] if len(column) else column.reindex(range(len(positions)))
+    values = values.reset_index(drop=True)
+    if missing.any():
+        values = values.mask(missing)
+    values.index = index
+    return values
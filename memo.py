@@ -0,0 +1,179 @@
+# memo.py — Dependency-aware memoization of pipeline stages across Streamlit reruns
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from chart_cache import fingerprint
+from noise_cache import content_hash
+
+DEFAULT_MAX_BYTES = 512 * 1024 ** 2
+DEFAULT_MAX_ENTRIES_PER_STAGE = 4
+_SESSION_KEY = "_silent_skies_memo"
+
+
+def _size(value) -> int:
+    """Approximate in-memory size of a stage result (shallow for object columns)."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=False).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=False))
+    if hasattr(value, "nbytes"):  # arrays, CompactFrame, RingBuffer
+        return int(value.nbytes)
+    if isinstance(value, (tuple, list)):
+        return sum(_size(v) for v in value)
+    return 64
+
+
+def _members(value) -> list:
+    """Return a stage result and, for tuple results such as (frame, report), its members."""
+    return [value, *value] if isinstance(value, tuple) else [value]
+
+
+class _Entry:
+    __slots__ = ("stage", "value", "size", "deps", "seconds")
+
+    def __init__(self, stage, value, size, deps, seconds):
+        self.stage = stage
+        self.value = value
+        self.size = size
+        self.deps = deps
+        self.seconds = seconds
+
+
+class PipelineMemo:
+    """
+    Memoize pipeline stages so a rerun only re-executes stages whose inputs changed.
+
+    A stage call is keyed by (stage, function, input keys). Inputs are keyed cheaply:
+    results of earlier memoized stages by that entry's key (no hashing, and this is
+    what links stages into a dependency graph; members of tuple results such as
+    (frame, report) count too), uploads by Streamlit `file_id` or a
+    content hash, local paths by size and mtime, other frames by a content
+    fingerprint and plain values by repr. Invalidating a stage also drops every entry
+    computed from it. Entries are evicted least-recently-used, within
+    `max_entries_per_stage` per stage and `max_bytes` overall.
+
+    Cached results are shared between reruns: treat them as read-only. A stage that
+    returns one of its inputs (e.g. after modifying it in place) stays linked to the
+    stage that produced that object, so its own key does not change on the next rerun.
+
+    Args:
+        max_bytes (int): Memory bound across all stages.
+        max_entries_per_stage (int): Results kept per stage (e.g. a few parameter sets).
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, max_entries_per_stage: int = DEFAULT_MAX_ENTRIES_PER_STAGE):
+        self.max_bytes = max_bytes
+        self.max_entries_per_stage = max_entries_per_stage
+        self._entries = OrderedDict()
+        self._by_id = {}
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._stats = {}
+
+    def _input_key(self, value):
+        key = self._by_id.get(id(value))
+        if key is not None and key in self._entries and any(m is value for m in _members(self._entries[key].value)):
+            return ("stage", key)
+        if isinstance(value, (list, tuple)) and value and all(hasattr(v, "read") for v in value):
+            return ("files", tuple(self._input_key(v) for v in value))
+        if hasattr(value, "file_id"):  # Streamlit UploadedFile
+            return ("upload", value.file_id, getattr(value, "size", None))
+        if isinstance(value, str) and os.path.isfile(value):
+            stat = os.stat(value)
+            return ("path", os.path.abspath(value), stat.st_size, stat.st_mtime_ns)
+        if hasattr(value, "read") and hasattr(value, "seek"):
+            return ("file", content_hash(value))
+        return ("value", fingerprint(value))
+
+    def run(self, stage: str, func, *args, **kwargs):
+        """Return `func(*args, **kwargs)`, computing it only when this stage's inputs changed."""
+        with self._lock:
+            names = sorted(kwargs)
+            inputs = [self._input_key(a) for a in args] + [self._input_key(kwargs[n]) for n in names]
+            key = (stage, f"{func.__module__}.{func.__qualname__}", fingerprint(inputs, names))
+            stats = self._stats.setdefault(stage, {"hits": 0, "misses": 0, "seconds_saved": 0.0})
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                stats["hits"] += 1
+                stats["seconds_saved"] += entry.seconds
+                return entry.value
+            deps = {k[1] for k in inputs if k[0] == "stage"}
+
+        # Run outside the lock so other sessions' stages are not serialized behind this one.
+        started = time.perf_counter()
+        value = func(*args, **kwargs)
+        seconds = time.perf_counter() - started
+
+        with self._lock:
+            stats["misses"] += 1
+            input_ids = {id(v) for v in (*args, *kwargs.values())}
+            self._store(key, _Entry(stage, value, _size(value), deps, seconds), input_ids)
+        return value
+
+    def _store(self, key, entry: _Entry, input_ids: set = frozenset()) -> None:
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = entry
+        # Re-pointing an input's id at this entry would change this stage's own key next time.
+        for member in _members(entry.value):
+            if id(member) not in input_ids:
+                self._by_id[id(member)] = key
+        self._bytes += entry.size
+
+        same_stage = [k for k, e in self._entries.items() if e.stage == entry.stage]
+        for old in same_stage[:-self.max_entries_per_stage]:
+            self._drop(old)
+        for old in list(self._entries):
+            if self._bytes <= self.max_bytes or old == key:
+                break
+            self._drop(old)
+
+    def _drop(self, key) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry.size
+        for member in _members(entry.value):
+            if self._by_id.get(id(member)) == key:
+                del self._by_id[id(member)]
+        # Anything computed from this result is stale too.
+        for dependent in [k for k, e in self._entries.items() if key in e.deps]:
+            self._drop(dependent)
+
+    def invalidate(self, stage: str = None) -> int:
+        """Drop cached results of `stage` (all stages when None) and of stages derived from them."""
+        with self._lock:
+            before = len(self._entries)
+            for key in [k for k, e in self._entries.items() if stage is None or e.stage == stage]:
+                self._drop(key)
+            return before - len(self._entries)
+
+    def stats(self) -> pd.DataFrame:
+        """Return per-stage hits, misses, seconds saved, cached entries and bytes."""
+        with self._lock:
+            rows = []
+            for stage, counts in self._stats.items():
+                entries = [e for e in self._entries.values() if e.stage == stage]
+                rows.append({
+                    "stage": stage,
+                    **counts,
+                    "entries": len(entries),
+                    "bytes": sum(e.size for e in entries),
+                })
+        return pd.DataFrame(rows, columns=["stage", "hits", "misses", "seconds_saved", "entries", "bytes"])
+
+
+def get_session_memo(**kwargs) -> PipelineMemo:
+    """Return the memo stored in the current Streamlit session (created on first use)."""
+    import streamlit as st
+
+    memo = st.session_state.get(_SESSION_KEY)
+    if memo is None:
+        memo = st.session_state[_SESSION_KEY] = PipelineMemo(**kwargs)
+    return memo
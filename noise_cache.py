@@ -0,0 +1,173 @@
+# noise_cache.py — On-disk columnar cache for uploaded noise datasets
+
+import hashlib
+import os
+import tempfile
+import threading
+
+import pandas as pd
+
+from data_fetch import NOISE_DTYPES, load_noise_data, stringify_mixed_columns
+from instrumentation import traced
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "silent_skies", "noise")
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+# Part of every cache key: bump it when parsing or the stored schema changes so entries
+# written by an older parser are no longer served.
+CACHE_VERSION = 2
+_HASH_BLOCK = 1024 * 1024
+
+
+def content_hash(uploaded_file) -> str:
+    """
+    Hash the bytes of a local path or file-like upload without loading it all at once.
+
+    File-like objects are rewound afterwards so they can still be parsed.
+    """
+    digest = hashlib.sha256()
+    if isinstance(uploaded_file, str):
+        with open(uploaded_file, "rb") as fh:
+            for block in iter(lambda: fh.read(_HASH_BLOCK), b""):
+                digest.update(block)
+    else:
+        uploaded_file.seek(0)
+        for block in iter(lambda: uploaded_file.read(_HASH_BLOCK), b""):
+            digest.update(block)
+        uploaded_file.seek(0)
+    return digest.hexdigest()
+
+
+class NoiseCache:
+    """
+    Parquet cache of parsed noise uploads, keyed by a content hash of the upload and
+    CACHE_VERSION.
+
+    Entries are written once with typed columns and read back memory-mapped with
+    column projection. The directory is kept under `max_bytes` by evicting the
+    least recently used entries (tracked through file modification times).
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _key(self, uploaded_file) -> str:
+        return f"{content_hash(uploaded_file)}-v{CACHE_VERSION}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.parquet")
+
+    def load(self, uploaded_file, columns: list = None) -> pd.DataFrame:
+        """
+        Return the parsed noise data for an upload, parsing it only on a cache miss.
+
+        Args:
+            uploaded_file: Local path or Streamlit uploaded file (CSV or XLSX).
+            columns (list): Optional subset of columns to read; unknown names are skipped.
+        """
+        path = self._path(self._key(uploaded_file))
+        if os.path.exists(path):
+            with self._lock:
+                self.hits += 1
+            os.utime(path)
+            return self._read(path, columns)
+
+        with self._lock:
+            self.misses += 1
+        df = _typed(stringify_mixed_columns(load_noise_data(uploaded_file)))
+        try:
+            self._write(path, df)
+        except Exception:
+            # A frame Parquet cannot store (or a full disk) is served uncached, not refused.
+            if columns:
+                df = df[[c for c in columns if c in df.columns]]
+            return df
+        df = self._read(path, columns)
+        self._evict()
+        return df
+
+    def _read(self, path: str, columns: list = None) -> pd.DataFrame:
+        # Imported here so the dashboard does not pay for pyarrow.parquet until a file is cached.
+        import pyarrow.parquet as pq
+
+        if columns:
+            available = set(pq.read_schema(path).names)
+            columns = [c for c in columns if c in available]
+        table = pq.read_table(path, columns=columns, memory_map=True)
+        return table.to_pandas()
+
+    def _write(self, path: str, df: pd.DataFrame) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # Write to a temporary file first so concurrent readers never see a partial entry.
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _entries(self) -> list:
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".parquet"):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        return sorted(entries)
+
+    def _evict(self) -> None:
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.cache_dir, name))
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        """Return hit/miss/eviction counters and the current cache size in bytes."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries()),
+            "bytes": sum(size for _, size, _ in self._entries()),
+        }
+
+    def clear(self) -> None:
+        """Remove every cached entry."""
+        for _, _, name in self._entries():
+            os.remove(os.path.join(self.cache_dir, name))
+
+
+def _typed(df: pd.DataFrame) -> pd.DataFrame:
+    """Apply NOISE_DTYPES to the columns present so Parquet stores compact types."""
+    dtypes = {col: dtype for col, dtype in NOISE_DTYPES.items() if col in df.columns}
+    return df.astype(dtypes) if dtypes else df
+
+
+_default_cache = None
+
+
+@traced()
+def load_noise_data_cached(uploaded_file, columns: list = None) -> pd.DataFrame:
+    """Load noise data through a process-wide NoiseCache (see `SILENT_SKIES_CACHE_DIR`)."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = NoiseCache(os.environ.get("SILENT_SKIES_CACHE_DIR", DEFAULT_CACHE_DIR))
+    try:
+        return _default_cache.load(uploaded_file, columns=columns)
+    except Exception as e:
+        raise RuntimeError(f"Failed to load file: {e}")
@@ -0,0 +1,156 @@
+# noise_events.py — Noise event detection (threshold/Lmax/SEL) and flight attribution
+
+import numpy as np
+import pandas as pd
+
+from matching import match_flights, to_utc_ns
+from noise_levels import db_to_energy
+
+EVENT_COLUMNS = [
+    "event_start",
+    "event_end",
+    "lmax_time",
+    "lmax_db",
+    "sel_db",
+    "leq_db",
+    "duration_s",
+    "n_samples",
+]
+
+
+def detect_events(
+    df_noise: pd.DataFrame,
+    threshold_db: float = 65.0,
+    hysteresis_db: float = 3.0,
+    min_duration="5s",
+    max_gap="10s",
+    time_col: str = "timestamp",
+    value_col: str = "noise_db",
+    station_col: str = "station",
+    key_cols: tuple = ("icao",),
+) -> pd.DataFrame:
+    """
+    Segment a noise time series into events, per station, using threshold plus hysteresis.
+
+    An event starts when the level reaches `threshold_db` and ends once it falls below
+    `threshold_db - hysteresis_db`, at a station change, or at a sampling gap longer than
+    `max_gap`. Each sample contributes energy for the time until the next sample (capped
+    at `max_gap`), so SEL and Leq are energetic integrals, not arithmetic dB means.
+
+    Args:
+        df_noise (pd.DataFrame): Samples with `time_col` and `value_col`; `station_col`
+            (falls back to the first present key column, or one series) separates microphones.
+        min_duration: Events shorter than this are dropped.
+        key_cols (tuple): Columns carried onto each event (e.g. 'icao' for attribution).
+
+    Returns:
+        pd.DataFrame: One row per event with EVENT_COLUMNS plus station/key columns.
+    """
+    for col in (time_col, value_col):
+        if col not in df_noise.columns:
+            raise ValueError(f"Missing column '{col}' in noise data.")
+    if station_col not in df_noise.columns:
+        station_col = next((c for c in key_cols if c in df_noise.columns), None)
+    carried = [c for c in dict.fromkeys([station_col, *key_cols]) if c is not None and c in df_noise.columns]
+
+    times = to_utc_ns(df_noise[time_col])
+    levels = df_noise[value_col].to_numpy(dtype="float64")
+    valid = (times != np.iinfo(np.int64).min) & ~np.isnan(levels)
+    if station_col is not None:
+        station_codes = pd.factorize(df_noise[station_col])[0]
+    else:
+        station_codes = np.zeros(len(df_noise), dtype=np.int64)
+
+    # One sort puts every station's samples in time order; all later steps are vector ops.
+    order = np.lexsort((times, station_codes))
+    order = order[valid[order]]
+    times, levels, stations = times[order], levels[order], station_codes[order]
+    n = len(order)
+    empty = pd.DataFrame(columns=EVENT_COLUMNS + carried)
+    if n == 0:
+        return empty
+
+    gap_ns = pd.Timedelta(max_gap).value
+    step = np.diff(times)
+    boundary = np.ones(n, dtype=bool)
+    boundary[1:] = (stations[1:] != stations[:-1]) | (step > gap_ns)
+
+    # Seconds each sample represents: time to the next sample, capped at max_gap.
+    typical = np.median(step[step > 0]) if np.any(step > 0) else 1e9
+    dt = np.full(n, typical, dtype="float64")
+    dt[:-1] = np.where(boundary[1:], typical, np.minimum(step, gap_ns))
+    dt /= 1e9
+
+    # Hysteresis: above the threshold switches on, below threshold - hysteresis switches off,
+    # anything in between keeps the previous state. Segment boundaries force "off".
+    mark = np.where(levels >= threshold_db, 1, np.where(levels < threshold_db - hysteresis_db, 0, -1))
+    mark = np.where(boundary & (mark == -1), 0, mark)
+    last_set = np.maximum.accumulate(np.where(mark >= 0, np.arange(n), 0))
+    in_event = mark[last_set] == 1
+
+    starts_mask = in_event & (boundary | ~np.concatenate(([False], in_event[:-1])))
+    if not starts_mask.any():
+        return empty
+    starts = np.flatnonzero(starts_mask)
+    ends_mask = in_event & np.concatenate((boundary[1:] | ~in_event[1:], [True]))
+    ends = np.flatnonzero(ends_mask)
+
+    # reduceat runs up to the next start, which may include trailing non-event samples; mask them.
+    event_energy = np.where(in_event, db_to_energy(levels) * dt, 0.0)
+    event_dt = np.where(in_event, dt, 0.0)
+    event_levels = np.where(in_event, levels, -np.inf)
+    sums = np.add.reduceat(event_energy, starts)
+    durations = np.add.reduceat(event_dt, starts)
+    lmax = np.maximum.reduceat(event_levels, starts)
+    counts = ends - starts + 1
+
+    # First position of the maximum inside each event, for the Lmax time.
+    event_id = np.maximum(np.cumsum(starts_mask) - 1, 0)
+    is_peak = in_event & (event_levels == lmax[event_id])
+    peak_pos = np.minimum.reduceat(np.where(is_peak, np.arange(n), n), starts)
+
+    events = pd.DataFrame({
+        "event_start": pd.to_datetime(times[starts]),
+        "event_end": pd.to_datetime(times[ends]),
+        "lmax_time": pd.to_datetime(times[peak_pos]),
+        "lmax_db": lmax.astype("float32"),
+        "sel_db": (10 * np.log10(sums)).astype("float32"),
+        "leq_db": (10 * np.log10(sums / durations)).astype("float32"),
+        "duration_s": durations.astype("float32"),
+        "n_samples": counts.astype("int32"),
+    })
+    source_rows = order[starts]
+    for col in carried:
+        events[col] = df_noise[col].iloc[source_rows].reset_index(drop=True)
+    if isinstance(df_noise[time_col].dtype, pd.DatetimeTZDtype):
+        for col in ("event_start", "event_end", "lmax_time"):
+            events[col] = events[col].dt.tz_localize("UTC")
+
+    events = events[events["duration_s"] >= pd.Timedelta(min_duration).total_seconds()]
+    return events.reset_index(drop=True)
+
+
+def attribute_events(
+    events: pd.DataFrame,
+    df_flights: pd.DataFrame,
+    time_col_flight: str = "arrival_scheduled_utc",
+    by: str = "icao",
+    tolerance="3min",
+    direction: str = "nearest",
+) -> pd.DataFrame:
+    """
+    Attach the arrival closest to each event's Lmax time (same airport when `by` is set).
+
+    Events without a flight inside `tolerance` keep NaN/NaT flight columns.
+    """
+    if by is not None and (by not in events.columns or by not in df_flights.columns):
+        by = None
+    return match_flights(
+        events,
+        df_flights,
+        time_col_noise="lmax_time",
+        time_col_flight=time_col_flight,
+        by=by,
+        direction=direction,
+        tolerance=tolerance,
+    )
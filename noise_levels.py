@@ -0,0 +1,180 @@
+# noise_levels.py — Energy-domain Leq / Lden / Lnight aggregation
+
+import numpy as np
+import pandas as pd
+
+# EU Environmental Noise Directive periods (local clock hours) and their penalties.
+DAY_HOURS = range(7, 19)
+EVENING_HOURS = range(19, 23)
+EVENING_PENALTY_DB = 5.0
+NIGHT_PENALTY_DB = 10.0
+
+_STATE_COLUMNS = ["energy_sum", "count", "lmax_db"]
+
+
+def db_to_energy(levels_db) -> np.ndarray:
+    """Convert dB levels to relative acoustic energy, 10^(L/10)."""
+    return np.power(10.0, np.asarray(levels_db, dtype="float64") / 10.0)
+
+
+def energy_to_db(energy) -> np.ndarray:
+    """Convert relative acoustic energy back to dB; zero or missing energy gives NaN."""
+    energy = np.asarray(energy, dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(energy > 0, 10.0 * np.log10(energy), np.nan)
+
+
+def lden(day_energy, evening_energy, night_energy) -> np.ndarray:
+    """Combine mean day/evening/night energies into Lden (12/4/8 hour weighting with penalties)."""
+    weighted = (
+        12 * np.asarray(day_energy, dtype="float64")
+        + 4 * np.asarray(evening_energy, dtype="float64") * 10 ** (EVENING_PENALTY_DB / 10)
+        + 8 * np.asarray(night_energy, dtype="float64") * 10 ** (NIGHT_PENALTY_DB / 10)
+    ) / 24
+    return energy_to_db(weighted)
+
+
+class LevelAccumulator:
+    """
+    Running per-(keys, hour) energy sums, sample counts and maxima for noise samples.
+
+    `update` folds in new samples in one grouped pass over the new rows only; every
+    level metric is then derived from the hourly accumulators, so appending a day of
+    data never rescans history. Grouped chunks are held back and combined with the
+    accumulators only once they outgrow them (or on read), so a long run of small
+    updates costs time proportional to the new rows rather than to the history. Samples
+    are assumed evenly spaced, so Leq is the dB value of the mean sample energy. Periods
+    use the clock hour of the timestamps as given (local time if the data is local);
+    night hours are grouped with their calendar date.
+
+    Args:
+        keys (list): Grouping columns, e.g. ['icao'] or ['icao', 'station'].
+        time_col (str): Timestamp column.
+        value_col (str): Level column in dB.
+    """
+
+    def __init__(self, keys=("icao",), time_col: str = "timestamp", value_col: str = "noise_db"):
+        self.keys = list(keys)
+        self.time_col = time_col
+        self.value_col = value_col
+        self._state = None
+        self._pending = []
+        self._pending_rows = 0
+
+    def update(self, df_noise: pd.DataFrame) -> "LevelAccumulator":
+        """Fold a chunk of noise samples into the accumulators and return self."""
+        missing = [c for c in [self.time_col, self.value_col, *self.keys] if c not in df_noise.columns]
+        if missing:
+            raise ValueError(f"Missing columns {missing} in noise data.")
+        levels = df_noise[self.value_col].to_numpy(dtype="float64")
+        valid = ~np.isnan(levels) & df_noise[self.time_col].notna().to_numpy()
+        if not valid.any():
+            return self
+
+        frame = pd.DataFrame({
+            "energy_sum": db_to_energy(levels[valid]),
+            "count": np.ones(valid.sum(), dtype="int64"),
+            "lmax_db": levels[valid],
+        })
+        groups = [df_noise[k].to_numpy()[valid] for k in self.keys]
+        groups.append(df_noise[self.time_col][valid].dt.floor("H").reset_index(drop=True))
+        names = self.keys + ["hour"]
+        partial = frame.groupby(groups, sort=False).agg({"energy_sum": "sum", "count": "sum", "lmax_db": "max"})
+        partial.index.names = names
+        return self._merge_state(partial)
+
+    def merge(self, other: "LevelAccumulator") -> "LevelAccumulator":
+        """Fold another accumulator (e.g. from another chunk or worker) into this one."""
+        other._compact()
+        if other._state is not None:
+            self._merge_state(other._state)
+        return self
+
+    def _merge_state(self, partial: pd.DataFrame) -> "LevelAccumulator":
+        self._pending.append(partial)
+        self._pending_rows += len(partial)
+        # Combining costs O(state + pending); waiting until pending is as large keeps it O(pending).
+        if self._state is None or self._pending_rows >= len(self._state):
+            self._compact()
+        return self
+
+    def _compact(self) -> None:
+        """Fold pending grouped chunks into the accumulators."""
+        if not self._pending:
+            return
+        parts = self._pending if self._state is None else [self._state, *self._pending]
+        self._pending, self._pending_rows = [], 0
+        if len(parts) == 1:
+            self._state = parts[0]
+            return
+        combined = pd.concat(parts)
+        self._state = combined.groupby(level=list(range(combined.index.nlevels)), sort=False).agg(
+            {"energy_sum": "sum", "count": "sum", "lmax_db": "max"}
+        )
+
+    def state(self) -> pd.DataFrame:
+        """Return the raw accumulators (keys, hour, energy_sum, count, lmax_db) for persistence."""
+        self._compact()
+        if self._state is None:
+            return pd.DataFrame(columns=self.keys + ["hour"] + _STATE_COLUMNS)
+        return self._state.reset_index().sort_values(self.keys + ["hour"], ignore_index=True)
+
+    @classmethod
+    def from_state(cls, state: pd.DataFrame, keys=("icao",), **kwargs) -> "LevelAccumulator":
+        """Rebuild an accumulator from a frame previously returned by `state()`."""
+        acc = cls(keys=keys, **kwargs)
+        if not state.empty:
+            acc._state = state.set_index(acc.keys + ["hour"])[_STATE_COLUMNS]
+        return acc
+
+    def hourly(self) -> pd.DataFrame:
+        """Return hourly Leq and Lmax per key."""
+        state = self.state()
+        return pd.DataFrame({
+            **{k: state[k] for k in self.keys},
+            "hour": state["hour"],
+            "leq_db": energy_to_db(state["energy_sum"] / state["count"]).astype("float32"),
+            "lmax_db": state["lmax_db"].astype("float32"),
+            "n_samples": state["count"].astype("int64"),
+        })
+
+    def _levels(self, by: list) -> pd.DataFrame:
+        """Derive Leq, period levels, Lden and Lmax per `by` from the hourly accumulators."""
+        self._compact()
+        if self._state is None:
+            return pd.DataFrame(columns=by + ["leq_db", "lday_db", "levening_db", "lnight_db", "lden_db", "lmax_db"])
+        state = self.state()
+        hour_of_day = state["hour"].dt.hour
+        state["date"] = state["hour"].dt.normalize()
+        state["period"] = np.where(
+            hour_of_day.isin(DAY_HOURS), "day", np.where(hour_of_day.isin(EVENING_HOURS), "evening", "night")
+        )
+
+        grouped = state.groupby(by)
+        totals = grouped[["energy_sum", "count"]].sum()
+        per_period = state.groupby(by + ["period"])[["energy_sum", "count"]].sum()
+        mean_energy = (per_period["energy_sum"] / per_period["count"]).unstack("period")
+        mean_energy = mean_energy.reindex(index=totals.index, columns=["day", "evening", "night"])
+
+        result = pd.DataFrame({
+            "leq_db": energy_to_db(totals["energy_sum"] / totals["count"]),
+            "lday_db": energy_to_db(mean_energy["day"]),
+            "levening_db": energy_to_db(mean_energy["evening"]),
+            "lnight_db": energy_to_db(mean_energy["night"]),
+            "lden_db": lden(mean_energy["day"], mean_energy["evening"], mean_energy["night"]),
+            "lmax_db": grouped["lmax_db"].max(),
+        }, index=totals.index).astype("float32")
+        return result.reset_index()
+
+    def daily(self) -> pd.DataFrame:
+        """Return per-key, per-date Leq, Lday, Levening, Lnight, Lden and Lmax."""
+        return self._levels(self.keys + ["date"])
+
+    def summary(self) -> pd.DataFrame:
+        """Return the same metrics over the whole accumulated period, one row per key."""
+        return self._levels(self.keys)
+
+
+def hourly_leq(df_noise: pd.DataFrame, keys=("icao",), time_col: str = "timestamp", value_col: str = "noise_db") -> pd.DataFrame:
+    """One-shot hourly Leq per key (see LevelAccumulator)."""
+    return LevelAccumulator(keys, time_col, value_col).update(df_noise).hourly()
@@ -0,0 +1,21 @@
+# pools.py — Process pools shared by rendering, ingestion, exposure and batch reports
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+def spawn_pool(max_workers: int = None, **kwargs) -> ProcessPoolExecutor:
+    """
+    Return a process pool whose workers are started with the 'spawn' method.
+
+    Forking a process that runs Streamlit's threads is not safe, so every pool in the
+    app is spawned. Each spawned worker starts a fresh interpreter and re-imports
+    pandas/NumPy, which takes on the order of a second; callers therefore only use a
+    pool once there is enough work to pay for that (their PARALLEL_MIN_* thresholds)
+    and stay in-process below it.
+
+    Args:
+        max_workers (int): Pool size; the CPU count when None.
+        **kwargs: Passed to ProcessPoolExecutor, e.g. `initializer`.
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"), **kwargs)
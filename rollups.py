@@ -0,0 +1,202 @@
+# rollups.py — Multi-resolution noise/arrivals rollup cube for dashboard queries
+
+import numpy as np
+import pandas as pd
+
+from level_sketch import LevelSketch
+from matching import to_utc_ns
+from noise_levels import db_to_energy, energy_to_db
+
+RESOLUTIONS = ("1min", "1H", "1D")
+_NAT = np.iinfo(np.int64).min
+
+
+def _bucket(times_ns: np.ndarray, resolution) -> np.ndarray:
+    """Floor int64 UTC nanoseconds to a resolution (epoch-aligned, so days start at 00:00 UTC)."""
+    step = pd.Timedelta(resolution).value
+    return times_ns - times_ns % step
+
+
+def _aggregate(frame: pd.DataFrame, by: list, sums: list, maxes: list) -> pd.DataFrame:
+    spec = {**{c: "sum" for c in sums}, **{c: "max" for c in maxes}}
+    return frame.groupby(by, observed=True, sort=False).agg(spec).reset_index()
+
+
+class NoiseRollup:
+    """
+    Noise and arrival aggregates pre-computed at several time resolutions.
+
+    Each level holds, per (bucket, key columns): sample count, energy sum and Lmax for
+    noise, plus arrival counts per (bucket, icao). The finest level is built from the raw
+    frames in one pass and every coarser level from the level below it. Queries slice
+    the bucket-sorted level with `searchsorted` and only regroup pre-aggregated rows, so
+    their cost does not depend on raw data size. Buckets are in UTC (naive timestamps
+    are taken as UTC). An optional hourly LevelSketch adds L10/L50/L90 to queries at
+    hourly or coarser resolutions.
+    """
+
+    def __init__(self, levels: dict, arrivals: dict, keys: list, sketch: LevelSketch = None):
+        self.levels = levels
+        self.arrivals = arrivals
+        self.keys = keys
+        self.sketch = sketch
+
+    @classmethod
+    def build(
+        cls,
+        df_noise: pd.DataFrame,
+        df_arrivals: pd.DataFrame = None,
+        keys=("icao", "station"),
+        resolutions=RESOLUTIONS,
+        time_col: str = "timestamp",
+        value_col: str = "noise_db",
+        arrival_time_col: str = "arrival_scheduled_utc",
+        exceedance: bool = True,
+    ) -> "NoiseRollup":
+        """
+        Build every resolution level from raw noise (and optional arrivals) frames.
+
+        Args:
+            df_noise (pd.DataFrame): Noise samples; key columns missing from it are skipped.
+            df_arrivals (pd.DataFrame): Arrivals with `arrival_time_col` and 'icao'.
+            resolutions: Increasing bucket sizes, finest first.
+            exceedance (bool): Also build an hourly LevelSketch for L10/L50/L90.
+        """
+        keys = [k for k in keys if k in df_noise.columns]
+        resolutions = sorted(resolutions, key=lambda r: pd.Timedelta(r))
+
+        times = to_utc_ns(df_noise[time_col])
+        levels_db = df_noise[value_col].to_numpy(dtype="float64")
+        valid = (times != _NAT) & ~np.isnan(levels_db)
+        raw = pd.DataFrame({
+            "bucket": _bucket(times[valid], resolutions[0]),
+            **{k: df_noise[k].to_numpy()[valid] for k in keys},
+            "count": np.ones(valid.sum(), dtype="int64"),
+            "energy_sum": db_to_energy(levels_db[valid]),
+            "lmax_db": levels_db[valid],
+        })
+
+        arrivals_raw = None
+        if df_arrivals is not None and not df_arrivals.empty and "icao" in df_arrivals.columns:
+            arrival_times = to_utc_ns(df_arrivals[arrival_time_col])
+            has_time = arrival_times != _NAT
+            arrivals_raw = pd.DataFrame({
+                "bucket": _bucket(arrival_times[has_time], resolutions[0]),
+                "icao": df_arrivals["icao"].to_numpy()[has_time],
+                "arrivals_count": np.ones(has_time.sum(), dtype="int64"),
+            })
+
+        levels, arrivals = {}, {}
+        previous, previous_arrivals = raw, arrivals_raw
+        for resolution in resolutions:
+            previous = previous.assign(bucket=_bucket(previous["bucket"].to_numpy(), resolution))
+            level = _aggregate(previous, ["bucket", *keys], ["count", "energy_sum"], ["lmax_db"])
+            levels[resolution] = previous = _finalize(level, keys)
+            if previous_arrivals is not None:
+                previous_arrivals = previous_arrivals.assign(
+                    bucket=_bucket(previous_arrivals["bucket"].to_numpy(), resolution)
+                )
+                level_arrivals = _aggregate(previous_arrivals, ["bucket", "icao"], ["arrivals_count"], [])
+                arrivals[resolution] = previous_arrivals = _finalize(level_arrivals, ["icao"])
+        sketch = None
+        if exceedance and pd.Timedelta(resolutions[-1]) >= pd.Timedelta("1H"):
+            sketch = LevelSketch(keys, resolution="1H", time_col=time_col, value_col=value_col).update(df_noise)
+        return cls(levels, arrivals, keys, sketch)
+
+    @property
+    def resolutions(self) -> list:
+        return list(self.levels)
+
+    def span(self) -> tuple:
+        """Return the (first, last) bucket covered by the noise data."""
+        finest = self.levels[self.resolutions[0]]
+        if finest.empty:
+            return None, None
+        return pd.Timestamp(finest["bucket"].iloc[0]), pd.Timestamp(finest["bucket"].iloc[-1])
+
+    def resolution_for(self, start=None, end=None, max_points: int = 500) -> str:
+        """Return the finest resolution giving at most `max_points` buckets over [start, end)."""
+        first, last = self.span()
+        start = pd.Timestamp(start) if start is not None else first
+        end = pd.Timestamp(end) if end is not None else last
+        if start is None or end is None:
+            return self.resolutions[-1]
+        for resolution in self.resolutions:
+            if (end - start) / pd.Timedelta(resolution) <= max_points:
+                return resolution
+        return self.resolutions[-1]
+
+    def query(
+        self,
+        icao_list: list = None,
+        start=None,
+        end=None,
+        by=("icao",),
+        max_points: int = 500,
+        resolution: str = None,
+    ) -> pd.DataFrame:
+        """
+        Return per-bucket Leq, Lmax, sample and arrival counts for a time range and airports.
+
+        At hourly or coarser resolutions, L10/L50/L90 ('l10_db', ...) are added when the
+        rollup holds a LevelSketch.
+
+        Args:
+            icao_list (list): Airports to keep; all when None.
+            start, end: Visible range (UTC); the whole data span when None.
+            by (tuple): Key columns to keep; others (e.g. 'station') are rolled up.
+            max_points (int): Bucket budget used to pick the resolution.
+            resolution (str): Force a resolution instead of choosing one.
+        """
+        resolution = resolution or self.resolution_for(start, end, max_points)
+        by = [k for k in by if k in self.keys]
+        level = _slice(self.levels[resolution], start, end, icao_list)
+        result = _aggregate(level, ["bucket", *by], ["count", "energy_sum"], ["lmax_db"])
+        result["leq_db"] = energy_to_db(result["energy_sum"] / result["count"]).astype("float32")
+
+        if "icao" in by:
+            arrivals = self.arrivals.get(resolution)
+            if arrivals is not None:
+                arrivals = _slice(arrivals, start, end, icao_list)
+                result = result.merge(arrivals, on=["bucket", "icao"], how="outer")
+            else:
+                result["arrivals_count"] = 0
+            # Buckets with arrivals but no noise samples keep a NaN Leq, not 0 dB.
+            result["count"] = result["count"].fillna(0).astype("int64")
+            result["arrivals_count"] = result["arrivals_count"].fillna(0).astype("int64")
+
+        result = result.sort_values([*by, "bucket"], ignore_index=True)
+        result["bucket"] = pd.to_datetime(result["bucket"])
+        if self.sketch is not None and pd.Timedelta(resolution) >= pd.Timedelta(self.sketch.resolution):
+            exceedance = self.sketch.quantiles(by=by, start=start, end=end, icao_list=icao_list, resolution=resolution)
+            exceedance = exceedance.astype({k: result[k].dtype for k in by}).drop(columns=["n_samples"])
+            result = result.merge(exceedance, on=["bucket", *by], how="left")
+        result.attrs["resolution"] = resolution
+        return result.drop(columns=["energy_sum"]).rename(columns={"count": "n_samples"})
+
+    def arrivals_by_hour_of_day(self, icao_list: list = None) -> pd.DataFrame:
+        """Return arrival counts per UTC hour of day (0-23), summed over days and airports."""
+        hourly = [r for r in self.resolutions if pd.Timedelta(r) <= pd.Timedelta("1H")]
+        counts = np.zeros(24, dtype="int64")
+        if hourly and hourly[-1] in self.arrivals:
+            arrivals = _slice(self.arrivals[hourly[-1]], None, None, icao_list)
+            hour_of_day = (arrivals["bucket"].to_numpy() // pd.Timedelta("1H").value) % 24
+            np.add.at(counts, hour_of_day, arrivals["arrivals_count"].to_numpy())
+        return pd.DataFrame({"hour": np.arange(24), "arrivals_count": counts})
+
+
+def _finalize(level: pd.DataFrame, keys: list) -> pd.DataFrame:
+    """Sort a level by bucket and store keys as categoricals."""
+    level = level.sort_values("bucket", kind="stable", ignore_index=True)
+    return level.astype({k: "category" for k in keys})
+
+
+def _slice(level: pd.DataFrame, start, end, icao_list) -> pd.DataFrame:
+    """Select rows of a bucket-sorted level in [start, end) and, optionally, for some airports."""
+    buckets = level["bucket"].to_numpy()
+    lo = 0 if start is None else np.searchsorted(buckets, to_utc_ns([pd.Timestamp(start)])[0], side="left")
+    hi = len(buckets) if end is None else np.searchsorted(buckets, to_utc_ns([pd.Timestamp(end)])[0], side="left")
+    level = level.iloc[lo:hi]
+    if icao_list is not None and "icao" in level.columns:
+        level = level[level["icao"].isin(icao_list)]
+    return level
@@ -0,0 +1,317 @@
+# scenarios.py — Clean Sky 2 fleet retrofit what-if engine
+
+import csv
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from chart_cache import fingerprint
+from noise_levels import DAY_HOURS, EVENING_HOURS, EVENING_PENALTY_DB, NIGHT_PENALTY_DB, energy_to_db
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+CS2_PROJECTS_PATH = os.path.join(_HERE, "cs2_projects_summary.csv")
+CS2_IMPACTS_PATH = os.path.join(_HERE, "cs2_environmental_impacts.csv")
+
+AIRCRAFT_CLASSES = ("jet", "turboprop", "other")
+
+# Aircraft classes each Clean Sky 2 technology area can be retrofitted to.
+TECH_AREA_CLASSES = {
+    "Aeroacoustics": ("jet",),  # nacelle liners and inlets
+    "Engine core noise": ("jet",),
+    "Noise shielding": ("jet", "turboprop"),
+    "Propulsion noise": ("jet", "turboprop"),  # fans and rotors
+}
+DEFAULT_TECH_CLASSES = ("jet", "turboprop")
+
+_TURBOPROP = re.compile(
+    r"\bATR\b|Dash ?8|DHC-8|Q[234]00|Saab (340|2000)|Fokker 50|Dornier 328(?!JET)|Jetstream|"
+    r"Twin Otter|DHC-6|Cessna 208|Caravan|King Air|Beech|Pilatus PC|L-410|EMB[- ]?120|Xian MA60",
+    re.IGNORECASE,
+)
+_OTHER = re.compile(r"helicopter|copter|\bBell\b|Sikorsky|AgustaWestland|\bAW1\d\d|\bEC1\d\d|\bH1[2-7]\d", re.IGNORECASE)
+_JET = re.compile(
+    r"Airbus|\bA3\d\d|Boeing|\b7[0-8]7\b|Embraer|\bE1[79]\d|\bERJ|Bombardier|\bCRJ|Canadair|McDonnell|"
+    r"\bMD-?\d|Fokker|Comac|Sukhoi|Superjet|Gulfstream|Citation|Dassault|Falcon|Learjet|Challenger|"
+    r"Global \d|Tupolev|Antonov|Ilyushin|Mitsubishi|BAe 146|Avro RJ|Irkut",
+    re.IGNORECASE,
+)
+_RANGE = re.compile(r"(\d+(?:\.\d+)?)\s*(?:[–—-]\s*(\d+(?:\.\d+)?))?\s*(%?)")
+
+DEFAULT_MAX_CACHED = 16
+# Technologies treat overlapping noise sources, so their combined effect is capped.
+DEFAULT_MAX_REDUCTION_DB = 10.0
+
+
+def parse_range(text):
+    """Parse '3–5', '6', '20–30%' into (low, high, is_percent); unparseable values give NaNs."""
+    match = _RANGE.fullmatch(str(text).strip())
+    if match is None:
+        return np.nan, np.nan, False
+    low = float(match.group(1))
+    high = float(match.group(2)) if match.group(2) else low
+    return low, high, bool(match.group(3))
+
+
+def _read_csv_rows(path: str) -> pd.DataFrame:
+    """Read a CSV whose rows may have been wrapped whole in quotes by a spreadsheet export."""
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    header, records = rows[0], []
+    for row in rows[1:]:
+        if len(row) == 1 and len(header) > 1 and "," in row[0]:
+            row = next(csv.reader([row[0]]))
+        if row:
+            records.append((row + [None] * len(header))[:len(header)])
+    return pd.DataFrame(records, columns=header)
+
+
+def load_technologies(projects_path: str = CS2_PROJECTS_PATH, impacts_path: str = CS2_IMPACTS_PATH) -> pd.DataFrame:
+    """
+    Return the retrofit technologies with a quantified noise reduction.
+
+    Projects contribute their 'Estimated Noise Reduction (dB)' range; vehicle-level
+    noise rows of the environmental impacts file contribute their '% Reduction' of
+    acoustic energy, converted to dB.
+
+    Returns:
+        pd.DataFrame: name, tech_area, source, low_db, high_db, classes (tuple).
+    """
+    try:
+        technologies = []
+        for row in _read_csv_rows(projects_path).itertuples(index=False):
+            low, high, _ = parse_range(row[3])
+            if not np.isnan(low):
+                technologies.append({
+                    "name": row[0],
+                    "tech_area": row[2],
+                    "source": row[6],
+                    "low_db": low,
+                    "high_db": high,
+                    "classes": TECH_AREA_CLASSES.get(row[2], DEFAULT_TECH_CLASSES),
+                })
+
+        impacts = _read_csv_rows(impacts_path)
+        for row in impacts[impacts["Metric"].str.contains("Noise Emissions", na=False)].itertuples(index=False):
+            low, high, is_percent = parse_range(row[5])
+            if is_percent and not np.isnan(low):
+                technologies.append({
+                    "name": f"{row[0]}: {row[2]} ({row[8]})",
+                    "tech_area": row[1],
+                    "source": row[7],
+                    "low_db": float(-10 * np.log10(1 - low / 100)),
+                    "high_db": float(-10 * np.log10(1 - high / 100)),
+                    "classes": DEFAULT_TECH_CLASSES,
+                })
+        return pd.DataFrame(technologies, columns=["name", "tech_area", "source", "low_db", "high_db", "classes"])
+    except Exception as e:
+        raise RuntimeError(f"Failed to load Clean Sky 2 technologies: {e}")
+
+
+def aircraft_class(model) -> str:
+    """Classify an aircraft model name as 'jet', 'turboprop' or 'other' (unknown, rotorcraft)."""
+    if not isinstance(model, str) or not model.strip():
+        return "other"
+    if _TURBOPROP.search(model):
+        return "turboprop"
+    if _OTHER.search(model):
+        return "other"
+    if _JET.search(model):
+        return "jet"
+    return "other"
+
+
+def class_codes(models: pd.Series) -> np.ndarray:
+    """Return AIRCRAFT_CLASSES positions per row, classifying each distinct model once."""
+    codes, uniques = pd.factorize(pd.Series(models, dtype=object), use_na_sentinel=True)
+    lookup = np.array([AIRCRAFT_CLASSES.index(aircraft_class(m)) for m in uniques], dtype=np.int8)
+    other = AIRCRAFT_CLASSES.index("other")
+    return np.where(codes >= 0, lookup[np.maximum(codes, 0)] if len(lookup) else other, other).astype(np.int8)
+
+
+class ScenarioSet:
+    """
+    Retrofit scenarios: per scenario and technology, the share of eligible flights
+    retrofitted (`adoption`, 0–1) and the reduction it brings (`reduction_db`).
+
+    Args:
+        names (list): One label per scenario.
+        technologies (list): Technology names (columns of both matrices).
+        adoption (np.ndarray): (scenarios × technologies) fleet shares.
+        reduction_db (np.ndarray): (scenarios × technologies) reductions in dB.
+    """
+
+    def __init__(self, names, technologies, adoption, reduction_db):
+        self.names = list(names)
+        self.technologies = list(technologies)
+        self.adoption = np.clip(np.asarray(adoption, dtype="float64"), 0.0, 1.0)
+        self.reduction_db = np.asarray(reduction_db, dtype="float64")
+        if self.adoption.shape != (len(self.names), len(self.technologies)) or self.reduction_db.shape != self.adoption.shape:
+            raise ValueError("Adoption and reduction matrices must be (scenarios × technologies).")
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def named(cls, technologies: pd.DataFrame) -> "ScenarioSet":
+        """Baseline, each technology alone on the whole eligible fleet (mid-range), and all at low/high."""
+        n = len(technologies)
+        low, high = technologies["low_db"].to_numpy(), technologies["high_db"].to_numpy()
+        mid = (low + high) / 2
+        names = ["Baseline", *[f"{name} (full fleet)" for name in technologies["name"]], "All technologies (low)", "All technologies (high)"]
+        adoption = np.vstack([np.zeros(n), np.eye(n), np.ones(n), np.ones(n)])
+        reduction = np.vstack([np.zeros(n), np.diag(mid), low, high])
+        return cls(names, technologies["name"], adoption, reduction)
+
+    @classmethod
+    def sample(cls, technologies: pd.DataFrame, n: int, seed: int = 0) -> "ScenarioSet":
+        """Draw `n` scenarios with uniform adoption shares and reductions within each technology's range."""
+        rng = np.random.default_rng(seed)
+        t = len(technologies)
+        low, high = technologies["low_db"].to_numpy(), technologies["high_db"].to_numpy()
+        adoption = rng.uniform(0, 1, (n, t))
+        reduction = low + (high - low) * rng.uniform(0, 1, (n, t))
+        return cls([f"Scenario {i + 1}" for i in range(n)], technologies["name"], adoption, reduction)
+
+    def class_delta_db(self, applicability: np.ndarray, max_reduction_db: float = DEFAULT_MAX_REDUCTION_DB) -> np.ndarray:
+        """
+        Return the (scenarios × classes) change in mean event energy, in dB.
+
+        A retrofit with reduction r on a share a of the eligible flights scales their
+        expected energy by (1 - a) + a·10^(-r/10); technologies are independent, so
+        factors multiply and their logarithms add over the (technologies × classes)
+        applicability matrix. The total is capped at `max_reduction_db`.
+        """
+        factor = 1 - self.adoption + self.adoption * np.power(10.0, -self.reduction_db / 10)
+        delta = 10 * np.log10(factor) @ applicability
+        return delta if max_reduction_db is None else np.maximum(delta, -max_reduction_db)
+
+
+class ScenarioEngine:
+    """
+    Recompute attributed event levels, Lden and event counts for many retrofit scenarios.
+
+    Events are classified once (distinct aircraft models → class lookup) and reduced
+    to per-(group, class) period-weighted energy sums and sorted Lmax arrays. A
+    scenario then only changes the energy of each class, so every metric is a
+    (scenarios × classes) array operation whatever the number of flights: Lden is a
+    matrix product with the class energies, and N-above counts come from
+    `searchsorted` on the sorted Lmax values. Individual event levels shift by their
+    class's expected change; `event_levels` broadcasts them for chosen scenarios.
+    Unattributed events (no aircraft model) stay unchanged. Results are cached per
+    scenario set.
+
+    Args:
+        events (pd.DataFrame): `attribute_events` output: 'lmax_time', 'lmax_db',
+            'sel_db' and `model_col`; periods use the clock hour of 'lmax_time' as given.
+        technologies (pd.DataFrame): `load_technologies()` output (loaded when None).
+        by (str): Group column (e.g. 'icao'); one group when absent.
+        days (float): Days covered, for Lden; the events' calendar span when None.
+        threshold_db (float): Lmax threshold of the N-above count.
+        max_reduction_db (float): Cap on the combined reduction of one aircraft class.
+    """
+
+    def __init__(
+        self,
+        events: pd.DataFrame,
+        technologies: pd.DataFrame = None,
+        by: str = "icao",
+        days: float = None,
+        model_col: str = "aircraft_model",
+        threshold_db: float = 65.0,
+        max_reduction_db: float = DEFAULT_MAX_REDUCTION_DB,
+        max_cached: int = DEFAULT_MAX_CACHED,
+    ):
+        missing = [c for c in ("lmax_time", "lmax_db", "sel_db") if c not in events.columns]
+        if missing:
+            raise ValueError(f"Missing columns {missing} in event data.")
+        self.technologies = load_technologies() if technologies is None else technologies
+        self.threshold_db = threshold_db
+        self.max_reduction_db = max_reduction_db
+        self.max_cached = max_cached
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.applicability = np.array(
+            [[cls in classes for cls in AIRCRAFT_CLASSES] for classes in self.technologies["classes"]], dtype="float64"
+        ).reshape(len(self.technologies), len(AIRCRAFT_CLASSES))
+        models = events[model_col] if model_col in events.columns else pd.Series([None] * len(events))
+        self.classes = class_codes(models)
+        self.lmax_db = events["lmax_db"].to_numpy(dtype="float64")
+
+        times = pd.to_datetime(events["lmax_time"])
+        if by in events.columns:
+            group_codes, groups = pd.factorize(events[by].astype(object), use_na_sentinel=False)
+        else:
+            group_codes, groups = np.zeros(len(events), dtype=np.int64), pd.Index([None])
+        self.by = by if by in events.columns else None
+        self.groups = list(groups)
+        if days is None:
+            days = max((times.max().normalize() - times.min().normalize()).days + 1, 1) if len(events) else 1
+        self.days = days
+
+        hour = times.dt.hour.to_numpy()
+        weight = np.where(
+            np.isin(hour, DAY_HOURS), 1.0,
+            np.where(np.isin(hour, EVENING_HOURS), 10 ** (EVENING_PENALTY_DB / 10), 10 ** (NIGHT_PENALTY_DB / 10)),
+        )
+        energy = weight * np.power(10.0, events["sel_db"].to_numpy(dtype="float64") / 10)
+        n_classes = len(AIRCRAFT_CLASSES)
+        cell = group_codes * n_classes + self.classes
+        # (groups × classes) period-weighted SEL energy
+        self.class_energy = np.bincount(cell, weights=energy, minlength=len(groups) * n_classes).reshape(len(groups), n_classes)
+        self._sorted_lmax = {
+            (g, c): np.sort(self.lmax_db[cell == g * n_classes + c]) for g in range(len(groups)) for c in range(n_classes)
+        }
+
+    def run(self, scenarios: ScenarioSet) -> pd.DataFrame:
+        """
+        Return one row per (scenario, group): Lden, its change vs. no retrofit and N-above.
+
+        Columns: scenario, <by>, lden_db, lden_change_db, n_above, n_above_change.
+        """
+        key = fingerprint(scenarios.names, scenarios.technologies, scenarios.adoption, scenarios.reduction_db)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        if scenarios.technologies != list(self.technologies["name"]):
+            raise ValueError("Scenario technologies do not match the engine's technology table.")
+        delta = scenarios.class_delta_db(self.applicability, self.max_reduction_db)  # scenarios × classes
+        seconds = 86400.0 * self.days
+        lden = energy_to_db(np.power(10.0, delta / 10) @ self.class_energy.T / seconds)  # scenarios × groups
+        baseline = energy_to_db(self.class_energy.sum(axis=1) / seconds)
+
+        n_above = self._n_above(delta)
+        base_above = self._n_above(np.zeros((1, len(AIRCRAFT_CLASSES))))
+
+        n_scenarios, n_groups = lden.shape
+        result = pd.DataFrame({
+            "scenario": np.repeat(scenarios.names, n_groups),
+            self.by or "group": np.tile(np.array(self.groups, dtype=object), n_scenarios),
+            "lden_db": lden.ravel().astype("float32"),
+            "lden_change_db": (lden - baseline).ravel().astype("float32"),
+            "n_above": n_above.ravel(),
+            "n_above_change": (n_above - base_above).ravel(),
+        })
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+        return result
+
+    def _n_above(self, delta: np.ndarray) -> np.ndarray:
+        """Count events at or above the threshold per (scenario, group) after a per-class shift."""
+        counts = np.zeros((len(delta), len(self.groups)), dtype="int64")
+        for (g, c), lmax in self._sorted_lmax.items():
+            counts[:, g] += len(lmax) - np.searchsorted(lmax, self.threshold_db - delta[:, c], side="left")
+        return counts
+
+    def event_levels(self, scenarios: ScenarioSet) -> np.ndarray:
+        """Return (scenarios × events) Lmax: each event's level shifted by its class's change."""
+        delta = scenarios.class_delta_db(self.applicability, self.max_reduction_db)
+        return (self.lmax_db[None, :] + delta[:, self.classes]).astype("float32")
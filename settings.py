@@ -0,0 +1,48 @@
+# settings.py — Configuration read on demand (environment, .env file, Streamlit secrets)
+
+import os
+import sys
+import threading
+
+_dotenv_lock = threading.Lock()
+_dotenv_loaded = False
+
+
+def _load_dotenv() -> None:
+    """Load a .env file into the environment once, when python-dotenv is installed."""
+    global _dotenv_loaded
+    with _dotenv_lock:
+        if _dotenv_loaded:
+            return
+        _dotenv_loaded = True
+        try:
+            from dotenv import load_dotenv
+        except ImportError:
+            return
+        load_dotenv()
+
+
+def get_setting(name: str, default=None):
+    """
+    Return a configuration value such as an API key, looked up when it is needed.
+
+    The environment (plus a .env file) is checked first, then Streamlit secrets when
+    running under Streamlit. Nothing is read at import time and a missing value
+    returns `default` rather than raising, so headless workers and tests can import
+    any module without secrets configured.
+
+    Args:
+        name (str): Setting name, e.g. 'AERODATABOX_API_KEY'.
+        default: Value returned when the setting is not configured anywhere.
+    """
+    _load_dotenv()
+    value = os.environ.get(name)
+    if value:
+        return value
+    if "streamlit" in sys.modules:  # only consulted inside the dashboard; never imports Streamlit
+        try:
+            import streamlit as st
+            return st.secrets.get(name, default)
+        except Exception:  # no secrets.toml
+            return default
+    return default
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+from airports import AirportIndex, get_airport_index, haversine_km
+
+def test_lookup_by_icao_and_iata():
+    index = get_airport_index()
+    berlin = index.lookup("EDDB")
+    assert berlin["iata"] == "BER"
+    assert berlin["lat"] == pytest.approx(52.36, abs=0.05)
+    assert index.lookup("lhr")["icao"] == "EGLL"
+    assert index.lookup("ZZZZ") is None
+
+def test_nearest_matches_brute_force():
+    index = get_airport_index()
+    rng = np.random.default_rng(3)
+    has_iata = np.array([code != b"" for code in index._columns["iata"]])
+    for lat, lon in zip(rng.uniform(-60, 70, 25), rng.uniform(-180, 180, 25)):
+        distances = haversine_km(lat, lon, index.lat, index.lon)
+        distances[~has_iata] = np.inf
+        expected = index._columns["icao"][np.argmin(distances)].decode()
+        assert index.nearest(lat, lon)["icao"] == expected
+
+def test_nearest_icao_for_stations():
+    index = get_airport_index()
+    assert index.nearest_icao([52.37, 48.99, np.nan], [13.52, 2.55, 0.0]) == ["EDDB", "LFPG", None]
+    assert index.nearest(0.0, -150.0, max_km=50) is None
+
+def test_airports_info_skips_unknown_codes():
+    info = get_airport_index().airports_info(["EDDB", "NOPE"])
+    assert list(info) == ["EDDB"]
+    assert info["EDDB"]["city"] == "Berlin"
+
+def test_load_failure_is_runtime_error(tmp_path):
+    with pytest.raises(RuntimeError):
+        AirportIndex.load(str(tmp_path / "missing.npz"))
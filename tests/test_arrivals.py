@@ -0,0 +1,72 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+from arrivals import ArrivalsClient, split_windows
+
+@pytest.fixture
+def mock_aerodatabox():
+    """Local AeroDataBox stand-in returning one arrival at the start of each requested window."""
+    state = {"paths": [], "fail_first": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            state["paths"].append(self.path)
+            if state["fail_first"] > 0:
+                state["fail_first"] -= 1
+                self.send_response(503)
+                self.end_headers()
+                return
+            _, _, _, _, icao, start, _ = self.path.split("?")[0].split("/")
+            body = json.dumps({"arrivals": [{
+                "number": f"XY {start[-5:]}",
+                "callSign": "XYZ1",
+                "movement": {
+                    "airport": {"name": "Origin City"},
+                    "scheduledTime": {"utc": start.replace("T", " ") + "Z"},
+                },
+                "aircraft": {"model": "Airbus A320"},
+            }]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    state["url"] = f"http://127.0.0.1:{server.server_port}"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+def test_split_windows_respects_max_window():
+    windows = split_windows("2025-07-17 00:00", "2025-07-18 06:00", max_window="12h")
+    assert len(windows) == 3
+    assert windows[-1] == (pd.Timestamp("2025-07-18 00:00"), pd.Timestamp("2025-07-18 06:00"))
+
+def test_fetch_many_airports_and_windows(mock_aerodatabox):
+    client = ArrivalsClient("key", base_url=mock_aerodatabox["url"], rate=1000, burst=100)
+
+    df = client.fetch(["EDDB", "EGLL"], "2025-07-17 00:00", "2025-07-18 00:00")
+
+    assert len(mock_aerodatabox["paths"]) == 4
+    assert len(df) == 4
+    assert str(df["arrival_scheduled_utc"].dt.tz) == "UTC"
+    assert df["icao"].dtype == "category"
+    assert df["aircraft_model"].dtype == "category"
+    assert set(df["icao"]) == {"EDDB", "EGLL"}
+
+def test_fetch_retries_server_errors(mock_aerodatabox):
+    mock_aerodatabox["fail_first"] = 1
+    client = ArrivalsClient("key", base_url=mock_aerodatabox["url"], rate=1000, burst=100, backoff=0)
+
+    df = client.fetch("EDDB", "2025-07-17 00:00", "2025-07-17 06:00")
+
+    assert len(df) == 1
+    assert client.retries == 1
@@ -0,0 +1,65 @@
+import json
+import os
+import sys
+import numpy as np
+import pandas as pd
+import batch_report
+from arrivals import normalize_arrivals
+from batch_report import main, run_report
+from data_fetch import merge_by_time
+
+def write_noise(path, hours=6):
+    timestamps = pd.date_range("2025-07-17", periods=hours * 3600, freq="1s")
+    rng = np.random.default_rng(4)
+    frames = []
+    for icao in ("EDDB", "EGLL"):
+        levels = rng.normal(50, 2, len(timestamps))
+        levels[1000:1030] = 80.0
+        frames.append(pd.DataFrame({"timestamp": timestamps, "noise_db": levels.round(1), "icao": icao}))
+    pd.concat(frames).to_csv(path, index=False)
+
+def test_run_report_writes_outputs_per_airport(tmp_path):
+    noise_path = tmp_path / "noise.csv"
+    write_noise(noise_path)
+    report = run_report([str(noise_path)], str(tmp_path / "out"), end="2025-07-17 03:00", max_workers=2)
+
+    assert [a["icao"] for a in report["airports"]] == ["EDDB", "EGLL"]
+    for airport in report["airports"]:
+        assert airport["rows"] == 3 * 3600
+        assert airport["events"] == 1
+        assert set(airport["timings"]) == {"enrich", "arrivals", "merge", "aggregate", "render", "write"}
+        for path in airport["outputs"].values():
+            assert os.path.getsize(path) > 0
+        hourly = pd.read_parquet(airport["outputs"]["hourly"])
+        assert len(hourly) == 3
+        assert hourly["l10_db"].notna().all() and (hourly["l10_db"] >= hourly["l90_db"]).all()
+        assert airport["peak_rss_scope"] == ("airport" if sys.version_info >= (3, 11) else "process")
+        assert airport["peak_rss_mb"] <= report["peak_rss_mb"]
+    saved = json.loads((tmp_path / "out" / "report.json").read_text())
+    assert saved["timings"]["load"] > 0
+
+def test_cli_reports_unknown_airport(tmp_path, capsys):
+    noise_path = tmp_path / "noise.csv"
+    write_noise(noise_path, hours=1)
+    code = main([str(noise_path), "--out", str(tmp_path / "out"), "--airports", "EDDB,LFPG", "--workers", "1"])
+    assert code == 1
+    output = capsys.readouterr().out
+    assert "EDDB" in output
+    assert "LFPG   error: No noise samples in range." in output
+
+def test_matched_rows_counts_noise_near_arrivals(tmp_path, monkeypatch):
+    noise_path = tmp_path / "noise.csv"
+    write_noise(noise_path, hours=1)
+    arrivals = normalize_arrivals([
+        {"icao": icao, "flight_number": number, "arrival_scheduled_utc": "2025-07-17 00:30Z",
+         "arrival_scheduled_local": "2025-07-17 02:30+02:00"}
+        for icao, number in (("EDDB", "XY 1"), ("EGLL", None))
+    ])
+    monkeypatch.setattr(batch_report, "get_arrivals", lambda icao, key, start, end: arrivals[arrivals["icao"] == icao])
+    report = run_report([str(noise_path)], str(tmp_path / "out"), aero_key="key", max_workers=1)
+
+    noise = pd.read_csv(noise_path, parse_dates=["timestamp"])
+    expected = merge_by_time(noise[noise["icao"] == "EDDB"], arrivals, by="icao")["flight_number"].notna().sum()
+    assert expected == 601  # ±5 min around 00:30 at 1 s resolution
+    counts = {a["icao"]: a["matched_rows"] for a in report["airports"]}
+    assert counts == {"EDDB": expected, "EGLL": 0}
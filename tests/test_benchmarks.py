@@ -0,0 +1,47 @@
+import json
+import pandas as pd
+import pytest
+from benchmarks import (
+    check_imports, compare, format_timestamps, main, make_flights, make_noise, measure_imports, parse_size, run_benchmarks,
+)
+
+def test_parse_size():
+    assert parse_size("10k") == 10_000
+    assert parse_size("1m") == 1_000_000
+    assert parse_size("2.5M") == 2_500_000
+    assert parse_size(1234) == 1234
+
+def test_generators_shape():
+    noise = make_noise(10_001, stations=3, airports=2)
+    assert len(noise) == 10_001
+    assert noise["station"].nunique() == 6 and noise["icao"].nunique() == 2
+    assert noise["noise_db"].max() > 65
+    flights = make_flights(noise, per_hour=10)
+    assert set(flights["icao"].cat.categories) == {"A000", "A001"}
+    assert str(flights["arrival_scheduled_utc"].dt.tz) == "UTC"
+
+def test_mixed_timezone_text():
+    text = format_timestamps(pd.Series(pd.to_datetime(["2025-07-17 10:00", "2025-07-17 10:00"])), "mixed")
+    assert text.tolist() == ["2025-07-17T10:00:00Z", "2025-07-17T12:00:00+02:00"]
+    with pytest.raises(ValueError):
+        format_timestamps(text, "local")
+
+def test_run_and_compare(tmp_path):
+    report = run_benchmarks(["merge_by_time", "hourly_leq"], sizes=["2k"], repeat=1, isolate=False)
+    assert [(r["case"], r["rows"]) for r in report["results"]] == [("merge_by_time", 2000), ("hourly_leq", 2000)]
+    assert all(r["min_s"] > 0 for r in report["results"])
+    ratios = compare(report, report)
+    assert [r[-1] for r in ratios] == [1.0, 1.0]
+
+    out = tmp_path / "results.json"
+    assert main(["--cases", "load_noise_data", "--sizes", "1k", "--repeat", "1", "--no-isolate", "--out", str(out)]) == 0
+    assert json.loads(out.read_text())["results"][0]["case"] == "load_noise_data"
+
+def test_entry_points_import_no_heavy_packages():
+    results = check_imports(repeat=1)
+    assert [r["profile"] for r in results] == ["worker", "dashboard"]
+    for result in results:
+        assert result["unexpected"] == [], result["profile"]
+        assert result["seconds"] > 0 and result["slowest"]
+    assert {"matplotlib", "seaborn"} <= set(measure_imports(["seaborn"], repeat=1)["heavy"])
+    assert "pyarrow.parquet" in measure_imports(["pyarrow.parquet"], repeat=1)["heavy"]
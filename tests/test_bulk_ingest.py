@@ -0,0 +1,82 @@
+import io
+import numpy as np
+import pandas as pd
+import pytest
+import bulk_ingest
+from bulk_ingest import expand_sources, load_noise_files
+
+def make_export(start, n, icao="EDDB", offset=None):
+    times = pd.date_range(start, periods=n, freq="1s")
+    stamps = times.strftime("%Y-%m-%d %H:%M:%S") if offset is None else times.strftime("%Y-%m-%dT%H:%M:%S") + offset
+    return pd.DataFrame({"timestamp": stamps, "noise_db": np.linspace(40, 80, n), "icao": icao})
+
+def write_fleet(root):
+    (root / "2025-07").mkdir()
+    (root / "2025-08").mkdir()
+    make_export("2025-07-17", 100).to_csv(root / "2025-07" / "MIC01.csv", index=False)
+    make_export("2025-07-17", 50, icao="EGLL").to_csv(root / "2025-07" / "MIC02.csv", index=False)
+    make_export("2025-08-01 02:00", 30, offset="+02:00").to_csv(root / "2025-08" / "MIC01.csv", index=False)
+    (root / "notes.txt").write_text("not noise data")
+
+def test_expand_sources(tmp_path):
+    write_fleet(tmp_path)
+    files = expand_sources(str(tmp_path))
+    assert [f.replace(str(tmp_path), "") for f in files] == ["/2025-07/MIC01.csv", "/2025-07/MIC02.csv", "/2025-08/MIC01.csv"]
+    assert expand_sources(str(tmp_path / "*" / "MIC01.csv")) == [files[0], files[2]]
+    upload = io.BytesIO(b"")
+    assert expand_sources([upload, files[1]]) == [upload, files[1]]
+
+def test_loads_directory_with_provenance(tmp_path):
+    write_fleet(tmp_path)
+    noise, report = load_noise_files(str(tmp_path), max_workers=1)
+    assert report["files"] == 3 and report["rows"] == len(noise) == 180 and report["rows_per_s"] > 0
+    assert noise["station"].value_counts().to_dict() == {"MIC01": 130, "MIC02": 50}
+    assert noise["source_file"].nunique() == 3
+    assert noise["noise_db"].dtype == np.float32
+    assert isinstance(noise["icao"].dtype, pd.CategoricalDtype)
+    # The +02:00 export lines up with the naive (UTC) ones.
+    august = noise[noise["source_file"].str.contains("2025-08")]
+    assert august["timestamp"].iloc[0] == pd.Timestamp("2025-08-01 00:00")
+    assert noise["timestamp"].dtype == "datetime64[ns]"
+
+def test_pool_matches_serial(tmp_path, monkeypatch):
+    write_fleet(tmp_path)
+    serial, _ = load_noise_files(str(tmp_path), max_workers=1)
+    monkeypatch.setattr(bulk_ingest, "PARALLEL_MIN_BYTES", 0)
+    pooled, _ = load_noise_files(str(tmp_path), max_workers=2)
+    pd.testing.assert_frame_equal(serial, pooled)
+
+def test_uploads_and_errors(tmp_path):
+    good = io.BytesIO(make_export("2025-07-17", 10).to_csv(index=False).encode())
+    good.name = "MIC07.csv"
+    bad = io.BytesIO(b"\x00")
+    bad.name = "broken.parquet"
+    with pytest.raises(RuntimeError, match="broken.parquet"):
+        load_noise_files([good, bad])
+    noise, report = load_noise_files([good, bad], skip_errors=True)
+    assert len(noise) == 10 and list(report["errors"]) == ["broken.parquet"]
+    assert set(noise["station"]) == {"MIC07"}
+    with pytest.raises(RuntimeError, match="No CSV or XLSX files"):
+        load_noise_files(str(tmp_path / "*.csv"))
+
+def test_reads_every_sheet(tmp_path):
+    pytest.importorskip("openpyxl")
+    path = tmp_path / "fleet.xlsx"
+    with pd.ExcelWriter(path) as writer:
+        make_export("2025-07-17", 20).assign(station="MIC01").to_excel(writer, sheet_name="MIC01", index=False)
+        make_export("2025-07-17", 30).assign(station="MIC02").to_excel(writer, sheet_name="MIC02", index=False)
+    noise, report = load_noise_files(str(path))
+    assert report["sheets"] == 2
+    assert noise.groupby("sheet", observed=True).size().to_dict() == {"MIC01": 20, "MIC02": 30}
+
+def test_mixed_type_columns_are_read_as_text():
+    # As read from a workbook: numeric-looking codes and notes next to text.
+    sheet = make_export("2025-07-17", 3).assign(notes=["gusty", 3.5, None])
+    sheet["icao"] = pd.Series(["EDDB", 1234, "EDDB"], dtype="category")
+    tables = [
+        bulk_ingest._to_table(sheet, "MIC01.xlsx", "Sheet1"),
+        bulk_ingest._to_table(make_export("2025-07-18", 2), "MIC02.csv", ""),
+    ]
+    noise = bulk_ingest._concat(tables).to_pandas()
+    assert noise["icao"].astype(str).tolist() == ["EDDB", "1234", "EDDB", "EDDB", "EDDB"]
+    assert noise["notes"].tolist()[:2] == ["gusty", "3.5"] and noise["notes"].isna().sum() == 3
@@ -0,0 +1,56 @@
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from chart_cache import ChartCache, ChartRenderer, fingerprint
+from visualizations import _draw_arrival_histogram
+
+def make_counts(scale=1):
+    return pd.DataFrame({"hour": range(24), "arrivals_count": np.arange(24) * scale})
+
+def test_fingerprint_tracks_content_not_index():
+    df = make_counts()
+    assert fingerprint(df, "EDDB") == fingerprint(df.set_axis(range(100, 124)), "EDDB")
+    assert fingerprint(df, "EDDB") != fingerprint(df, "EGLL")
+    assert fingerprint(df) != fingerprint(make_counts(2))
+    assert fingerprint({"a": 1, "b": 2}) == fingerprint({"b": 2, "a": 1})
+
+def test_cache_evicts_least_recently_used():
+    cache = ChartCache(max_entries=10, max_bytes=25)
+    cache.put("a", b"x" * 10)
+    cache.put("b", b"x" * 10)
+    assert cache.get("a") is not None
+    cache.put("c", b"x" * 10)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["bytes"] == 20
+
+def test_render_caches_and_closes_figures():
+    calls = []
+
+    def draw(counts):
+        calls.append(1)
+        fig, ax = plt.subplots()
+        ax.bar(counts["hour"], counts["arrivals_count"])
+        return fig
+
+    renderer = ChartRenderer(max_workers=1)
+    first = renderer.render("hist", draw, make_counts())
+    second = renderer.render("hist", draw, make_counts())
+    assert first == second and first.startswith(b"\x89PNG")
+    assert len(calls) == 1
+    assert plt.get_fignums() == []
+
+def test_render_many_in_process_pool_matches_serial():
+    jobs = [(make_counts(scale),) for scale in range(1, 6)]
+    pooled = ChartRenderer(max_workers=2)
+    try:
+        images = pooled.render_many("hist", _draw_arrival_histogram, jobs)
+    finally:
+        pooled.shutdown()
+    serial = ChartRenderer(max_workers=1).render_many("hist", _draw_arrival_histogram, jobs)
+    assert len(images) == 5
+    assert all(image.startswith(b"\x89PNG") for image in images)
+    assert images == serial
+    assert pooled.cache.stats()["entries"] == 5
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+from benchmarks import make_flights, make_noise
+from compact import compact_merged, memory_report, optimize_dtypes, to_utc_naive
+from data_fetch import merge_by_time
+
+def make_merged(rows=20_000):
+    noise = make_noise(rows).astype({"icao": object, "station": object, "noise_db": "float64"})
+    noise["Temperature (°C)"] = np.float32(21.5)
+    noise["Conditions"] = pd.Categorical(np.where(noise.index % 7200 < 3600, "Clear", "Rain"))
+    flights = make_flights(make_noise(rows)).astype({"icao": object})
+    flights["origin"] = np.where(flights.index % 2 == 0, "LHR", "CDG")
+    flights["arrival_scheduled_local"] = flights["arrival_scheduled_utc"].dt.tz_convert("Europe/Berlin").dt.tz_localize(None)
+    return merge_by_time(noise, flights, by="icao")
+
+def test_compact_merged_is_several_times_smaller():
+    merged = make_merged()
+    compact = compact_merged(merged)
+    report = memory_report(merged, compact)
+    assert report["ratio"] >= 5
+    assert compact.rows["noise_db"].dtype == np.float32
+    assert isinstance(compact.rows["icao"].dtype, pd.CategoricalDtype)
+    assert compact.rows["flight_id"].dtype == np.int32
+    assert len(compact.flights) == len(merged[["flight_number", "arrival_scheduled_utc"]].dropna().drop_duplicates())
+    assert len(compact.weather) == 2
+
+def test_expand_restores_merged_values():
+    merged = make_merged(5_000)
+    merged.loc[:99, ["flight_number", "arrival_scheduled_utc", "origin", "arrival_scheduled_local"]] = np.nan
+    compact = compact_merged(merged)
+    assert (compact.rows["flight_id"].iloc[:100] == -1).all()
+    expanded = compact.expand()
+    assert list(expanded.columns) == list(merged.columns)
+    assert expanded["flight_number"].astype(object).equals(merged["flight_number"].astype(object))
+    np.testing.assert_allclose(expanded["noise_db"], merged["noise_db"], rtol=1e-6)
+    expected_utc = merged["arrival_scheduled_utc"].dt.tz_localize(None)
+    assert expanded["arrival_scheduled_utc"].equals(expected_utc)
+
+def test_optimize_dtypes_normalizes_times_to_utc():
+    df = pd.DataFrame({
+        "timestamp": ["2025-07-17T10:00:00Z", "2025-07-17T12:00:00+02:00"],
+        "count": np.array([1, 2], dtype="int64"),
+        "label": ["a", "b"],
+    })
+    out = optimize_dtypes(df)
+    assert (out["timestamp"] == pd.Timestamp("2025-07-17 10:00")).all()
+    assert out["count"].dtype == np.int8
+    assert out["label"].dtype == object  # all distinct: not worth a categorical
+    aware = pd.Series(pd.date_range("2025-07-17", periods=2, freq="H", tz="Europe/Berlin"))
+    assert to_utc_naive(aware).iloc[0] == pd.Timestamp("2025-07-16 22:00")
@@ -1,5 +1,13 @@
 import pandas as pd
-from data_fetch import load_noise_data, get_airport_coordinates
+import pytest
+import data_fetch
+from data_fetch import (
+    load_noise_data,
+    get_airport_coordinates,
+    iter_noise_chunks,
+    hourly_noise_means,
+    enrich_with_weather,
+)
 
 def test_load_noise_data():
     # Create a sample DataFrame and save it to a temp CSV
@@ -17,8 +25,111 @@ def test_load_noise_data():
     assert 'noise_level' in df.columns
     assert df.iloc[0]['airport'] == 'EDDB'
 
+def test_mixed_offsets_load_as_naive_utc(tmp_path):
+    path = tmp_path / "mixed.csv"
+    pd.DataFrame({
+        'timestamp': ['2025-07-17T10:00:00Z', '2025-07-17T12:30:00+02:00', '2025-07-17T11:00:00Z'],
+        'noise_db': [60.0, 70.0, 80.0],
+        'icao': 'EDDB',
+    }).to_csv(path, index=False)
+    df = load_noise_data(str(path))
+    assert df['timestamp'].dtype == 'datetime64[ns]'
+    assert df['timestamp'].tolist() == pd.to_datetime(['2025-07-17 10:00', '2025-07-17 10:30', '2025-07-17 11:00']).tolist()
+    chunks = list(iter_noise_chunks(str(path)))
+    assert chunks[0]['timestamp'].equals(df['timestamp'])
+
+def test_layout_change_after_detection_sample(tmp_path):
+    path = tmp_path / "switch.csv"
+    times = pd.date_range('2025-07-17', periods=3000, freq='1s')
+    # The logger switches from 'YYYY-MM-DD HH:MM:SS' to ISO 'T...Z' after 2000 rows.
+    stamps = list(times[:2000].strftime('%Y-%m-%d %H:%M:%S')) + list(times[2000:].strftime('%Y-%m-%dT%H:%M:%SZ'))
+    pd.DataFrame({'timestamp': stamps, 'noise_db': 55.0, 'icao': 'EDDB'}).to_csv(path, index=False)
+
+    df = load_noise_data(str(path))
+    assert df['timestamp'].tolist() == times.tolist()
+    chunks = list(iter_noise_chunks(str(path), memory_budget_mb=0.01))
+    assert len(chunks) > 1
+    assert pd.concat([c['timestamp'] for c in chunks]).tolist() == times.tolist()
+
 def test_get_airport_coordinates():
     coords = get_airport_coordinates('EDDB')
     assert isinstance(coords, dict)
     assert 'lat' in coords and 'lon' in coords
     assert isinstance(coords['lat'], float)
+
+def test_iter_noise_chunks(tmp_path):
+    path = tmp_path / "stream.csv"
+    rows = ["timestamp,noise_db,icao"]
+    rows += [f"2025-07-17 {s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d},{50 + s % 5},EDDB"
+             for s in range(5000)]
+    path.write_text("\n".join(rows))
+
+    chunks = list(iter_noise_chunks(str(path), memory_budget_mb=0.01))
+
+    assert len(chunks) > 2
+    assert sum(len(c) for c in chunks) == 5000
+    assert chunks[0]["noise_db"].dtype == "float32"
+    assert chunks[0]["icao"].dtype == "category"
+    assert pd.api.types.is_datetime64_any_dtype(chunks[-1]["timestamp"])
+
+def test_hourly_noise_means_matches_groupby(tmp_path):
+    path = tmp_path / "stream.csv"
+    rows = ["timestamp,noise_db,icao"]
+    rows += [f"2025-07-17 {h:02d}:{m:02d}:00,{40 + h + m % 7},{'EDDB' if m % 2 else 'EGLL'}"
+             for h in range(3) for m in range(60)]
+    path.write_text("\n".join(rows))
+
+    result = hourly_noise_means(iter_noise_chunks(str(path), memory_budget_mb=0.001))
+
+    df = load_noise_data(str(path))
+    df["hour"] = df["timestamp"].dt.floor("H")
+    expected = df.groupby(["icao", "hour"])["noise_db"].mean().reset_index()
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+class FakeWeatherClient:
+    """Records historical lookups and returns a temperature derived from the hour."""
+    def __init__(self):
+        self.lookups = []
+
+    def grid_cell(self, lat, lon):
+        return round(lat, 2), round(lon, 2)
+
+    def historical(self, lat, lon, hour_ts):
+        self.lookups.append((lat, lon, hour_ts))
+        hour = pd.Timestamp(hour_ts, unit="s").hour
+        return {"Temperature (°C)": float(hour), "Wind Speed (m/s)": lat, "Conditions": f"Hour {hour}"}
+
+def test_enrich_with_weather_per_hour(monkeypatch):
+    client = FakeWeatherClient()
+    monkeypatch.setattr(data_fetch, "get_weather_client", lambda api_key: client)
+    df = pd.DataFrame({
+        "timestamp": pd.to_datetime(["2025-07-17 10:05", "2025-07-17 11:30", "2025-07-17 10:55", None]),
+        "icao": ["EDDB", "EDDB", "EGLL", "EGLL"],
+    })
+
+    result = enrich_with_weather(df, 52.36, 13.50, "key", airport_coords={"EGLL": (51.47, -0.45)})
+
+    assert len(client.lookups) == 3
+    assert result["Temperature (°C)"].dtype == "float32"
+    assert result["Conditions"].dtype == "category"
+    assert result["Temperature (°C)"].tolist()[:3] == [10.0, 11.0, 10.0]
+    assert result["Wind Speed (m/s)"].tolist()[:3] == pytest.approx([52.36, 52.36, 51.47])
+    assert pd.isna(result["Temperature (°C)"].iloc[3])
+    assert pd.isna(result["Conditions"].iloc[3])
+    assert list(df.columns) == ["timestamp", "icao"]  # the input frame is left as it was
+
+def test_enrich_with_weather_empty_observation(monkeypatch):
+    client = FakeWeatherClient()
+    # The 11:00 hour has no observation (summarize_history of an empty payload).
+    fetch = client.historical
+    client.historical = lambda lat, lon, hour_ts: (
+        {"Temperature (°C)": float("nan"), "Wind Speed (m/s)": float("nan"), "Conditions": None}
+        if pd.Timestamp(hour_ts, unit="s").hour == 11 else fetch(lat, lon, hour_ts)
+    )
+    monkeypatch.setattr(data_fetch, "get_weather_client", lambda api_key: client)
+    df = pd.DataFrame({"timestamp": pd.to_datetime(["2025-07-17 10:05", "2025-07-17 11:30"])})
+
+    result = enrich_with_weather(df, 52.36, 13.50, "key")
+
+    assert result["Conditions"].tolist()[0] == "Hour 10" and pd.isna(result["Conditions"].iloc[1])
+    assert pd.isna(result["Temperature (°C)"].iloc[1])
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+from downsampling import downsample, lttb_indices, minmax_indices
+
+def make_series(n=200_000, peak_at=123_457):
+    rng = np.random.default_rng(1)
+    levels = rng.normal(50, 2, n)
+    levels[peak_at] = 95.0
+    return pd.DataFrame({
+        "timestamp": pd.date_range("2025-07-17", periods=n, freq="1s"),
+        "noise_db": levels,
+    })
+
+def test_minmax_keeps_extremes_and_budget():
+    df = make_series()
+    reduced = downsample(df, n_out=1000)
+    assert len(reduced) <= 1000
+    assert reduced["noise_db"].max() == 95.0
+    assert reduced["noise_db"].min() == df["noise_db"].min()
+    assert reduced["timestamp"].is_monotonic_increasing
+
+def test_lttb_keeps_peak_and_endpoints():
+    df = make_series()
+    reduced = downsample(df, n_out=500, method="lttb")
+    assert len(reduced) == 500
+    assert reduced["noise_db"].max() == 95.0
+    assert reduced.index[0] == 0 and reduced.index[-1] == len(df) - 1
+
+def test_short_series_unchanged_and_nan_dropped():
+    x = np.arange(10)
+    assert minmax_indices(x, x * 1.0, 100).tolist() == list(range(10))
+    assert lttb_indices(x, x * 1.0, 100).tolist() == list(range(10))
+
+    df = pd.DataFrame({"timestamp": pd.date_range("2025-07-17", periods=4, freq="1s"),
+                       "noise_db": [50.0, np.nan, 60.0, 55.0]})
+    assert downsample(df, n_out=10)["noise_db"].tolist() == [50.0, 60.0, 55.0]
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        downsample(make_series(100, peak_at=5), method="mean")
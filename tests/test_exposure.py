@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+import exposure
+from exposure import ExposureCache, ExposureGrid, compute_exposure, daily_arrivals, nominal_runway
+
+LAT, LON = 52.36, 13.5
+
+def make_arrivals(n=600, days=3, seed=0):
+    rng = np.random.default_rng(seed)
+    models = np.array(["Airbus A320neo", "ATR 72", None], dtype=object)
+    return pd.DataFrame({
+        "arrival_scheduled_local": pd.Timestamp("2025-07-17") + pd.to_timedelta(rng.integers(0, days * 86400, n), unit="s"),
+        "aircraft_model": rng.choice(models, n),
+    })
+
+def test_daily_arrivals_by_class_and_period():
+    arrivals = pd.DataFrame({
+        "arrival_scheduled_local": pd.to_datetime(["2025-07-17 08:00", "2025-07-17 20:00", "2025-07-18 02:00", None]),
+        "aircraft_model": ["Airbus A320neo", "ATR 72", "Boeing 737-800", "Airbus A320neo"],
+    })
+    daily = daily_arrivals(arrivals)
+    assert daily.loc["jet"].tolist() == [0.5, 0.0, 0.5]
+    assert daily.loc["turboprop"].tolist() == [0.0, 0.5, 0.0]
+    assert daily.loc["other"].sum() == 0
+
+def test_levels_fall_off_away_from_the_approach_path():
+    grid = compute_exposure(make_arrivals(), LAT, LON, heading_deg=270, cells=101, radius_km=10, cache=ExposureCache(None))
+    lden = grid.lden_db
+    assert lden.shape == (101, 101) and lden.dtype == np.float32
+    centre = 50
+    # Landing westbound: the approach comes in from the east, along the centre row.
+    assert lden[centre, 75] > lden[centre, 25]
+    assert lden[centre, 75] > lden[90, 75]
+    assert np.all(np.diff(lden[centre:, 75]) < 0)
+    west, south, east, north = grid.bounds
+    assert west < LON < east and south < LAT < north
+    assert grid.cell_size_m == pytest.approx(20_000 / 101)
+
+def test_pool_matches_serial(monkeypatch):
+    arrivals = make_arrivals()
+    runways = [nominal_runway(LAT, LON - 0.02, 70, 0.3), nominal_runway(LAT, LON + 0.02, 250, 0.7)]
+    serial = compute_exposure(arrivals, LAT, LON, runways=runways, cells=60, max_workers=1, cache=ExposureCache(None))
+    monkeypatch.setattr(exposure, "PARALLEL_MIN_EVALUATIONS", 0)
+    pooled = compute_exposure(arrivals, LAT, LON, runways=runways, cells=60, max_workers=2, cache=ExposureCache(None))
+    np.testing.assert_array_equal(serial.lden_db, pooled.lden_db)
+
+def test_cache_reuses_grids_in_memory_and_on_disk(tmp_path):
+    arrivals = make_arrivals()
+    cache = ExposureCache(str(tmp_path))
+    grid = compute_exposure(arrivals, LAT, LON, cells=40, cache=cache)
+    assert compute_exposure(arrivals, LAT, LON, cells=40, cache=cache) is grid
+    assert len(list(tmp_path.glob("*.npz"))) == 1
+
+    reloaded = compute_exposure(arrivals, LAT, LON, cells=40, cache=ExposureCache(str(tmp_path)))
+    np.testing.assert_array_equal(reloaded.lden_db, grid.lden_db)
+    assert reloaded.bounds == pytest.approx(grid.bounds)
+    other = compute_exposure(arrivals, LAT, LON, heading_deg=90, cells=40, cache=cache)
+    assert not np.array_equal(other.lden_db, grid.lden_db)
+
+def test_summary_and_image():
+    lden = np.array([[40.0, 50.0], [60.0, np.nan]], dtype="float32")
+    grid = ExposureGrid(lden, (13.0, 52.0, 13.1, 52.1), cell_size_m=1000)
+    summary = grid.summary(bands=(45, 55), population_density=100).set_index("lden_db")
+    assert summary.loc[45, "area_km2"] == 2.0 and summary.loc[55, "area_km2"] == 1.0
+    assert summary.loc[45, "population"] == 200
+
+    rgba = grid.to_rgba(bands=(45, 55))
+    assert rgba.shape == (2, 2, 4) and rgba.dtype == np.uint8
+    assert rgba[1, 0, 3] == 0 and rgba[1, 1, 3] > 0  # south-west is below the first band; image is north up
+    assert rgba[0, 1, 3] == 0  # NaN is transparent
+    assert grid.to_png().startswith(b"\x89PNG")
+
+def test_errors_are_wrapped():
+    with pytest.raises(RuntimeError, match="Failed to compute noise exposure"):
+        compute_exposure(pd.DataFrame({"flight_number": ["X1"]}), LAT, LON, cache=ExposureCache(None))
@@ -0,0 +1,97 @@
+import pandas as pd
+from arrivals import get_arrivals, normalize_arrivals
+from flight_store import FlightStore
+
+def make_arrivals(icao, times):
+    return normalize_arrivals([
+        {
+            "icao": icao,
+            "flight_number": f"XY {i}",
+            "callsign": "XYZ1",
+            "origin": "Origin City",
+            "aircraft_model": "Airbus A320",
+            "arrival_scheduled_utc": f"{t}Z",
+            "arrival_scheduled_local": f"{t}+00:00",
+        }
+        for i, t in enumerate(times)
+    ])
+
+class RecordingClient:
+    """Stands in for ArrivalsClient and serves one arrival per requested range."""
+    def __init__(self):
+        self.ranges = []
+
+    def fetch_ranges(self, ranges):
+        self.ranges.extend(ranges)
+        return pd.concat([make_arrivals(icao, [start.strftime("%Y-%m-%d %H:%M")]) for icao, start, _ in ranges])
+
+def test_missing_ranges_reports_gaps(tmp_path):
+    store = FlightStore(str(tmp_path / "flights.sqlite"))
+    store.mark_covered("EDDB", "2025-07-17 00:00", "2025-07-17 06:00")
+    store.mark_covered("EDDB", "2025-07-17 12:00", "2025-07-17 18:00")
+    store.mark_covered("EDDB", "2025-07-17 05:00", "2025-07-17 08:00")
+
+    gaps = store.missing_ranges("EDDB", "2025-07-16 22:00", "2025-07-18 00:00")
+
+    assert gaps == [
+        (pd.Timestamp("2025-07-16 22:00"), pd.Timestamp("2025-07-17 00:00")),
+        (pd.Timestamp("2025-07-17 08:00"), pd.Timestamp("2025-07-17 12:00")),
+        (pd.Timestamp("2025-07-17 18:00"), pd.Timestamp("2025-07-18 00:00")),
+    ]
+    assert store.high_water_mark("EDDB") == pd.Timestamp("2025-07-17 18:00")
+    assert store.missing_ranges("EGLL", "2025-07-17", "2025-07-18") == [
+        (pd.Timestamp("2025-07-17"), pd.Timestamp("2025-07-18"))
+    ]
+
+def test_upsert_and_query_round_trip(tmp_path):
+    store = FlightStore(str(tmp_path / "flights.sqlite"))
+    arrivals = make_arrivals("EDDB", ["2025-07-17 10:00", "2025-07-17 11:00", "2025-07-17 12:00"])
+    store.upsert(arrivals)
+    store.upsert(arrivals)
+
+    result = store.query(["EDDB"], "2025-07-17 10:30", "2025-07-17 13:00")
+
+    assert result["flight_number"].tolist() == ["XY 1", "XY 2"]
+    assert str(result["arrival_scheduled_utc"].dt.tz) == "UTC"
+    assert result["icao"].dtype == "category"
+
+def test_get_arrivals_only_fetches_uncovered_ranges(tmp_path, monkeypatch):
+    client = RecordingClient()
+    monkeypatch.setattr("arrivals.get_arrivals_client", lambda api_key: client)
+    store = FlightStore(str(tmp_path / "flights.sqlite"))
+
+    first = get_arrivals("EDDB", "key", "2025-07-17 00:00", "2025-07-17 12:00", store=store)
+    second = get_arrivals("EDDB", "key", "2025-07-17 06:00", "2025-07-17 18:00", store=store)
+
+    assert len(first) == 1 and len(second) == 1
+    assert client.ranges == [
+        ("EDDB", pd.Timestamp("2025-07-17 00:00"), pd.Timestamp("2025-07-17 12:00")),
+        ("EDDB", pd.Timestamp("2025-07-17 12:00"), pd.Timestamp("2025-07-17 18:00")),
+    ]
+
+def test_unnumbered_arrivals_at_the_same_minute_are_kept(tmp_path):
+    store = FlightStore(str(tmp_path / "flights.sqlite"))
+    arrivals = normalize_arrivals([
+        {"icao": "EDDB", "flight_number": None, "callsign": callsign, "origin": origin,
+         "arrival_scheduled_utc": "2025-07-17 10:00Z", "arrival_scheduled_local": "2025-07-17 12:00+02:00"}
+        for callsign, origin in (("DEABC", "Schoenhagen"), ("DEXYZ", "Schoenhagen"), (None, None))
+    ])
+    assert len(arrivals) == 3
+    store.upsert(arrivals)
+    store.upsert(arrivals)
+
+    result = store.query("EDDB", "2025-07-17 12:00", "2025-07-17 13:00")
+    assert len(result) == 3 and result["flight_number"].isna().all()
+    assert result["callsign"].isna().sum() == 1 and result["origin"].isna().sum() == 1
+
+def test_old_store_layout_is_rebuilt(tmp_path):
+    import sqlite3
+    path = str(tmp_path / "flights.sqlite")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE arrivals (icao TEXT, arrival_local_s INTEGER, flight_number TEXT, "
+                     "PRIMARY KEY (icao, arrival_local_s, flight_number)) WITHOUT ROWID")
+        conn.execute("CREATE TABLE coverage (icao TEXT, start_ns INTEGER, end_ns INTEGER, PRIMARY KEY (icao, start_ns))")
+        conn.execute("INSERT INTO coverage VALUES ('EDDB', 0, 1)")
+    store = FlightStore(path)
+    assert store.high_water_mark("EDDB") is None
+    assert store.upsert(make_arrivals("EDDB", ["2025-07-17 10:00"])) == 1
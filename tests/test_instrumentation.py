@@ -0,0 +1,73 @@
+import contextvars
+import json
+import pandas as pd
+import pytest
+from data_fetch import merge_by_time
+from instrumentation import Tracer, activate, get_tracer, span, traced
+
+def in_fresh_context(func):
+    return contextvars.copy_context().run(func)
+
+def make_frames():
+    noise = pd.DataFrame({
+        "timestamp": pd.date_range("2025-07-17 10:00", periods=5, freq="1min"),
+        "noise_db": [50.0, 60.0, 70.0, 60.0, 50.0],
+        "icao": "EDDB",
+    })
+    flights = pd.DataFrame({
+        "icao": ["EDDB"],
+        "flight_number": ["LH1"],
+        "arrival_scheduled_utc": pd.to_datetime(["2025-07-17 10:02"]).tz_localize("UTC"),
+    })
+    return noise, flights
+
+def test_no_spans_without_active_tracer():
+    def run():
+        noise, flights = make_frames()
+        assert get_tracer() is None
+        assert len(merge_by_time(noise, flights, by="icao")) == 5
+    in_fresh_context(run)
+
+def test_nested_spans_with_rows():
+    def run():
+        tracer = activate()
+        noise, flights = make_frames()
+        with span("page") as record:
+            merge_by_time(noise, flights, by="icao")
+            record["rows_out"] = 1
+        return tracer
+
+    spans = in_fresh_context(run).to_frame()
+    assert spans["name"].tolist() == ["page", "merge_by_time"]
+    assert spans["depth"].tolist() == [0, 1]
+    merge = spans.iloc[1]
+    assert merge["rows_in"] == 5 and merge["rows_out"] == 5
+    assert spans.iloc[0]["duration_ms"] >= merge["duration_ms"]
+
+def test_errors_are_recorded_and_reraised():
+    @traced("failing")
+    def fail():
+        raise ValueError("boom")
+
+    def run():
+        tracer = activate(Tracer())
+        with pytest.raises(ValueError):
+            fail()
+        return tracer
+
+    spans = in_fresh_context(run).to_frame()
+    assert spans.iloc[0]["error"] == "ValueError: boom"
+
+def test_chrome_trace_export(tmp_path):
+    def run():
+        tracer = activate()
+        with span("stage", rows_in=10):
+            pass
+        return tracer
+
+    path = in_fresh_context(run).export(str(tmp_path / "trace.json"))
+    trace = json.loads(open(path).read())
+    event = trace["traceEvents"][0]
+    assert event["ph"] == "X" and event["name"] == "stage"
+    assert event["args"]["rows_in"] == 10
+    assert event["dur"] >= 0
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+from level_sketch import LevelSketch
+
+def make_noise(hours=3, seed=0):
+    rng = np.random.default_rng(seed)
+    n = hours * 3600
+    return pd.DataFrame({
+        "timestamp": pd.date_range("2025-07-17", periods=n, freq="1s"),
+        "noise_db": np.round(rng.gamma(4, 3, n) + 40, 2),
+        "icao": np.where(np.arange(n) % 2 == 0, "EDDB", "EGLL"),
+        "station": np.where(np.arange(n) % 4 < 2, "S1", "S2"),
+    })
+
+def nearest_rank(values, x):
+    # Level exceeded x% of the time: nearest-rank (100 - x)th percentile
+    values = np.sort(np.asarray(values))
+    return values[max(-(-(100 - x) * len(values) // 100), 1) - 1]
+
+def exact(df, keys, x):
+    return df.groupby([df["timestamp"].dt.floor("H"), *keys])["noise_db"].agg(lambda v: nearest_rank(v, x))
+
+def test_quantiles_within_half_a_bin_of_exact_levels():
+    noise = make_noise()
+    result = LevelSketch(keys=["icao", "station"]).update(noise).quantiles()
+    result = result.set_index(["bucket", "icao", "station"])
+    for x in (10, 50, 90):
+        expected = exact(noise, ["icao", "station"], x).loc[result.index].to_numpy()
+        assert np.abs(result[f"l{x}_db"].to_numpy() - expected).max() <= 0.05 + 1e-4
+    assert (result["l10_db"] >= result["l50_db"]).all() and (result["l50_db"] >= result["l90_db"]).all()
+    assert result["n_samples"].sum() == len(noise)
+
+def test_chunks_and_workers_merge_exactly():
+    noise = make_noise()
+    whole = LevelSketch().update(noise)
+    first, second = LevelSketch().update(noise.iloc[:5000]), LevelSketch().update(noise.iloc[5000:])
+    merged = first.merge(second)
+    pd.testing.assert_frame_equal(merged.quantiles(), whole.quantiles())
+    restored = LevelSketch.from_state(merged.state())
+    pd.testing.assert_frame_equal(restored.quantiles(), whole.quantiles())
+    with pytest.raises(ValueError):
+        merged.merge(LevelSketch(bin_db=0.5))
+
+def test_coarser_groupings_and_ranges():
+    noise = make_noise(hours=48)
+    sketch = LevelSketch().update(noise)
+    daily = sketch.quantiles(by=["icao"], resolution="1D", icao_list=["EDDB"])
+    assert list(daily["icao"].astype(str)) == ["EDDB", "EDDB"]
+    day = noise[(noise["icao"] == "EDDB") & (noise["timestamp"] < "2025-07-18")]
+    assert abs(daily["l50_db"].iloc[0] - nearest_rank(day["noise_db"], 50)) <= 0.05 + 1e-4
+    hours = sketch.quantiles(by=["icao"], start="2025-07-17 05:00", end="2025-07-17 07:00")
+    assert hours["bucket"].nunique() == 2
+
+def test_memory_bounded_by_bins():
+    noise = make_noise(hours=1)
+    noise["noise_db"] = 55.0
+    sketch = LevelSketch(keys=["icao"]).update(noise)
+    assert len(sketch.state()) == 2
+
+def test_small_updates_match_one_shot():
+    noise = make_noise(hours=3)
+    whole = LevelSketch().update(noise)
+    streamed = LevelSketch().update(noise.iloc[:5000])
+    for start in range(5000, len(noise), 250):
+        streamed.update(noise.iloc[start:start + 250])
+    assert streamed._pending
+    pd.testing.assert_frame_equal(streamed.quantiles(), whole.quantiles())
+    assert streamed.nbytes == whole.nbytes
@@ -0,0 +1,83 @@
+import queue
+import socket
+import time
+import numpy as np
+import pandas as pd
+from live_feed import DirectoryTailer, LiveSession, QueueSource, RingBuffer, UdpSource, normalize_feed
+from noise_levels import hourly_leq
+
+def make_batch(start, n, icao="EDDB", station="S1"):
+    return pd.DataFrame({
+        "timestamp": pd.date_range(start, periods=n, freq="1s"),
+        "noise_db": np.linspace(50, 70, n).astype("float32"),
+        "icao": icao,
+        "station": station,
+    })
+
+def test_ring_buffer_keeps_latest_rows():
+    buffer = RingBuffer(capacity=100)
+    buffer.append(make_batch("2025-07-17 10:00", 80))
+    first_new = buffer.append(make_batch("2025-07-17 11:00", 50, icao="EGLL"))
+    assert len(buffer) == 100 and buffer.appended == 130
+    frame = buffer.to_frame()
+    assert frame["timestamp"].iloc[0] == pd.Timestamp("2025-07-17 10:00:30")
+    assert frame["icao"].tolist()[-50:] == ["EGLL"] * 50
+    assert len(buffer.to_frame(since=first_new)) == 50
+    latest = buffer.to_frame(window="10s")
+    assert len(latest) == 11 and latest["timestamp"].iloc[0] == pd.Timestamp("2025-07-17 11:00:39")
+    # Oversized batches keep only their newest rows
+    buffer.append(make_batch("2025-07-17 12:00", 250))
+    assert buffer.to_frame()["timestamp"].iloc[0] == pd.Timestamp("2025-07-17 12:02:30")
+
+def test_directory_tailer_reads_only_new_complete_lines(tmp_path):
+    path = tmp_path / "feed.csv"
+    path.write_text("timestamp,noise_db,icao,station\n2025-07-17 10:00:00,55,EDDB,S1\n2025-07-17 10:00:01,5")
+    tailer = DirectoryTailer(str(tmp_path))
+    assert tailer.poll()["noise_db"].tolist() == [55]
+    with open(path, "a") as f:
+        f.write("6,EDDB,S1\n2025-07-17 10:00:02,57,EDDB,S1\n")
+    assert tailer.poll()["noise_db"].tolist() == [56, 57]
+    assert tailer.poll().empty
+
+    (tmp_path / "feed2.csv").write_text("timestamp,noise_db,icao,station\n2025-07-17 10:00:03,60,EGLL,S9\n")
+    assert tailer.poll()["icao"].tolist() == ["EGLL"]
+
+def test_session_updates_incrementally_and_matches_new_rows():
+    source = QueueSource(queue.Queue())
+    session = LiveSession([source], capacity=1000)
+    session.set_flights(pd.DataFrame({
+        "icao": ["EDDB"],
+        "flight_number": ["LH1"],
+        "arrival_scheduled_utc": pd.to_datetime(["2025-07-17 10:10"]).tz_localize("UTC"),
+    }))
+
+    first, second = make_batch("2025-07-17 10:00", 600), make_batch("2025-07-17 10:10", 1200)
+    source.queue.put(first)
+    assert session.poll() == 600
+    source.queue.put(second.to_dict("records"))
+    assert session.poll() == 1200
+    assert session.poll() == 0
+
+    expected = hourly_leq(pd.concat([first, second]))
+    np.testing.assert_allclose(session.hourly()["leq_db"], expected["leq_db"], rtol=1e-5)
+    # Only samples within 5 min of the 10:10 arrival are matched
+    matches = session.matches()
+    assert matches["timestamp"].min() == pd.Timestamp("2025-07-17 10:05")
+    assert matches["timestamp"].max() == pd.Timestamp("2025-07-17 10:15")
+    assert len(session.recent("1min")) == 61
+
+def test_udp_source_receives_lines():
+    source = UdpSource()
+    try:
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sender.sendto(b"2025-07-17 10:00:00,61.5,EDDB,S1\n2025-07-17 10:00:01,62,EDDB,S1", source.address)
+        sender.close()
+        frame = pd.DataFrame()
+        for _ in range(50):
+            frame = source.poll()
+            if not frame.empty:
+                break
+            time.sleep(0.01)
+        assert normalize_feed(frame)["noise_db"].tolist() == [61.5, 62.0]
+    finally:
+        source.close()
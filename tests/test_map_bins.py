@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+from map_bins import bin_points, cell_size_for_zoom, from_mercator, sample_points, to_mercator
+
+def make_points(n=100_000):
+    rng = np.random.default_rng(2)
+    return pd.DataFrame({
+        "lat": rng.normal(52.36, 0.05, n),
+        "lon": rng.normal(13.50, 0.08, n),
+        "noise_db": rng.uniform(40, 80, n),
+    })
+
+def test_counts_preserved_and_cells_shrink_with_zoom():
+    df = make_points()
+    coarse = bin_points(df, zoom=8)
+    fine = bin_points(df, zoom=12)
+    assert coarse["count"].sum() == len(df) == fine["count"].sum()
+    assert len(fine) > len(coarse)
+    assert cell_size_for_zoom(12) == pytest.approx(cell_size_for_zoom(11) / 2)
+
+def test_cell_leq_is_energy_average():
+    df = pd.DataFrame({"lat": [52.0, 52.0, np.nan], "lon": [13.0, 13.0, 13.0], "noise_db": [50.0, 70.0, 90.0]})
+    cells = bin_points(df, zoom=10, value_col="noise_db")
+    assert len(cells) == 1
+    assert cells["count"].iloc[0] == 2
+    assert cells["leq_db"].iloc[0] == pytest.approx(10 * np.log10((1e5 + 1e7) / 2), abs=1e-4)
+    assert cells["lmax_db"].iloc[0] == 70.0
+    # The cell centre lies near the point it aggregates
+    assert abs(cells["lat"].iloc[0] - 52.0) < 0.1 and abs(cells["lon"].iloc[0] - 13.0) < 0.1
+
+def test_mercator_round_trip():
+    lat, lon = np.array([-60.0, 0.0, 52.5]), np.array([-120.0, 0.0, 13.4])
+    back_lat, back_lon = from_mercator(*to_mercator(lat, lon))
+    np.testing.assert_allclose(back_lat, lat)
+    np.testing.assert_allclose(back_lon, lon)
+
+def test_sample_points_is_capped_and_deterministic():
+    df = make_points(10_000)
+    first = sample_points(df, ["lon", "lat"], max_points=500)
+    assert len(first) == 500 and list(first.columns) == ["lon", "lat"]
+    pd.testing.assert_frame_equal(first, sample_points(df, ["lon", "lat"], max_points=500))
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+from matching import FlightIndex, match_flights, to_utc_naive, to_utc_ns
+
+@pytest.fixture
+def noise_df():
+    return pd.DataFrame({
+        "timestamp": pd.to_datetime(["2025-07-17 10:00", "2025-07-17 10:05", "2025-07-17 10:02", None]),
+        "icao": pd.Categorical(["EDDB", "EGLL", "EDDB", "EDDB"]),
+        "noise_db": [50.0, 60.0, 70.0, 80.0],
+    })
+
+@pytest.fixture
+def flights_df():
+    return pd.DataFrame({
+        "arrival_scheduled_utc": pd.to_datetime(
+            ["2025-07-17 10:01", "2025-07-17 10:03", "2025-07-17 10:06"], utc=True
+        ),
+        "icao": ["EDDB", "EDDB", "EGLL"],
+        "flight_number": ["A", "B", "C"],
+    })
+
+@pytest.mark.parametrize("direction, expected", [
+    ("nearest", ["A", "C", "A", None]),
+    ("backward", [None, None, "A", None]),
+    ("forward", ["A", "C", "B", None]),
+])
+def test_one_to_one_directions(noise_df, flights_df, direction, expected):
+    result = match_flights(noise_df, flights_df, by="icao", direction=direction, tolerance="2min")
+    assert result["flight_number"].where(result["flight_number"].notna(), None).tolist() == expected
+    assert result["noise_db"].tolist() == noise_df["noise_db"].tolist()
+
+def test_matches_never_cross_airports(noise_df, flights_df):
+    flights_df.loc[2, "icao"] = "LFPG"
+    result = match_flights(noise_df, flights_df, by="icao", tolerance="10min")
+    assert pd.isna(result.loc[1, "flight_number"])
+
+def test_window_mode_returns_all_pairs(noise_df, flights_df):
+    result = match_flights(noise_df, flights_df, by="icao", direction="window", tolerance="2min")
+    assert list(zip(result.index, result["flight_number"])) == [(0, "A"), (1, "C"), (2, "A"), (2, "B")]
+
+def test_inputs_are_not_modified(noise_df, flights_df):
+    noise_before, flights_before = noise_df.copy(), flights_df.copy()
+    match_flights(noise_df, flights_df, by="icao")
+    pd.testing.assert_frame_equal(noise_df, noise_before)
+    pd.testing.assert_frame_equal(flights_df, flights_before)
+
+def test_agrees_with_merge_asof():
+    rng = np.random.default_rng(0)
+    start = pd.Timestamp("2025-07-01").value
+    noise = pd.DataFrame({
+        "timestamp": pd.to_datetime(start + rng.integers(0, 86_400 * 10**9, 5000)),
+        "icao": rng.choice(["EDDB", "EGLL"], 5000),
+    })
+    flights = pd.DataFrame({
+        "arrival_scheduled_utc": pd.to_datetime(start + rng.integers(0, 86_400 * 10**9, 300)),
+        "icao": rng.choice(["EDDB", "EGLL"], 300),
+        "flight_id": np.arange(300),
+    })
+
+    result = match_flights(noise, FlightIndex(flights, by="icao"), by="icao").sort_values("timestamp")
+    expected = pd.merge_asof(
+        noise.sort_values("timestamp"),
+        flights.sort_values("arrival_scheduled_utc"),
+        left_on="timestamp",
+        right_on="arrival_scheduled_utc",
+        by="icao",
+        direction="nearest",
+        tolerance=pd.Timedelta("5min"),
+    )
+    np.testing.assert_array_equal(result["flight_id"].fillna(-1), expected["flight_id"].fillna(-1))
+
+def test_mixed_offsets_are_converted_not_dropped():
+    text = pd.Series(["2025-07-17T10:00:00Z", "2025-07-17T12:00:00+02:00", "2025-07-17T10:30:00", None, "garbage"])
+    expected = pd.to_datetime(["2025-07-17 10:00", "2025-07-17 10:00", "2025-07-17 10:30", None, None])
+    pd.testing.assert_series_equal(to_utc_naive(text), pd.Series(expected), check_names=False)
+    aware = pd.Series([pd.Timestamp("2025-07-17 10:00", tz="UTC"), pd.Timestamp("2025-07-17 12:00", tz="Europe/Berlin")], dtype=object)
+    assert (to_utc_ns(aware) == pd.Timestamp("2025-07-17 10:00").value).all()
+    assert to_utc_ns(text)[4] == np.iinfo(np.int64).min
@@ -0,0 +1,129 @@
+import io
+import numpy as np
+import pandas as pd
+from memo import PipelineMemo
+
+def make_noise(n=100, offset=0.0):
+    return pd.DataFrame({
+        "timestamp": pd.date_range("2025-07-17", periods=n, freq="1min"),
+        "noise_db": np.linspace(40, 80, n) + offset,
+    })
+
+class Counter:
+    def __init__(self, func):
+        self.func, self.calls = func, 0
+        self.__module__, self.__qualname__ = func.__module__, func.__qualname__
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        return self.func(*args, **kwargs)
+
+def load(source):
+    return make_noise(offset=float(len(source.getvalue())))
+
+def louder(df, db):
+    return df.assign(noise_db=df["noise_db"] + db)
+
+def test_rerun_with_same_inputs_reuses_every_stage():
+    memo = PipelineMemo()
+    loader, shifter = Counter(load), Counter(louder)
+    for _ in range(3):
+        noise = memo.run("load", loader, io.BytesIO(b"abc"))
+        shifted = memo.run("shift", shifter, noise, db=3)
+    assert loader.calls == 1 and shifter.calls == 1
+    assert shifted["noise_db"].iloc[0] == noise["noise_db"].iloc[0] + 3
+    stats = memo.stats().set_index("stage")
+    assert stats.loc["load", "hits"] == 2 and stats.loc["shift", "misses"] == 1
+
+def test_only_stages_with_changed_inputs_rerun():
+    memo = PipelineMemo()
+    loader, shifter = Counter(load), Counter(louder)
+    noise = memo.run("load", loader, io.BytesIO(b"abc"))
+    memo.run("shift", shifter, noise, db=3)
+    memo.run("shift", shifter, memo.run("load", loader, io.BytesIO(b"abc")), db=5)
+    assert loader.calls == 1 and shifter.calls == 2
+    memo.run("load", loader, io.BytesIO(b"abcd"))
+    assert loader.calls == 2
+
+def test_lists_of_uploads_are_keyed_by_content():
+    memo = PipelineMemo()
+    loader = Counter(lambda sources: [load(s) for s in sources])
+    memo.run("load", loader, [io.BytesIO(b"abc"), io.BytesIO(b"de")])
+    memo.run("load", loader, [io.BytesIO(b"abc"), io.BytesIO(b"de")])
+    memo.run("load", loader, [io.BytesIO(b"abc"), io.BytesIO(b"xy")])
+    assert loader.calls == 2
+
+def test_stage_returning_its_input_still_hits_on_rerun():
+    def add_weather(df):
+        df["temperature"] = 20.0  # modifies and returns its input
+        return df
+
+    memo = PipelineMemo()
+    loader, enricher, shifter = Counter(load), Counter(add_weather), Counter(louder)
+    for _ in range(5):
+        noise = memo.run("load", loader, io.BytesIO(b"abc"))
+        enriched = memo.run("enrich", enricher, noise)
+        memo.run("shift", shifter, enriched, db=3)
+    assert (loader.calls, enricher.calls, shifter.calls) == (1, 1, 1)
+    assert memo.invalidate("load") == 3
+
+def test_tuple_members_link_to_their_stage(monkeypatch):
+    import memo as memo_module
+    memo = PipelineMemo()
+    loader, shifter = Counter(lambda sources: (load(sources[0]), {"rows": 100})), Counter(louder)
+    noise, report = memo.run("load", loader, [io.BytesIO(b"abc"), io.BytesIO(b"de")])
+    memo.run("shift", shifter, noise, db=3)
+
+    hashed, fingerprint = [], memo_module.fingerprint
+    monkeypatch.setattr(memo_module, "fingerprint", lambda *objs: hashed.append(objs) or fingerprint(*objs))
+    noise, report = memo.run("load", loader, [io.BytesIO(b"abc"), io.BytesIO(b"de")])
+    memo.run("shift", shifter, noise, db=3)
+    assert shifter.calls == 1
+    assert not any(isinstance(o, pd.DataFrame) for objs in hashed for o in objs)  # linked, not content-hashed
+    assert memo.invalidate("load") == 2
+
+def test_frames_not_from_the_memo_are_keyed_by_content():
+    memo = PipelineMemo()
+    shifter = Counter(louder)
+    memo.run("shift", shifter, make_noise(), 1)
+    memo.run("shift", shifter, make_noise(), 1)
+    memo.run("shift", shifter, make_noise(offset=1), 1)
+    assert shifter.calls == 2
+
+def test_invalidate_cascades_to_dependent_stages():
+    memo = PipelineMemo()
+    loader, shifter = Counter(load), Counter(louder)
+    noise = memo.run("load", loader, io.BytesIO(b"abc"))
+    memo.run("shift", shifter, noise, 1)
+    assert memo.invalidate("load") == 2
+    memo.run("shift", shifter, memo.run("load", loader, io.BytesIO(b"abc")), 1)
+    assert loader.calls == 2 and shifter.calls == 2
+
+def test_memory_and_entry_bounds():
+    size = int(make_noise().memory_usage(index=True).sum())
+    memo = PipelineMemo(max_bytes=size * 3, max_entries_per_stage=2)
+    shifter = Counter(louder)
+    for db in range(4):
+        memo.run("shift", shifter, make_noise(), db)
+    stats = memo.stats().set_index("stage")
+    assert stats.loc["shift", "entries"] == 2
+    memo.run("shift", shifter, make_noise(), 3)
+    assert shifter.calls == 4
+    memo.run("shift", shifter, make_noise(), 0)
+    assert shifter.calls == 5
+
+def test_failures_are_not_cached():
+    memo = PipelineMemo()
+    calls = []
+
+    def flaky(x):
+        calls.append(x)
+        if len(calls) == 1:
+            raise RuntimeError("Failed to fetch arrivals: timeout")
+        return x
+
+    try:
+        memo.run("arrivals", flaky, 1)
+    except RuntimeError:
+        pass
+    assert memo.run("arrivals", flaky, 1) == 1 and len(calls) == 2
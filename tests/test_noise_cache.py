@@ -0,0 +1,94 @@
+import io
+import os
+import pandas as pd
+import noise_cache
+from noise_cache import NoiseCache, content_hash
+
+CSV_CONTENT = """timestamp,noise_db,icao,station
+2025-07-17 10:00:00,50.5,EDDB,M1
+2025-07-17 10:05:00,55.0,EDDB,M2
+"""
+
+class FakeUpload(io.BytesIO):
+    """Minimal stand-in for a Streamlit UploadedFile."""
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+
+def test_cache_hit_after_first_load(tmp_path):
+    csv_path = tmp_path / "noise.csv"
+    csv_path.write_text(CSV_CONTENT)
+    cache = NoiseCache(str(tmp_path / "cache"))
+
+    first = cache.load(str(csv_path))
+    second = cache.load(str(csv_path), columns=["timestamp", "noise_db", "icao", "missing"])
+
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    assert list(second.columns) == ["timestamp", "noise_db", "icao"]
+    assert second["noise_db"].dtype == "float32"
+    assert pd.api.types.is_datetime64_any_dtype(second["timestamp"])
+    pd.testing.assert_frame_equal(first[second.columns], second)
+
+def test_upload_hash_matches_path_and_rewinds(tmp_path):
+    csv_path = tmp_path / "noise.csv"
+    csv_path.write_text(CSV_CONTENT)
+    upload = FakeUpload(CSV_CONTENT.encode(), "noise.csv")
+
+    assert content_hash(upload) == content_hash(str(csv_path))
+    assert upload.tell() == 0
+
+def test_lru_eviction_keeps_recently_used(tmp_path):
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"noise_{i}.csv"
+        path.write_text(CSV_CONTENT + f"2025-07-17 11:00:00,{60 + i},EDDB,M1\n")
+        paths.append(str(path))
+
+    cache = NoiseCache(str(tmp_path / "cache"))
+    cache.load(paths[0])
+    entry_size = cache.stats()["bytes"]
+    cache.max_bytes = int(entry_size * 2.5)
+    cache.load(paths[1])
+    # Age both entries, then touch the first one so the second becomes least recently used.
+    for name in os.listdir(cache.cache_dir):
+        os.utime(os.path.join(cache.cache_dir, name), (1, 1))
+    cache.load(paths[0])
+    cache.load(paths[2])
+
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["entries"] == 2
+    assert not os.path.exists(cache._path(cache._key(paths[1])))
+
+def test_mixed_type_columns_are_cached_as_text(tmp_path, monkeypatch):
+    csv_path = tmp_path / "noise.csv"
+    csv_path.write_text(CSV_CONTENT)
+    mixed = pd.DataFrame({
+        "timestamp": pd.to_datetime(["2025-07-17 10:00", "2025-07-17 10:05", "2025-07-17 10:10"]),
+        "noise_db": [50.5, 55.0, 52.0],
+        "icao": ["EDDB", 1234, None],
+        "notes": ["gusty", 3.5, "ok"],
+    })
+    monkeypatch.setattr(noise_cache, "load_noise_data", lambda upload: mixed.copy())
+    cache = NoiseCache(str(tmp_path / "cache"))
+
+    first = cache.load(str(csv_path))
+    second = cache.load(str(csv_path))
+
+    assert cache.stats()["hits"] == 1
+    assert second["icao"].tolist()[:2] == ["EDDB", "1234"] and second["icao"].isna().iloc[2]
+    assert second["notes"].tolist() == ["gusty", "3.5", "ok"]
+    pd.testing.assert_frame_equal(first, second)
+
+def test_unwritable_frames_are_served_uncached(tmp_path, monkeypatch):
+    csv_path = tmp_path / "noise.csv"
+    csv_path.write_text(CSV_CONTENT)
+    cache = NoiseCache(str(tmp_path / "cache"))
+
+    def broken_write(path, df):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(cache, "_write", broken_write)
+    df = cache.load(str(csv_path), columns=["noise_db", "missing"])
+    assert list(df.columns) == ["noise_db"] and len(df) == 2
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+from noise_events import attribute_events, detect_events
+
+def make_series(levels, station="M1", icao="EDDB", start="2025-07-17 10:00:00"):
+    return pd.DataFrame({
+        "timestamp": pd.date_range(start, periods=len(levels), freq="1s"),
+        "noise_db": levels,
+        "station": station,
+        "icao": icao,
+    })
+
+def test_hysteresis_keeps_event_through_small_dips():
+    levels = [50] * 5 + [70, 72, 64, 75, 70] + [50] * 5
+    events = detect_events(make_series(levels), threshold_db=65, hysteresis_db=3, min_duration="1s")
+    assert len(events) == 1
+    event = events.iloc[0]
+    assert event["n_samples"] == 5
+    assert event["lmax_db"] == 75
+    assert event["lmax_time"] == pd.Timestamp("2025-07-17 10:00:08")
+    assert event["duration_s"] == pytest.approx(5.0)
+
+def test_sel_and_leq_are_energetic():
+    levels = [50, 70, 80, 50]
+    events = detect_events(make_series(levels), threshold_db=65, min_duration="1s")
+    energy = 10 ** 7 + 10 ** 8
+    assert events.iloc[0]["sel_db"] == pytest.approx(10 * np.log10(energy), abs=1e-3)
+    assert events.iloc[0]["leq_db"] == pytest.approx(10 * np.log10(energy / 2), abs=1e-3)
+
+def test_events_split_by_station_and_short_events_dropped():
+    df = pd.concat([
+        make_series([70] * 10, station="M1"),
+        make_series([70] * 10, station="M2"),
+        make_series([50, 70, 50], station="M3"),
+    ], ignore_index=True)
+    events = detect_events(df, threshold_db=65, min_duration="5s")
+    assert sorted(events["station"]) == ["M1", "M2"]
+
+def test_attribute_events_to_nearest_arrival():
+    df = pd.concat([make_series([50, 70, 80, 70, 50] + [50] * 5)], ignore_index=True)
+    events = detect_events(df, threshold_db=65, min_duration="1s")
+    flights = pd.DataFrame({
+        "arrival_scheduled_utc": pd.to_datetime(["2025-07-17 10:01:00", "2025-07-17 10:30:00"], utc=True),
+        "icao": ["EDDB", "EDDB"],
+        "flight_number": ["AB1", "AB2"],
+    })
+    attributed = attribute_events(events, flights)
+    assert attributed["flight_number"].tolist() == ["AB1"]
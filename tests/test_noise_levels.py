@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+from noise_levels import LevelAccumulator, hourly_leq, lden
+
+def make_day(date="2025-07-17", day_db=60.0, night_db=50.0, icao="EDDB"):
+    timestamps = pd.date_range(date, periods=24 * 60, freq="1min")
+    hours = timestamps.hour
+    levels = np.where((hours >= 23) | (hours < 7), night_db, day_db)
+    return pd.DataFrame({"timestamp": timestamps, "noise_db": levels, "icao": icao})
+
+def test_hourly_leq_is_energy_average():
+    df = pd.DataFrame({
+        "timestamp": pd.to_datetime(["2025-07-17 10:00", "2025-07-17 10:30"]),
+        "noise_db": [50.0, 70.0],
+        "icao": "EDDB",
+    })
+    result = hourly_leq(df)
+    assert result["leq_db"].iloc[0] == pytest.approx(10 * np.log10((10 ** 5 + 10 ** 7) / 2), abs=1e-4)
+    assert result["lmax_db"].iloc[0] == 70.0
+
+def test_lden_and_lnight_from_periods():
+    summary = LevelAccumulator().update(make_day()).summary().iloc[0]
+    assert summary["lday_db"] == pytest.approx(60.0)
+    assert summary["levening_db"] == pytest.approx(60.0)
+    assert summary["lnight_db"] == pytest.approx(50.0)
+    assert summary["lden_db"] == pytest.approx(float(lden(1e6, 1e6, 1e5)), abs=1e-4)
+
+def test_incremental_updates_match_one_shot():
+    df = pd.concat([make_day("2025-07-17"), make_day("2025-07-18", day_db=65.0, icao="EGLL")], ignore_index=True)
+    one_shot = LevelAccumulator().update(df)
+    incremental = LevelAccumulator()
+    for chunk in np.array_split(df, 7):
+        incremental.update(chunk)
+
+    pd.testing.assert_frame_equal(incremental.daily(), one_shot.daily())
+    pd.testing.assert_frame_equal(incremental.hourly(), one_shot.hourly())
+
+def test_state_round_trip_and_merge():
+    first = LevelAccumulator().update(make_day("2025-07-17"))
+    second = LevelAccumulator().update(make_day("2025-07-18"))
+    restored = LevelAccumulator.from_state(first.state()).merge(second)
+
+    combined = LevelAccumulator().update(pd.concat([make_day("2025-07-17"), make_day("2025-07-18")]))
+    pd.testing.assert_frame_equal(restored.summary(), combined.summary())
+
+def test_small_updates_do_not_reaggregate_history():
+    history = make_day("2025-07-17")
+    acc = LevelAccumulator().update(history)
+    tail = make_day("2025-07-18").head(20)
+    for minute in range(len(tail)):
+        acc.update(tail.iloc[[minute]])
+    # Fewer new groups than the 24 hours of history: buffered until read.
+    assert len(acc._pending) == 20 and len(acc._state) == 24
+
+    one_shot = LevelAccumulator().update(pd.concat([history, tail]))
+    pd.testing.assert_frame_equal(acc.hourly(), one_shot.hourly())
+    assert not acc._pending
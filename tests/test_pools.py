@@ -0,0 +1,11 @@
+import pools
+from pools import spawn_pool
+
+def _marker():
+    return getattr(pools, "_test_marker", None)
+
+def test_spawn_pool_starts_fresh_interpreters(monkeypatch):
+    # A forked worker would inherit the patched module; a spawned one re-imports it.
+    monkeypatch.setattr(pools, "_test_marker", "parent", raising=False)
+    with spawn_pool(1) as pool:
+        assert pool.submit(_marker).result() is None
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+from noise_levels import hourly_leq
+from rollups import NoiseRollup
+
+def make_noise(days=2):
+    timestamps = pd.date_range("2025-07-17", periods=days * 24 * 60, freq="1min")
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "timestamp": np.tile(timestamps, 2),
+        "noise_db": rng.uniform(40, 80, 2 * len(timestamps)).astype("float32"),
+        "icao": np.repeat(["EDDB", "EGLL"], len(timestamps)),
+        "station": np.repeat(["S1", "S2"], len(timestamps)),
+    })
+
+def make_arrivals():
+    return pd.DataFrame({
+        "icao": ["EDDB", "EDDB", "EGLL"],
+        "arrival_scheduled_utc": pd.to_datetime(
+            ["2025-07-17 10:05", "2025-07-17 10:50", "2025-07-18 03:00"]
+        ).tz_localize("UTC"),
+    })
+
+def test_hourly_level_matches_hourly_leq():
+    noise = make_noise()
+    rollup = NoiseRollup.build(noise, make_arrivals())
+    result = rollup.query(["EDDB", "EGLL"], resolution="1H")
+    expected = hourly_leq(noise).sort_values(["icao", "hour"], ignore_index=True)
+
+    np.testing.assert_allclose(result["leq_db"], expected["leq_db"], rtol=1e-5)
+    np.testing.assert_allclose(result["lmax_db"], expected["lmax_db"])
+    assert result["n_samples"].tolist() == expected["n_samples"].tolist()
+
+def test_arrival_counts_and_hour_of_day():
+    rollup = NoiseRollup.build(make_noise(), make_arrivals())
+    hourly = rollup.query(["EDDB"], resolution="1H")
+    ten = hourly[hourly["bucket"] == pd.Timestamp("2025-07-17 10:00")]
+    assert ten["arrivals_count"].tolist() == [2]
+    assert hourly["arrivals_count"].sum() == 2
+
+    by_hour = rollup.arrivals_by_hour_of_day()
+    assert by_hour.loc[10, "arrivals_count"] == 2
+    assert by_hour.loc[3, "arrivals_count"] == 1
+
+def test_resolution_follows_visible_range():
+    rollup = NoiseRollup.build(make_noise(days=2))
+    assert rollup.resolution_for("2025-07-17 10:00", "2025-07-17 12:00") == "1min"
+    assert rollup.resolution_for("2025-07-17", "2025-07-19") == "1H"
+    assert rollup.resolution_for("2025-07-17", "2025-07-19", max_points=10) == "1D"
+
+    daily = rollup.query(["EGLL"], resolution="1D")
+    assert len(daily) == 2
+    window = rollup.query(["EGLL"], "2025-07-17 10:00", "2025-07-17 12:00")
+    assert window.attrs["resolution"] == "1min"
+    assert window["bucket"].min() == pd.Timestamp("2025-07-17 10:00")
+    assert window["bucket"].max() == pd.Timestamp("2025-07-17 11:59")
+
+def test_coarse_levels_are_energy_consistent():
+    noise = make_noise(days=1)
+    rollup = NoiseRollup.build(noise)
+    daily = rollup.query(["EDDB"], resolution="1D")
+    eddb = noise.loc[noise["icao"] == "EDDB", "noise_db"].to_numpy("float64")
+    assert daily["leq_db"].iloc[0] == pytest.approx(10 * np.log10(np.mean(10 ** (eddb / 10))), abs=1e-4)
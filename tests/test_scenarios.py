@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scenarios import ScenarioEngine, ScenarioSet, aircraft_class, load_technologies, parse_range
+
+def make_events(n=2_000, seed=0):
+    rng = np.random.default_rng(seed)
+    models = np.array(["Airbus A320neo", "Boeing 737-800", "ATR 72", "De Havilland Canada Dash 8-400", None], dtype=object)
+    return pd.DataFrame({
+        "lmax_time": pd.Timestamp("2025-07-17") + pd.to_timedelta(rng.integers(0, 3 * 86400, n), unit="s"),
+        "lmax_db": rng.normal(70, 5, n),
+        "sel_db": rng.normal(80, 4, n),
+        "aircraft_model": rng.choice(models, n),
+        "icao": rng.choice(["EDDB", "EGLL"], n),
+    })
+
+def test_load_technologies_repairs_rows_and_converts_percentages():
+    technologies = load_technologies().set_index("name")
+    assert {"TRAIL", "CORNET", "SENECA", "SATURN"} <= set(technologies.index)
+    assert "INSPiRE" not in technologies.index  # no quantified reduction
+    assert technologies.loc["CORNET", ["low_db", "high_db"]].tolist() == [6.0, 8.0]
+    vehicle = technologies[technologies.index.str.contains("Noise Emissions")].iloc[0]
+    assert vehicle["low_db"] == pytest.approx(-10 * np.log10(0.8))
+    assert parse_range("N/A")[0] != parse_range("N/A")[0]  # NaN
+
+def test_aircraft_classes():
+    assert aircraft_class("Airbus A320neo") == "jet"
+    assert aircraft_class("ATR 72-600") == "turboprop"
+    assert aircraft_class("De Havilland Canada Dash 8-400") == "turboprop"
+    assert aircraft_class("Bell 429") == "other"
+    assert aircraft_class(None) == "other"
+
+def test_baseline_is_unchanged_and_results_are_cached():
+    events = make_events()
+    engine = ScenarioEngine(events)
+    scenarios = ScenarioSet.named(engine.technologies)
+    result = engine.run(scenarios)
+    baseline = result[result["scenario"] == "Baseline"]
+    assert (baseline["lden_change_db"] == 0).all() and (baseline["n_above_change"] == 0).all()
+    assert (result["lden_change_db"] <= 1e-6).all()
+    assert engine.run(ScenarioSet.named(engine.technologies)) is result
+
+def test_matches_per_event_computation():
+    events = make_events()
+    engine = ScenarioEngine(events, days=3)
+    scenarios = ScenarioSet.sample(engine.technologies, 20, seed=1)
+    result = engine.run(scenarios).set_index(["scenario", "icao"])
+    levels = engine.event_levels(scenarios)
+    assert levels.shape == (20, len(events))
+
+    hour = events["lmax_time"].dt.hour
+    weight = np.where((hour >= 7) & (hour < 19), 1.0, np.where((hour >= 19) & (hour < 23), 10 ** 0.5, 10.0))
+    shift = levels - events["lmax_db"].to_numpy()  # per-event change in dB
+    for s, name in enumerate(scenarios.names):
+        for icao in ("EDDB", "EGLL"):
+            rows = (events["icao"] == icao).to_numpy()
+            energy = (weight * 10 ** ((events["sel_db"].to_numpy() + shift[s]) / 10))[rows].sum()
+            assert result.loc[(name, icao), "lden_db"] == pytest.approx(10 * np.log10(energy / (3 * 86400)), abs=1e-4)
+            assert result.loc[(name, icao), "n_above"] == (levels[s, rows] >= 65).sum()
+    unknown = events["aircraft_model"].isna().to_numpy()
+    assert np.allclose(shift[:, unknown], 0, atol=1e-5)
+
+def test_many_scenarios_in_one_pass():
+    engine = ScenarioEngine(make_events(50_000))
+    result = engine.run(ScenarioSet.sample(engine.technologies, 1_000))
+    assert len(result) == 2_000
+    assert result["lden_change_db"].between(-10, 0).all()
@@ -0,0 +1,19 @@
+import os
+import subprocess
+import sys
+import settings
+from settings import get_setting
+
+def test_reads_environment_and_defaults(monkeypatch):
+    monkeypatch.setattr(settings, "_dotenv_loaded", True)
+    monkeypatch.setenv("SILENT_SKIES_TEST_KEY", "abc")
+    assert get_setting("SILENT_SKIES_TEST_KEY") == "abc"
+    monkeypatch.delenv("SILENT_SKIES_TEST_KEY")
+    assert get_setting("SILENT_SKIES_TEST_KEY") is None
+    assert get_setting("SILENT_SKIES_TEST_KEY", "fallback") == "fallback"
+
+def test_lookup_does_not_import_streamlit():
+    code = "import sys, settings; settings.get_setting('AERODATABOX_API_KEY'); print('streamlit' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(settings.__file__)))
+    assert result.stdout.strip() == "False"
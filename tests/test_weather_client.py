@@ -0,0 +1,133 @@
+import json
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from weather_client import WeatherClient
+
+PAYLOAD = {"main": {"temp": 21.5}, "wind": {"speed": 3.2}, "weather": [{"description": "light rain"}]}
+HISTORY = {"data": [{"temp": 18.0, "wind_speed": 4.1, "weather": [{"description": "clear sky"}]}]}
+
+@pytest.fixture
+def stub_server():
+    """Local OpenWeatherMap stand-in that records requests and can answer 429 first."""
+    state = {"requests": [], "throttle_first": 0, "delay": 0.0, "status": 200}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            state["requests"].append(self.path)
+            time.sleep(state["delay"])
+            if state["throttle_first"] > 0:
+                state["throttle_first"] -= 1
+                self.send_response(429)
+                self.send_header("Retry-After", "0")
+                self.end_headers()
+                return
+            if state["status"] != 200:
+                self.send_response(state["status"])
+                self.end_headers()
+                return
+            body = json.dumps(HISTORY if "timemachine" in self.path else PAYLOAD).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    state["url"] = f"http://127.0.0.1:{server.server_port}"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+def make_client(stub_server, **kwargs):
+    return WeatherClient("test-key", base_url=stub_server["url"], rate=1000, burst=100, **kwargs)
+
+def test_grid_cell_cache_hit(stub_server):
+    client = make_client(stub_server)
+
+    first = client.current(52.36221, 13.50071)
+    second = client.current(52.36349, 13.49951)
+
+    assert first == second == {"Temperature (°C)": 21.5, "Wind Speed (m/s)": 3.2, "Conditions": "Light rain"}
+    assert len(stub_server["requests"]) == 1
+    assert "lat=52.36" in stub_server["requests"][0]
+    stats = client.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["latency_avg_s"] > 0
+
+def test_ttl_expiry_refetches(stub_server):
+    client = make_client(stub_server, ttl=0)
+    client.fetch(52.36, 13.5)
+    client.fetch(52.36, 13.5)
+    assert len(stub_server["requests"]) == 2
+
+def test_concurrent_lookups_are_coalesced(stub_server):
+    stub_server["delay"] = 0.2
+    client = make_client(stub_server)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: client.fetch(52.36, 13.5), range(8)))
+
+    assert all(r == PAYLOAD for r in results)
+    assert len(stub_server["requests"]) == 1
+    assert client.stats()["coalesced"] + client.stats()["hits"] == 7
+
+def test_retries_after_429(stub_server):
+    stub_server["throttle_first"] = 2
+    client = make_client(stub_server, backoff=0)
+
+    assert client.fetch(52.36, 13.5) == PAYLOAD
+    assert len(stub_server["requests"]) == 3
+    assert client.stats()["retries"] == 2
+
+def test_gives_up_after_max_retries(stub_server):
+    stub_server["throttle_first"] = 10
+    client = make_client(stub_server, backoff=0, max_retries=1)
+
+    with pytest.raises(Exception, match="429"):
+        client.fetch(52.36, 13.5)
+    assert len(stub_server["requests"]) == 2
+
+def test_past_hours_do_not_expire(stub_server):
+    client = make_client(stub_server, ttl=0)
+    past_hour = int(time.time()) // 3600 * 3600 - 7200
+    assert client.historical(52.36, 13.5, past_hour + 120)["Conditions"] == "Clear sky"
+    client.historical(52.36, 13.5, past_hour)
+    assert len(stub_server["requests"]) == 1
+    # The hour in progress can still change, so it follows the current-weather TTL.
+    client.historical(52.36, 13.5, time.time())
+    client.historical(52.36, 13.5, time.time())
+    assert len(stub_server["requests"]) == 3
+
+def test_history_without_one_call_subscription(stub_server):
+    stub_server["status"] = 401
+    client = make_client(stub_server)
+    with pytest.raises(RuntimeError, match="One Call 3.0 subscription"):
+        client.historical(52.36, 13.5, 1_752_710_400)
+
+def test_cache_is_bounded_lru(stub_server):
+    client = make_client(stub_server, max_entries=2)
+    client.fetch(52.36, 13.5)
+    client.fetch(51.47, -0.45)
+    client.fetch(52.36, 13.5)  # refreshes the first cell
+    client.fetch(48.35, 11.79)  # evicts the second
+    client.fetch(52.36, 13.5)
+    assert len(stub_server["requests"]) == 3
+    assert client.stats()["evictions"] == 1
+    client.fetch(51.47, -0.45)
+    assert len(stub_server["requests"]) == 4
+
+def test_empty_history_payload_gives_missing_readings(stub_server):
+    stub_server["status"] = 204
+    client = make_client(stub_server)
+    summary = client.historical(52.36, 13.5, 1_752_710_400)
+    assert math.isnan(summary["Temperature (°C)"]) and summary["Conditions"] is None
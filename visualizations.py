@@ -1,37 +1,155 @@
 # visualizations.py — Silent Skies Dashboard Visualizations
+#
+# Streamlit, PyDeck, matplotlib and seaborn are imported inside the functions that use
+# them: importing this module (e.g. in a render worker or a test) stays as cheap as pandas.
+
+from __future__ import annotations
+
+import base64
+import json
+import threading
+from typing import TYPE_CHECKING
 
-import streamlit as st
-import pydeck as pdk
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+import numpy as np
+
+from airports import get_airport_index
+from chart_cache import DEFAULT_DPI, get_chart_renderer
+from downsampling import downsample
+from instrumentation import traced
+from level_sketch import EXCEEDANCE_COLUMNS
+from map_bins import DEFAULT_MAX_POINTS, bin_points, level_colors, sample_points
+from rollups import NoiseRollup
+
+if TYPE_CHECKING:
+    import pydeck as pdk
+    from matplotlib.figure import Figure
+
+_theme_lock = threading.Lock()
+_theme_applied = False
+
+def new_figure(figsize: tuple) -> Figure:
+    """Return a matplotlib Figure, applying the dashboard's seaborn theme on first use."""
+    global _theme_applied
+    from matplotlib.figure import Figure
+    with _theme_lock:
+        if not _theme_applied:
+            import seaborn as sns
+            sns.set_theme(style="whitegrid")
+            _theme_applied = True
+    return Figure(figsize=figsize)
+
+def binned_layers(
+    df: pd.DataFrame,
+    zoom: float,
+    lat_col: str,
+    lon_col: str,
+    value_col: str = None,
+    max_points: int = DEFAULT_MAX_POINTS,
+    point_color='[200, 30, 0, 160]',
+    point_radius: int = 100,
+) -> list:
+    """
+    Build PyDeck layers that aggregate points into grid cells server-side.
 
-sns.set_theme(style="whitegrid")
+    Only the non-empty cells (count, energy-averaged dB) and a capped sample of the raw
+    points are serialized to the browser, whatever the size of `df`.
 
-def plot_map(df_arrivals: pd.DataFrame, icao_list: list, airports_info: dict) -> None:
+    Args:
+        df (pd.DataFrame): Points with coordinate columns.
+        zoom (float): Initial map zoom; picks the cell size.
+        lat_col (str), lon_col (str): Coordinate columns.
+        value_col (str): Optional dB column; colors cells by Leq instead of count.
+        max_points (int): Cap on raw points drawn over the cells.
     """
-    Render a PyDeck map with arrival airport locations and flight points.
+    import pydeck as pdk
+
+    cells = bin_points(df, zoom, lat_col, lon_col, value_col)
+    if cells.empty:
+        return []
+    if value_col is not None:
+        cells['color'] = level_colors(cells['leq_db'])
+        cells['name'] = [f"{n} samples, Leq {leq:.1f} dB" for n, leq in zip(cells['count'], cells['leq_db'])]
+    else:
+        share = (cells['count'] / cells['count'].max()).to_numpy()
+        cells['color'] = [[0, int(80 + 175 * s), 255, 160] for s in share]
+        cells['name'] = [f"{n} points" for n in cells['count']]
+
+    cell_layer = pdk.Layer(
+        "GridCellLayer",
+        data=cells[['corner_lon', 'corner_lat', 'count', 'color', 'name']],
+        get_position='[corner_lon, corner_lat]',
+        cell_size=float(cells['cell_size_m'].median()),
+        get_fill_color='color',
+        get_elevation='count',
+        elevation_scale=0,
+        extruded=False,
+        pickable=True,
+    )
+    sample = sample_points(df, [lon_col, lat_col], max_points)
+    point_layer = pdk.Layer(
+        "ScatterplotLayer",
+        data=sample,
+        get_position=f'[{lon_col}, {lat_col}]',
+        get_color=point_color,
+        get_radius=point_radius,
+        pickable=False,
+    )
+    return [cell_layer, point_layer]
+
+def exposure_layer(grid, alpha: int = 160) -> pdk.Layer:
+    """
+    Build a PyDeck bitmap layer drawing an `exposure.ExposureGrid` as Lden bands.
+
+    The grid is sent once as a PNG stretched over its bounds, so the payload does
+    not grow with the number of map features.
+    """
+    import pydeck as pdk
+
+    image = base64.b64encode(grid.to_png(alpha=alpha)).decode("ascii")
+    west, south, east, north = grid.bounds
+    return pdk.Layer(
+        "BitmapLayer",
+        image=f"data:image/png;base64,{image}",
+        bounds=[west, south, east, north],
+        opacity=1.0,
+    )
+
+@traced()
+def plot_map(
+    df_arrivals: pd.DataFrame,
+    icao_list: list,
+    airports_info: dict = None,
+    zoom: float = 7,
+    exposure: list = None,
+) -> None:
+    """
+    Render a PyDeck map with arrival airport locations and binned flight points.
 
     Args:
         df_arrivals (pd.DataFrame): DataFrame containing arrival flights info.
         icao_list (list): List of ICAO airport codes selected.
-        airports_info (dict): Dict with airport lat/lon/city info.
+        airports_info (dict): Dict with airport lat/lon/city info; looked up in the
+            bundled airport index when omitted.
+        zoom (float): Initial zoom; also sets the flight aggregation cell size.
+        exposure (list): Optional `ExposureGrid`s drawn under the flights as Lden bands.
     """
+    import pydeck as pdk
+    import streamlit as st
+
     if df_arrivals.empty:
         st.warning("No arrivals data to plot on map.")
         return
 
-    # Create scatter points for flights on map
-    flight_points = df_arrivals.dropna(subset=['arrival_latitude', 'arrival_longitude'])
-    flight_layer = pdk.Layer(
-        "ScatterplotLayer",
-        data=flight_points,
-        get_position='[arrival_longitude, arrival_latitude]',
-        get_color='[200, 30, 0, 160]',
-        get_radius=1000,
-        pickable=True,
-        auto_highlight=True,
-    )
+    # Aggregate flights into grid cells server-side; only cells and a point sample are sent
+    flight_layers = []
+    if {'arrival_latitude', 'arrival_longitude'}.issubset(df_arrivals.columns):
+        flight_layers = binned_layers(
+            df_arrivals, zoom, 'arrival_latitude', 'arrival_longitude', point_radius=1000
+        )
+
+    if airports_info is None:
+        airports_info = get_airport_index().airports_info(icao_list)
 
     # Mark selected airports with bigger blue circles
     airport_points = [
@@ -54,14 +172,14 @@ def plot_map(df_arrivals: pd.DataFrame, icao_list: list, airports_info: dict) ->
         initial_view = pdk.ViewState(
             latitude=airport_points[0]['coordinates'][1],
             longitude=airport_points[0]['coordinates'][0],
-            zoom=7,
+            zoom=zoom,
             pitch=0,
         )
     else:
         initial_view = pdk.ViewState(latitude=52, longitude=13, zoom=4, pitch=0)
 
     deck = pdk.Deck(
-        layers=[flight_layer, airport_layer],
+        layers=[*[exposure_layer(grid) for grid in exposure or []], *flight_layers, airport_layer],
         initial_view_state=initial_view,
         tooltip={"text": "{name}"}
     )
@@ -69,14 +187,53 @@ def plot_map(df_arrivals: pd.DataFrame, icao_list: list, airports_info: dict) ->
     st.subheader("🗺️ Flight Arrivals Map")
     st.pydeck_chart(deck)
 
-def plot_noise_subplots(df_noise: pd.DataFrame, icao_list: list) -> None:
+NOISE_FIGSIZE = (12, 3)
+COMBINED_FIGSIZE = (14, 4)
+
+def _show(images: list) -> None:
+    import streamlit as st
+
+    for image in images:
+        st.image(image, use_container_width=True)
+
+def draw_noise_series(data: pd.DataFrame, icao: str) -> Figure:
+    """Draw one airport's (already downsampled) noise time series."""
+    fig = new_figure(NOISE_FIGSIZE)
+    ax = fig.subplots()
+    if data.empty:
+        ax.text(0.5, 0.5, f"No data for {icao}", ha='center', va='center')
+        return fig
+    import seaborn as sns
+    sns.lineplot(data=data, x='timestamp', y='noise_db', ax=ax, estimator=None, errorbar=None)
+    ax.set_title(f"Noise Levels at {icao}")
+    ax.set_ylabel("Noise (dB)")
+    ax.set_xlabel("Time")
+    ax.grid(True)
+    return fig
+
+@traced()
+def plot_noise_subplots(
+    df_noise: pd.DataFrame,
+    icao_list: list,
+    rollup: NoiseRollup = None,
+    start=None,
+    end=None,
+) -> None:
     """
     Plot noise measurements time series subplots, one subplot per selected airport ICAO.
 
     Args:
         df_noise (pd.DataFrame): Noise data with 'timestamp', 'noise_db', and 'icao' columns.
         icao_list (list): List of selected ICAO airport codes.
+        rollup (NoiseRollup): Optional pre-aggregated cube; when given, per-bucket Leq over
+            [start, end) is plotted at the coarsest resolution that fits the range.
     """
+    import streamlit as st
+
+    if rollup is not None:
+        _plot_noise_rollup(rollup, icao_list, start, end)
+        return
+
     if df_noise.empty:
         st.warning("No noise data to plot.")
         return
@@ -87,119 +244,212 @@ def plot_noise_subplots(df_noise: pd.DataFrame, icao_list: list) -> None:
         return
 
     st.subheader("🔊 Noise Level Over Time by Airport")
-    n_airports = len(icao_list)
-    fig, axes = plt.subplots(n_airports, 1, figsize=(12, 3 * n_airports), sharex=True)
-    if n_airports == 1:
-        axes = [axes]
-
-    for ax, icao in zip(axes, icao_list):
-        data = filtered[filtered['icao'] == icao]
-        if data.empty:
-            ax.text(0.5, 0.5, f"No data for {icao}", ha='center', va='center')
-            continue
-        sns.lineplot(data=data, x='timestamp', y='noise_db', ax=ax)
-        ax.set_title(f"Noise Levels at {icao}")
-        ax.set_ylabel("Noise (dB)")
-        ax.set_xlabel("")
-        ax.grid(True)
-
-    plt.xlabel("Time")
-    st.pyplot(fig)
-
-def plot_arrival_histograms(df_arrivals: pd.DataFrame) -> None:
+    # Reduce each series to ~2 points per pixel (min/max envelope keeps peaks) before
+    # fingerprinting and shipping it to a render worker.
+    n_points = 2 * NOISE_FIGSIZE[0] * DEFAULT_DPI
+    airports = dict(tuple(filtered.groupby('icao', observed=True)))
+    jobs = []
+    for icao in icao_list:
+        data = airports.get(icao, filtered.iloc[:0])[['timestamp', 'noise_db']]
+        jobs.append((downsample(data, 'timestamp', 'noise_db', n_out=n_points).reset_index(drop=True), icao))
+    _show(get_chart_renderer().render_many("noise_series", draw_noise_series, jobs))
+
+def _draw_noise_rollup(data: pd.DataFrame, icao: str) -> Figure:
+    """Draw per-bucket Leq and Lmax for one airport."""
+    fig = new_figure(NOISE_FIGSIZE)
+    ax = fig.subplots()
+    if data.empty:
+        ax.text(0.5, 0.5, f"No data for {icao}", ha='center', va='center')
+        return fig
+    ax.plot(data['bucket'], data['leq_db'], color='b', label='Leq')
+    ax.plot(data['bucket'], data['lmax_db'], color='r', alpha=0.4, label='Lmax')
+    ax.set_title(f"Noise Levels at {icao}")
+    ax.set_ylabel("Noise (dB)")
+    ax.set_xlabel("Time (UTC)")
+    ax.legend(loc='upper right')
+    ax.grid(True)
+    return fig
+
+def _plot_noise_rollup(rollup: NoiseRollup, icao_list: list, start=None, end=None) -> None:
+    """Plot per-bucket Leq and Lmax from a rollup, one subplot per airport."""
+    import streamlit as st
+
+    data = rollup.query(icao_list, start, end)
+    if data.empty:
+        st.warning("No noise data for selected airports.")
+        return
+
+    st.subheader(f"🔊 Noise Level Over Time by Airport ({data.attrs['resolution']} Leq)")
+    jobs = [
+        (data.loc[data['icao'] == icao, ['bucket', 'leq_db', 'lmax_db']].reset_index(drop=True), icao)
+        for icao in icao_list
+    ]
+    _show(get_chart_renderer().render_many("noise_rollup", _draw_noise_rollup, jobs))
+
+def _draw_arrival_histogram(counts: pd.DataFrame) -> Figure:
+    fig = new_figure((10, 4))
+    ax = fig.subplots()
+    ax.bar(counts['hour'], counts['arrivals_count'], width=1.0, color='navy', edgecolor='white')
+    ax.set_xlabel("Hour of Day (UTC)")
+    ax.set_ylabel("Number of Arrivals")
+    ax.set_xticks(range(0, 24))
+    ax.grid(True, axis='y')
+    return fig
+
+@traced()
+def plot_arrival_histograms(df_arrivals: pd.DataFrame, rollup: NoiseRollup = None) -> None:
     """
     Plot histogram of flight arrivals by hour of day aggregated across airports.
 
     Args:
         df_arrivals (pd.DataFrame): DataFrame with 'arrival_scheduled_utc' timestamps.
+        rollup (NoiseRollup): Optional pre-aggregated cube to read hourly counts from.
     """
-    if df_arrivals.empty:
+    import streamlit as st
+
+    if rollup is not None:
+        counts = rollup.arrivals_by_hour_of_day()
+    elif df_arrivals.empty:
         st.warning("No arrivals data to plot histogram.")
         return
+    else:
+        hours = df_arrivals['arrival_scheduled_utc'].dropna().dt.hour.to_numpy()
+        counts = pd.DataFrame({'hour': range(24), 'arrivals_count': np.bincount(hours, minlength=24)})
 
     st.subheader("✈️ Flight Arrivals by Hour of Day")
-
-    df_arrivals['hour'] = df_arrivals['arrival_scheduled_utc'].dt.hour
-    plt.figure(figsize=(10, 4))
-    sns.histplot(df_arrivals['hour'], bins=24, kde=False, color='navy')
-    plt.xlabel("Hour of Day (UTC)")
-    plt.ylabel("Number of Arrivals")
-    plt.xticks(range(0, 24))
-    plt.grid(True, axis='y')
-    st.pyplot(plt.gcf())
-
-def plot_combined_hourly(df_noise: pd.DataFrame, df_arrivals: pd.DataFrame, icao_list: list) -> None:
+    _show([get_chart_renderer().render("arrival_histogram", _draw_arrival_histogram, counts)])
+
+def draw_combined_hourly(data: pd.DataFrame, icao: str) -> Figure:
+    """Draw hourly Leq (and L10/L50/L90 when present) with arrival counts on a twin axis for one airport."""
+    fig = new_figure(COMBINED_FIGSIZE)
+    ax = fig.subplots()
+    if data.empty:
+        ax.text(0.5, 0.5, f"No data for {icao}", ha='center', va='center')
+        return fig
+    ax2 = ax.twinx()
+    ax.plot(data['hour'], data['leq_db'], 'b-', label='Leq (dB)')
+    if 'l10_db' in data.columns:
+        # Statistical levels: L90 (background) to L10 (exceeded 10% of the hour), with the median
+        ax.fill_between(data['hour'], data['l90_db'], data['l10_db'], color='b', alpha=0.15, label='L90–L10 (dB)')
+        ax.plot(data['hour'], data['l50_db'], 'b--', linewidth=1, label='L50 (dB)')
+    ax2.bar(data['hour'], data['arrivals_count'], alpha=0.3, color='orange', label='Arrivals Count')
+
+    ax.set_ylabel("Leq (dB)", color='b')
+    ax2.set_ylabel("Arrivals Count", color='orange')
+    ax.set_title(f"{icao} Hourly Noise & Arrivals")
+    ax.set_xlabel("Time (Hourly)")
+    ax.grid(True)
+    ax.legend(loc='upper left')
+    ax2.legend(loc='upper right')
+    fig.tight_layout()
+    return fig
+
+@traced()
+def plot_combined_hourly(
+    df_noise: pd.DataFrame,
+    df_arrivals: pd.DataFrame,
+    icao_list: list,
+    rollup: NoiseRollup = None,
+) -> None:
     """
-    Plot combined hourly average noise and number of arrivals by airport.
+    Plot combined hourly equivalent noise level (Leq) and number of arrivals by airport.
 
     Args:
         df_noise (pd.DataFrame): Noise data with 'timestamp', 'noise_db', 'icao'.
         df_arrivals (pd.DataFrame): Arrival data with 'arrival_scheduled_utc', 'icao'.
         icao_list (list): List of selected airports.
+        rollup (NoiseRollup): Optional pre-aggregated cube with a '1H' level; built from
+            the frames when omitted.
     """
-    if df_noise.empty or df_arrivals.empty:
-        st.warning("Insufficient data for combined hourly plot.")
-        return
-
-    st.subheader("📊 Hourly Average Noise & Flight Arrivals")
-
-    # Prepare noise hourly average
-    noise = df_noise[df_noise['icao'].isin(icao_list)].copy()
-    noise['hour'] = noise['timestamp'].dt.floor('H')
-    noise_avg = noise.groupby(['icao', 'hour'])['noise_db'].mean().reset_index()
-
-    # Prepare arrivals hourly count
-    arrivals = df_arrivals[df_arrivals['icao'].isin(icao_list)].copy()
-    arrivals['hour'] = arrivals['arrival_scheduled_utc'].dt.floor('H')
-    arrivals_count = arrivals.groupby(['icao', 'hour']).size().reset_index(name='arrivals_count')
-
-    # Merge on icao and hour
-    merged = pd.merge(noise_avg, arrivals_count, on=['icao', 'hour'], how='outer').fillna(0)
-
-    # Plot per airport
-    n_airports = len(icao_list)
-    fig, axes = plt.subplots(n_airports, 1, figsize=(14, 4 * n_airports), sharex=True)
-
-    if n_airports == 1:
-        axes = [axes]
-
-    for ax, icao in zip(axes, icao_list):
-        data = merged[merged['icao'] == icao].sort_values('hour')
-        if data.empty:
-            ax.text(0.5, 0.5, f"No data for {icao}", ha='center', va='center')
-            continue
-        ax2 = ax.twinx()
-        ax.plot(data['hour'], data['noise_db'], 'b-', label='Avg Noise (dB)')
-        ax2.bar(data['hour'], data['arrivals_count'], alpha=0.3, color='orange', label='Arrivals Count')
-
-        ax.set_ylabel("Avg Noise (dB)", color='b')
-        ax2.set_ylabel("Arrivals Count", color='orange')
-        ax.set_title(f"{icao} Hourly Noise & Arrivals")
-        ax.grid(True)
-        ax.legend(loc='upper left')
-        ax2.legend(loc='upper right')
-
-    plt.xlabel("Time (Hourly)")
-    plt.tight_layout()
-    st.pyplot(fig)
-
-
-
-
-
-
-
-
-
-
-
+    import streamlit as st
 
+    if rollup is None:
+        if df_noise.empty or df_arrivals.empty:
+            st.warning("Insufficient data for combined hourly plot.")
+            return
+        rollup = NoiseRollup.build(df_noise, df_arrivals, keys=("icao",), resolutions=("1H",))
 
+    st.subheader("📊 Hourly Noise Level (Leq) & Flight Arrivals")
 
+    # Hourly Leq (energy average) and arrival counts, both bucketed in UTC
+    merged = rollup.query(icao_list, resolution="1H").rename(columns={'bucket': 'hour'})
 
+    # One chart per airport, rendered in parallel for long selections
+    columns = ['hour', 'leq_db', 'arrivals_count'] + [c for c in EXCEEDANCE_COLUMNS if c in merged.columns]
+    jobs = [
+        (merged.loc[merged['icao'] == icao, columns].reset_index(drop=True), icao)
+        for icao in icao_list
+    ]
+    _show(get_chart_renderer().render_many("combined_hourly", draw_combined_hourly, jobs))
+
+def _draw_hourly_leq_bars(avg_db_hourly: pd.DataFrame) -> Figure:
+    import seaborn as sns
+
+    fig = new_figure((14, 7))
+    ax = fig.subplots()
+
+    # Histogram bars
+    sns.barplot(
+        data=avg_db_hourly,
+        x='hour',
+        y='dB',
+        hue='airport',
+        palette='Set2',
+        errorbar=None,
+        dodge=True,
+        ax=ax
+    )
 
+    # Overlay trend lines
+    for airport in avg_db_hourly['airport'].unique():
+        airport_data = avg_db_hourly[avg_db_hourly['airport'] == airport]
+        ax.plot(
+            airport_data['hour'],
+            airport_data['dB'],
+            marker='o',
+            linewidth=2,
+            label=f"{airport} Trend"
+        )
 
+    ax.set_title("Equivalent Noise Level (Leq, dB) per Hour with Overlaid Trends")
+    ax.set_xlabel("Hour of Day")
+    ax.set_ylabel("Leq (dB)")
+    ax.set_xticks(range(0, 24))
+    ax.legend(title="Airport", loc='upper right')
+    fig.tight_layout()
+    return fig
 
+@traced()
+def plot_hourly_leq_bars(avg_db_hourly: pd.DataFrame) -> None:
+    """
+    Plot hour-of-day Leq bars with per-airport trend lines.
 
+    Args:
+        avg_db_hourly (pd.DataFrame): Columns 'airport', 'hour' (0-23) and 'dB'.
+    """
+    _show([get_chart_renderer().render("hourly_leq_bars", _draw_hourly_leq_bars, avg_db_hourly)])
 
+def show_debug_panel(tracer) -> None:
+    """
+    Show the spans recorded during this run with a Chrome-trace download.
 
+    Args:
+        tracer (Tracer): Tracer activated at the start of the run.
+    """
+    import streamlit as st
+
+    spans = tracer.to_frame()
+    with st.expander("⏱️ Performance debug panel", expanded=True):
+        if spans.empty:
+            st.info("No instrumented stages ran.")
+            return
+        top_level = spans[spans['depth'] == 0]
+        st.write(f"{len(spans)} spans, {top_level['duration_ms'].sum():.0f} ms in top-level stages")
+        spans['name'] = ["  " * depth + name for depth, name in zip(spans['depth'], spans['name'])]
+        st.dataframe(spans.drop(columns=['depth']), use_container_width=True)
+        st.download_button(
+            "Download Chrome trace (JSON)",
+            data=json.dumps(tracer.to_chrome_trace()),
+            file_name="silent_skies_trace.json",
+            mime="application/json",
+        )
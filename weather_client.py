@@ -0,0 +1,304 @@
+# weather_client.py — Pooled, cached and rate-limited OpenWeatherMap client
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+OPENWEATHER_BASE_URL = "https://api.openweathermap.org"
+DEFAULT_HISTORY_TTL = 7 * 24 * 3600
+# A few months of hourly history for a handful of airports; each entry is a small JSON payload.
+DEFAULT_MAX_ENTRIES = 10_000
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate` requests per second with bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until a token is available and return the time spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+def request_with_retry(
+    session,
+    bucket: TokenBucket,
+    url: str,
+    params: dict = None,
+    max_retries: int = 3,
+    backoff: float = 0.5,
+    timeout: float = 10,
+    on_request=None,
+    on_retry=None,
+) -> dict:
+    """
+    GET `url` and return its JSON body, pacing attempts with `bucket` and retrying 429/5xx.
+
+    A retry waits for Retry-After when the server gives it in seconds, otherwise
+    `backoff * 2 ** attempt`. A 204 response returns {}; any other error status raises
+    `requests.HTTPError` once retries are used up.
+
+    Args:
+        session (requests.Session): Pooled session the request goes through.
+        bucket (TokenBucket): Rate limiter; every attempt takes one token.
+        url (str): Full request URL.
+        params (dict): Query parameters.
+        max_retries (int): Retries after the first attempt.
+        backoff (float): Base delay in seconds for exponential backoff.
+        timeout (float): Per-attempt timeout in seconds.
+        on_request: Called as `on_request(waited_s, elapsed_s)` after every attempt.
+        on_retry: Called with no arguments before every retry.
+    """
+    for attempt in range(max_retries + 1):
+        waited = bucket.acquire()
+        start = time.perf_counter()
+        response = session.get(url, params=params, timeout=timeout)
+        if on_request is not None:
+            on_request(waited, time.perf_counter() - start)
+
+        if response.status_code == 204:
+            return {}
+        retryable = response.status_code == 429 or response.status_code >= 500
+        if not retryable or attempt == max_retries:
+            response.raise_for_status()
+            return response.json()
+
+        if on_retry is not None:
+            on_retry()
+        retry_after = response.headers.get("Retry-After")
+        time.sleep(float(retry_after) if retry_after and retry_after.isdigit() else backoff * 2 ** attempt)
+
+
+class WeatherClient:
+    """
+    OpenWeatherMap client shared across reruns.
+
+    Lookups are snapped to a lat/lon grid (`grid_decimals` places, ~1 km at 2) so nearby
+    coordinates share one TTL cache entry. Concurrent callers asking for the same cell
+    wait on a single in-flight request, outgoing calls go through a token bucket, and
+    HTTP 429/5xx responses are retried with exponential backoff (honouring Retry-After).
+
+    Current weather expires after `ttl` seconds. Observations for hours that have
+    already ended do not change, so they are kept for `history_ttl` seconds (until
+    evicted when None). At most `max_entries` observations are cached; the least
+    recently used are evicted first.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = OPENWEATHER_BASE_URL,
+        ttl: float = 600,
+        history_ttl: float = DEFAULT_HISTORY_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        grid_decimals: int = 2,
+        rate: float = 1.0,
+        burst: int = 5,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        timeout: float = 10,
+        pool_size: int = 10,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.ttl = ttl
+        self.history_ttl = history_ttl
+        self.max_entries = max_entries
+        self.grid_decimals = grid_decimals
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.bucket = TokenBucket(rate, burst)
+
+        # Imported here so modules that never call the API do not pay for requests.
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._cache = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "requests": 0,
+            "retries": 0,
+            "rate_limited_wait_s": 0.0,
+            "latency_total_s": 0.0,
+        }
+
+    def grid_cell(self, lat: float, lon: float) -> tuple:
+        """Return the rounded (lat, lon) cell used as cache key and request coordinates."""
+        return round(float(lat), self.grid_decimals), round(float(lon), self.grid_decimals)
+
+    def fetch(self, lat: float, lon: float) -> dict:
+        """Return the raw current-weather JSON for the grid cell containing (lat, lon)."""
+        cell_lat, cell_lon = self.grid_cell(lat, lon)
+        params = {"lat": cell_lat, "lon": cell_lon, "units": "metric"}
+        return self._cached(("current", cell_lat, cell_lon), "/data/2.5/weather", params, self.ttl)
+
+    def current(self, lat: float, lon: float) -> dict:
+        """Return current conditions in the dashboard's summary format."""
+        return summarize_weather(self.fetch(lat, lon))
+
+    def historical(self, lat: float, lon: float, hour_ts: int) -> dict:
+        """
+        Return conditions for the hour starting at `hour_ts` (Unix seconds, UTC).
+
+        Uses the One Call 3.0 time machine endpoint, which needs a One Call by Call
+        subscription on the API key in addition to the free current-weather access.
+        The timestamp is floored to the hour so every row in the same hour bucket shares
+        one cache entry; hours that have already ended use `history_ttl`.
+        """
+        cell_lat, cell_lon = self.grid_cell(lat, lon)
+        hour_ts = int(hour_ts) // 3600 * 3600
+        params = {"lat": cell_lat, "lon": cell_lon, "dt": hour_ts, "units": "metric"}
+        ttl = self.history_ttl if hour_ts + 3600 <= time.time() else self.ttl
+        try:
+            data = self._cached(("history", cell_lat, cell_lon, hour_ts), "/data/3.0/onecall/timemachine", params, ttl)
+        except Exception as e:
+            if getattr(getattr(e, "response", None), "status_code", None) in (401, 403):
+                raise RuntimeError(
+                    f"Historical weather needs an OpenWeatherMap One Call 3.0 subscription for this API key: {e}"
+                ) from e
+            raise
+        return summarize_history(data)
+
+    def _cached(self, key: tuple, path: str, params: dict, ttl: float) -> dict:
+        """Return the cached payload for `key`, fetching it on a miss; a `ttl` of None never expires."""
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._cache.move_to_end(key)
+                self._counters["hits"] += 1
+                return entry[1]
+            future = self._in_flight.get(key)
+            if future is not None:
+                self._counters["coalesced"] += 1
+                owner = False
+            else:
+                self._counters["misses"] += 1
+                future = self._in_flight[key] = Future()
+                owner = True
+
+        if not owner:
+            return future.result()
+
+        try:
+            data = self._request(path, params)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(data)
+            with self._lock:
+                expires = math.inf if ttl is None else time.monotonic() + ttl
+                self._cache[key] = (expires, data)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+                    self._counters["evictions"] += 1
+            return data
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def _request(self, path: str, params: dict) -> dict:
+        return request_with_retry(
+            self.session,
+            self.bucket,
+            f"{self.base_url}{path}",
+            {**params, "appid": self.api_key},
+            max_retries=self.max_retries,
+            backoff=self.backoff,
+            timeout=self.timeout,
+            on_request=self._count_request,
+            on_retry=self._count_retry,
+        )
+
+    def _count_request(self, waited: float, elapsed: float) -> None:
+        with self._lock:
+            self._counters["requests"] += 1
+            self._counters["latency_total_s"] += elapsed
+            self._counters["rate_limited_wait_s"] += waited
+
+    def _count_retry(self) -> None:
+        with self._lock:
+            self._counters["retries"] += 1
+
+    def stats(self) -> dict:
+        """Return cache, request and latency counters."""
+        with self._lock:
+            stats = dict(self._counters)
+        lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_rate"] = (stats["hits"] + stats["coalesced"]) / lookups if lookups else 0.0
+        stats["latency_avg_s"] = stats["latency_total_s"] / stats["requests"] if stats["requests"] else 0.0
+        return stats
+
+    def clear(self) -> None:
+        """Drop every cached observation."""
+        with self._lock:
+            self._cache.clear()
+
+
+def summarize_weather(data: dict) -> dict:
+    """Reduce an OpenWeatherMap current-weather payload to the dashboard's columns."""
+    return {
+        "Temperature (°C)": data["main"]["temp"],
+        "Wind Speed (m/s)": data["wind"]["speed"],
+        "Conditions": data["weather"][0]["description"].capitalize(),
+    }
+
+
+def summarize_history(data: dict) -> dict:
+    """
+    Reduce a One Call time machine payload to the dashboard's columns.
+
+    An empty payload (HTTP 204, or no observation for that hour) gives NaN readings
+    and no conditions.
+    """
+    if not data.get("data"):
+        return {"Temperature (°C)": float("nan"), "Wind Speed (m/s)": float("nan"), "Conditions": None}
+    observation = data["data"][0]
+    return {
+        "Temperature (°C)": observation["temp"],
+        "Wind Speed (m/s)": observation["wind_speed"],
+        "Conditions": observation["weather"][0]["description"].capitalize(),
+    }
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_weather_client(api_key: str) -> WeatherClient:
+    """Return the process-wide client for an API key, creating it on first use."""
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            client = _clients[api_key] = WeatherClient(api_key)
+        return client